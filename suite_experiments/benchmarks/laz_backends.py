@@ -0,0 +1,67 @@
+"""
+Compares the laspy LAZ backends on real tiles.
+
+    python benchmarks/laz_backends.py tile1.laz tile2.laz --repeat 3
+
+For every available backend it times a full read, a Z-only selective read (the
+Step 1 statistics pass) and a LAZ write of the decoded points.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import laspy
+
+def _time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_file(path, backend, repeat):
+    def full_read():
+        with laspy.open(path, laz_backend=backend) as reader:
+            reader.read()
+
+    def z_read():
+        selection = laspy.DecompressionSelection.XY_RETURNS_CHANNEL | laspy.DecompressionSelection.Z
+        with laspy.open(path, laz_backend=backend, decompression_selection=selection) as reader:
+            for points in reader.chunk_iterator(2_000_000):
+                points.z.min()
+
+    with laspy.open(path, laz_backend=backend) as reader:
+        las = reader.read()
+    out_path = os.path.join(tempfile.gettempdir(), "laz_backend_bench.laz")
+
+    def write():
+        with laspy.open(out_path, mode='w', header=las.header, laz_backend=backend) as writer:
+            writer.write_points(las.points)
+
+    try:
+        return len(las.points), _time(full_read, repeat), _time(z_read, repeat), _time(write, repeat)
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="LAZ tiles to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best time is reported)")
+    args = parser.parse_args()
+
+    backends = [b for b in laspy.LazBackend if b.is_available()]
+    if not backends:
+        sys.exit("No LAZ backend is installed. Please run 'pip install laspy[lazrs]'.")
+    print(f"RAYON_NUM_THREADS={os.environ.get('RAYON_NUM_THREADS', '(all cores)')}, CPUs={os.cpu_count()}")
+    print(f"{'file':<30} {'backend':<14} {'points':>12} {'read s':>8} {'z-read s':>9} {'write s':>8} {'Mpts/s':>8}")
+    for path in args.files:
+        for backend in backends:
+            points, read_s, z_s, write_s = bench_file(path, backend, args.repeat)
+            print(f"{os.path.basename(path):<30} {backend.name:<14} {points:>12,} {read_s:>8.3f} {z_s:>9.3f} {write_s:>8.3f} {points / read_s / 1e6:>8.2f}")
+
+if __name__ == "__main__":
+    main()
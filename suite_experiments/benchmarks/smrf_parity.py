@@ -0,0 +1,91 @@
+"""
+Compares the built-in NumPy SMRF against PDAL's filters.smrf on real tiles.
+
+    python benchmarks/smrf_parity.py tile.laz --slope 0.15 --window 18 --threshold 0.5 --pdal pdal
+
+Both engines classify the same points (classification reset to 0 first). The script reports
+the run times, the ground counts and how many points the engines agree on; run it after any
+change to modules/smrf_numpy.py. Use --tile-cells to check the tiled mode against PDAL too.
+
+A tile fails when the engines agree on fewer than --min-agree percent of the points or their
+ground counts differ by more than --ground-tolerance percent of PDAL's; the script then exits
+with status 1, so it can gate a change in CI.
+
+Reference results: none recorded yet. PDAL was not available where the built-in engine was
+written, so the defaults below are acceptance targets, not measured agreement. Record the
+first run on the reference tiles here (file, points, agree %, ground count difference).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import laspy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.smrf_numpy import classify_las
+
+DEFAULT_MIN_AGREE = 95.0
+DEFAULT_GROUND_TOLERANCE = 5.0
+
+def run_pdal(pdal_exe, input_path, params, returns, work_dir):
+    output_path = os.path.join(work_dir, "pdal_smrf.las")
+    pipeline = [
+        input_path,
+        {"type": "filters.assign", "assignment": "Classification[:]=0"},
+        {"type": "filters.smrf", **params, "returns": returns},
+        {"type": "writers.las", "filename": output_path},
+    ]
+    pipeline_path = os.path.join(work_dir, "pdal_smrf.json")
+    with open(pipeline_path, 'w') as f:
+        json.dump({"pipeline": pipeline}, f)
+    start = time.perf_counter()
+    subprocess.run([pdal_exe, "pipeline", pipeline_path], check=True)
+    elapsed = time.perf_counter() - start
+    return laspy.read(output_path).classification == 2, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="LAS/LAZ tiles to compare")
+    parser.add_argument("--slope", type=float, default=0.15)
+    parser.add_argument("--window", type=float, default=18.0)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--scalar", type=float, default=1.25)
+    parser.add_argument("--cell", type=float, default=1.0)
+    parser.add_argument("--returns", default="last,only")
+    parser.add_argument("--tile-cells", type=int, default=None, help="Force the tiled mode with tiles of this many cells")
+    parser.add_argument("--pdal", default="pdal", help="PDAL executable")
+    parser.add_argument("--min-agree", type=float, default=DEFAULT_MIN_AGREE, help="Lowest acceptable agreement in percent of the points")
+    parser.add_argument("--ground-tolerance", type=float, default=DEFAULT_GROUND_TOLERANCE,
+                        help="Largest acceptable ground count difference in percent of PDAL's ground count")
+    args = parser.parse_args()
+    params = {"slope": args.slope, "window": args.window, "threshold": args.threshold, "scalar": args.scalar, "cell": args.cell}
+
+    print(f"{'file':<30} {'points':>12} {'pdal s':>8} {'numpy s':>8} {'pdal gnd':>10} {'numpy gnd':>10} {'agree %':>8} {'only pdal':>10} {'only numpy':>10} {'result':>6}")
+    failures = 0
+    for path in args.files:
+        with tempfile.TemporaryDirectory() as work_dir:
+            pdal_ground, pdal_s = run_pdal(args.pdal, path, params, args.returns, work_dir)
+            las = laspy.read(path)
+            las.classification = np.zeros(len(las.points), dtype=np.uint8)
+            start = time.perf_counter()
+            numpy_ground = classify_las(las, returns=args.returns, tile_cells=args.tile_cells, log_callback=lambda m: None, **params)
+            numpy_s = time.perf_counter() - start
+        agree = (pdal_ground == numpy_ground).mean() * 100
+        pdal_count, numpy_count = int(pdal_ground.sum()), int(numpy_ground.sum())
+        ground_diff = abs(numpy_count - pdal_count) / max(pdal_count, 1) * 100
+        passed = agree >= args.min_agree and ground_diff <= args.ground_tolerance
+        failures += not passed
+        print(f"{os.path.basename(path):<30} {len(las.points):>12,} {pdal_s:>8.2f} {numpy_s:>8.2f} {pdal_count:>10,} {numpy_count:>10,} "
+              f"{agree:>8.2f} {int((pdal_ground & ~numpy_ground).sum()):>10,} {int((numpy_ground & ~pdal_ground).sum()):>10,} {'ok' if passed else 'FAIL':>6}")
+
+    if failures:
+        print(f"{failures} of {len(args.files)} tile(s) below --min-agree {args.min_agree}% or outside --ground-tolerance {args.ground_tolerance}%.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,15 @@ DEFAULT_CONFIG = {
     "theme_name": "solar",
     "pdal_path": "",
     "pdal_wrench_path": "",
-    "rtklib_path": ""
+    "rtklib_path": "",
+    "point_cache_enabled": False,
+    "point_cache_dir": "",
+    "point_cache_max_gb": 20,
+    "spatial_sort_curve": "none",
+    "intermediate_policy": "laz",
+    "scratch_dir": "",
+    "laz_threads": 0,
+    "smrf_engine": "pdal"
 }
 
 def load_settings():
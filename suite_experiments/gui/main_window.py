@@ -2,6 +2,7 @@ import tkinter as tk
 import ttkbootstrap as ttk
 import sys
 import subprocess
+import threading
 
 # Import Core Logic
 from core.config import load_settings, save_settings
@@ -9,6 +10,10 @@ from core.config import load_settings, save_settings
 # Import GUI Components
 from gui.main_menu import MainMenuFrame
 from gui.widgets import OperationLogFrame
+from utils.point_cache import PointCache, DEFAULT_CACHE_DIR
+from utils.intermediates import IntermediateStore, INTERMEDIATE_POLICIES
+from utils.las_io import configure_laz_threads
+from modules.smrf_numpy import SMRF_ENGINES
 
 # Import Modules
 # We import these directly now that the files exist.
@@ -43,9 +48,21 @@ class App(ttk.Window):
         self.pdal_path_var = tk.StringVar()
         self.pdal_wrench_path_var = tk.StringVar()
         self.rtklib_path_var = tk.StringVar()
+
+        # Performance
+        self.point_cache_enabled_var = tk.BooleanVar()
+        self.point_cache_dir_var = tk.StringVar()
+        self.point_cache_max_gb_var = tk.StringVar()
+        self.spatial_sort_var = tk.StringVar()
+        self.intermediate_policy_var = tk.StringVar()
+        self.scratch_dir_var = tk.StringVar()
+        self.laz_threads_var = tk.StringVar()
+        self.smrf_engine_var = tk.StringVar()
+        self._point_cache = None
         
         # Process Management
         self.running_processes = {}
+        self._process_lock = threading.Lock()
         self.was_terminated = False
 
         # --- Setup UI ---
@@ -121,6 +138,15 @@ class App(ttk.Window):
         self.pdal_path_var.set(config.get("pdal_path", ""))
         self.pdal_wrench_path_var.set(config.get("pdal_wrench_path", ""))
         self.rtklib_path_var.set(config.get("rtklib_path", ""))
+        self.point_cache_enabled_var.set(config.get("point_cache_enabled", False))
+        self.point_cache_dir_var.set(config.get("point_cache_dir", ""))
+        self.point_cache_max_gb_var.set(str(config.get("point_cache_max_gb", 20)))
+        self.spatial_sort_var.set(config.get("spatial_sort_curve", "none"))
+        self.intermediate_policy_var.set(config.get("intermediate_policy", "laz"))
+        self.scratch_dir_var.set(config.get("scratch_dir", ""))
+        self.laz_threads_var.set(str(config.get("laz_threads", 0)))
+        configure_laz_threads(self._laz_threads())
+        self.smrf_engine_var.set(config.get("smrf_engine", "pdal"))
         
         self.theme_is_dark.set(self.theme_name_var.get() == "solar")
 
@@ -133,10 +159,55 @@ class App(ttk.Window):
             "theme_name": self.theme_name_var.get(),
             "pdal_path": self.pdal_path_var.get(),
             "pdal_wrench_path": self.pdal_wrench_path_var.get(),
-            "rtklib_path": self.rtklib_path_var.get()
+            "rtklib_path": self.rtklib_path_var.get(),
+            "point_cache_enabled": self.point_cache_enabled_var.get(),
+            "point_cache_dir": self.point_cache_dir_var.get(),
+            "point_cache_max_gb": self._point_cache_max_gb(),
+            "spatial_sort_curve": self.spatial_sort_var.get(),
+            "intermediate_policy": self.intermediate_policy_var.get(),
+            "scratch_dir": self.scratch_dir_var.get(),
+            "laz_threads": self._laz_threads(),
+            "smrf_engine": self.get_smrf_engine()
         }
         save_settings(config_data)
 
+    def _point_cache_max_gb(self):
+        try:
+            return max(float(self.point_cache_max_gb_var.get()), 0.0)
+        except ValueError:
+            return 20
+
+    def _laz_threads(self):
+        try:
+            return max(int(self.laz_threads_var.get()), 0)
+        except ValueError:
+            return 0
+
+    def get_point_cache(self):
+        """Returns the shared point cache, or None when caching is disabled in the configuration."""
+        if not self.point_cache_enabled_var.get():
+            return None
+        cache_dir = self.point_cache_dir_var.get() or DEFAULT_CACHE_DIR
+        if self._point_cache is None or self._point_cache.cache_dir != cache_dir:
+            self._point_cache = PointCache(cache_dir)
+        self._point_cache.max_bytes = int(self._point_cache_max_gb() * 1024**3)
+        return self._point_cache
+
+    def get_spatial_sort_curve(self):
+        """Returns the space-filling curve used to reorder merged outputs, or None when sorting is off."""
+        curve = self.spatial_sort_var.get()
+        return curve if curve in ("morton", "hilbert") else None
+
+    def get_smrf_engine(self):
+        """Returns the ground classification engine: 'pdal' (filters.smrf) or 'numpy' (built-in)."""
+        engine = self.smrf_engine_var.get()
+        return engine if engine in SMRF_ENGINES else "pdal"
+
+    def create_intermediate_store(self):
+        """Returns a new IntermediateStore for one workflow run, following the configured policy."""
+        policy = self.intermediate_policy_var.get()
+        return IntermediateStore(policy if policy in INTERMEDIATE_POLICIES else "laz", self.scratch_dir_var.get() or None)
+
     def on_closing(self):
         """Sets the behavior of the app when the application window is closed"""
         self.terminate_all_processes()
@@ -208,22 +279,27 @@ class App(ttk.Window):
         self.after(10, self._resize_window)
 
     def terminate_frame_process(self, frame_instance):
-        """Forcefully terminates the process associated with a specific tool frame."""
-        process_to_kill = self.running_processes.get(frame_instance)
-        if process_to_kill and process_to_kill.poll() is None:
+        """Forcefully terminates the process(es) associated with a specific tool frame."""
+        registered = self.running_processes.get(frame_instance)
+        # A frame running several tools at once (e.g. a parameter sweep) registers a list of processes
+        processes = list(registered) if isinstance(registered, (list, tuple, set)) else [registered]
+        processes_to_kill = [p for p in processes if p is not None and p.poll() is None]
+        if processes_to_kill:
             log = self.log_frame.log
             log("="*20)
             log("--- [SYSTEM] User requested process termination. ---")
             self.was_terminated = True
             try:
-                if sys.platform == 'win32':
-                    kill_command = ['taskkill', '/F', '/T', '/PID', str(process_to_kill.pid)]
-                    subprocess.run(kill_command, check=False, creationflags=subprocess.CREATE_NO_WINDOW, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                    log(f"    > Successfully sent termination signal to process tree with PID: {process_to_kill.pid}")
-                else:
-                    process_to_kill.terminate()
-                    log(f"    > Sent termination signal to process with PID: {process_to_kill.pid}")
-                process_to_kill.wait(timeout=2)
+                for process_to_kill in processes_to_kill:
+                    if sys.platform == 'win32':
+                        kill_command = ['taskkill', '/F', '/T', '/PID', str(process_to_kill.pid)]
+                        subprocess.run(kill_command, check=False, creationflags=subprocess.CREATE_NO_WINDOW, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                        log(f"    > Successfully sent termination signal to process tree with PID: {process_to_kill.pid}")
+                    else:
+                        process_to_kill.terminate()
+                        log(f"    > Sent termination signal to process with PID: {process_to_kill.pid}")
+                for process_to_kill in processes_to_kill:
+                    process_to_kill.wait(timeout=2)
             except Exception as e:
                 log(f"    > Could not terminate the process cleanly: {e}")
             finally:
@@ -236,6 +312,26 @@ class App(ttk.Window):
                 elif hasattr(frame_instance, 'set_ui_state'):
                     frame_instance.set_ui_state(False)
 
+    def register_process(self, frame_instance, process):
+        """Adds one of several concurrent processes to the frame's entry in running_processes."""
+        with self._process_lock:
+            registered = self.running_processes.get(frame_instance)
+            if not isinstance(registered, list):
+                registered = [registered] if registered is not None else []
+                self.running_processes[frame_instance] = registered
+            registered.append(process)
+
+    def unregister_process(self, frame_instance, process):
+        with self._process_lock:
+            registered = self.running_processes.get(frame_instance)
+            if isinstance(registered, list):
+                if process in registered:
+                    registered.remove(process)
+                if not registered:
+                    del self.running_processes[frame_instance]
+            elif registered is process:
+                del self.running_processes[frame_instance]
+
     def terminate_all_processes(self):
         """Terminates all currently running background processes before exiting."""
         if self.running_processes:
@@ -0,0 +1,141 @@
+import os
+import re
+import csv
+from concurrent.futures import as_completed
+
+from utils.common import log_message
+from utils.las_io import iter_chunks, open_las, require_laspy, process_pool, DEFAULT_CHUNK_SIZE
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DROP = -1
+# LAS 1.2 stored overlap points as class 12; point formats 6+ keep that in the overlap flag instead
+OVERLAP_CLASS = 12
+# Mapping tables as text: 'source:target' pairs, 'drop' removes the points
+REMAP_PRESETS = {
+    "Drop Class 0 (Never Classified)": "0:drop",
+    "ASPRS LAS 1.2 -> 1.4 (Overlap 12 -> 1 + overlap flag)": "12:1",
+    "Drop Noise (7, 18)": "7:drop, 18:drop",
+    "Noise to Low Noise (18 -> 7)": "18:7",
+    "Unclassified to Never Classified (1 -> 0)": "1:0",
+}
+DEFAULT_PRESET = "Drop Class 0 (Never Classified)"
+
+def _parse_target(value):
+    value = str(value).strip().lower()
+    if value in ("drop", "x", "-", ""):
+        return DROP
+    return int(value)
+
+def parse_mapping(text):
+    """
+    Parses a mapping table such as '0:drop, 12:1, 7->18' (pairs separated by commas, semicolons or
+    new lines; ':', '->' or '=' between source and target). Returns {source code: target code or DROP}.
+    """
+    mapping = {}
+    for pair in re.split(r"[,;\n]+", text):
+        if not pair.strip():
+            continue
+        parts = re.split(r"\s*(?:->|:|=)\s*", pair.strip())
+        if len(parts) != 2:
+            raise ValueError(f"'{pair.strip()}' is not a 'source:target' pair.")
+        source, target = int(parts[0]), _parse_target(parts[1])
+        if not 0 <= source <= 255 or not (target == DROP or 0 <= target <= 255):
+            raise ValueError(f"'{pair.strip()}': class codes must be between 0 and 255.")
+        mapping[source] = target
+    if not mapping:
+        raise ValueError("The mapping table is empty.")
+    return mapping
+
+def load_mapping_csv(path):
+    """Reads a two-column (source, target) mapping CSV, e.g. a vendor to client code table. A header row is skipped."""
+    pairs = []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            if not row[0].strip().isdigit():
+                continue
+            pairs.append(f"{row[0].strip()}:{row[1].strip() or 'drop'}")
+    return parse_mapping(", ".join(pairs))
+
+def format_mapping(mapping):
+    """The inverse of parse_mapping, used to show a loaded table in the UI."""
+    return ", ".join(f"{source}:{'drop' if target == DROP else target}" for source, target in sorted(mapping.items()))
+
+def build_lut(mapping):
+    """Returns the 256-entry lookup table of a mapping (identity for unmapped codes, DROP for dropped ones)."""
+    lut = np.arange(256, dtype=np.int16)
+    for source, target in mapping.items():
+        lut[source] = target
+    return lut
+
+def remap_file(input_path, output_path, lut, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams one file through a class lookup table: Classification is rewritten with one table lookup per
+    chunk and points mapped to DROP are removed. Everything else is copied in the source point format.
+    On point formats 6+ points moved out of class 12 (LAS 1.2 overlap) get the overlap flag set.
+    Returns (points written, points dropped, points whose class changed).
+    """
+    require_laspy()
+    lut = np.asarray(lut, dtype=np.int16)
+    with open_las(input_path) as reader:
+        header = reader.header
+    # Point formats 0-5 store the class in 5 bits
+    targets = lut[(lut != DROP) & (lut != np.arange(256))]
+    if header.point_format.id < 6 and len(targets) and targets.max() > 31:
+        raise ValueError(f"'{os.path.basename(input_path)}' uses point format {header.point_format.id}, which only holds classes 0-31.")
+    flag_overlap = header.point_format.id >= 6 and lut[OVERLAP_CLASS] not in (DROP, OVERLAP_CLASS)
+    written = dropped = changed = 0
+    with open_las(output_path, mode='w', header=header) as writer:
+        for points in iter_chunks(input_path, chunk_size):
+            classes = np.asarray(points.classification, dtype=np.uint8)
+            mapped = lut[classes]
+            keep = mapped != DROP
+            changed += int(np.count_nonzero(keep & (mapped != classes)))
+            if not keep.all():
+                dropped += int(len(keep) - np.count_nonzero(keep))
+                points = points[np.nonzero(keep)[0]]
+                mapped = mapped[keep]
+            if len(points):
+                if flag_overlap:
+                    overlap = np.asarray(points.overlap).astype(bool) | (np.asarray(points.classification) == OVERLAP_CLASS)
+                    points.overlap = overlap.astype(np.uint8)
+                points.classification = mapped.astype(np.uint8)
+                writer.write_points(points)
+                written += len(points)
+    return written, dropped, changed
+
+def remap_batch(input_files, mapping, output_name="{stem}_remap.laz", max_workers=None, log_callback=None):
+    """
+    Applies a class mapping to several files, one file per worker process at a time.
+    Outputs are written next to their inputs. Returns the list of written files and the list of inputs that failed.
+    """
+    require_laspy()
+    lut = build_lut(mapping)
+    total_files = len(input_files)
+    log_message(log_callback, f"--- Remapping classes of {total_files} file(s) ({format_mapping(mapping)}) ---")
+
+    written, failed = [], []
+    with process_pool(max_workers) as executor:
+        futures = {}
+        for path in input_files:
+            output_path = os.path.join(os.path.dirname(path), output_name.format(stem=os.path.splitext(os.path.basename(path))[0]))
+            futures[executor.submit(remap_file, path, output_path, lut)] = (path, output_path)
+        for i, future in enumerate(as_completed(futures), start=1):
+            path, output_path = futures[future]
+            try:
+                kept, dropped, changed = future.result()
+                written.append(output_path)
+                log_message(log_callback, f"({i}/{total_files}) Remapped: {os.path.basename(path)} ({changed:,} reclassified, {dropped:,} dropped, {kept:,} written)")
+            except Exception as e:
+                failed.append(path)
+                log_message(log_callback, f"({i}/{total_files}) [!] Failed to remap {os.path.basename(path)}: {e}")
+
+    if not written:
+        raise RuntimeError("None of the input files could be remapped.")
+    return sorted(written), failed
@@ -6,17 +6,39 @@ import os
 import sys
 import tempfile
 import json
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
 from core.execution import _execute_command, _execute_pdal_pipeline
 from utils.files import get_output_filename, get_laz_output_filename
+from utils.las_io import read_dimensions, z_range_from_histogram, open_las, parse_crs_or_none, DEFAULT_CHUNK_SIZE
+from utils.output_profiles import pdal_writer_options, pdal_profile_filters, profile_labels, profile_name_from_label, DEFAULT_OUTPUT_PROFILE, OUTPUT_PROFILES
+from modules.smrf_sweep import run_sweep, rank_sweep, expand_grid, parse_values
+from modules.smrf_numpy import classify_dimensions, SMRF_DIMENSIONS
+from utils.rasters import write_mean_raster
+from utils.pipelines import denoise_products_pipeline
+from utils.thinning import THINNING_METHODS, thinning_method_from_label
+from utils.pipelined import Stage, run_pipelined
+from modules.polygon_reclass import RECLASS_ENGINES, reclass_engine_from_label, reclassify_batch, materialize_deltas
+from utils.class_deltas import sidecar_path
+from modules.incremental_reclass import run_incremental_reclass_by_folder
+from modules.outlier_filter import (DENOISE_MODES, NOISE_ACTIONS, DEFAULT_MEAN_K, DEFAULT_MULTIPLIER, DEFAULT_RADIUS, DEFAULT_MIN_K,
+                                    denoise_mode_from_label, noise_action_from_label, filter_outliers)
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Constants
 FONT_FAMILY = "Segoe UI"
 
 # --- Helper Function for Manual Reclassification ---
-def class_assign_from_polygon(input_laz_path, shp_file, log_widget, controller=None, frame_instance=None):
+def class_assign_from_polygon(input_laz_path, shp_file, log_widget, controller=None, frame_instance=None, output_profile="full"):
     """Reclassifies the point cloud using an input shapefile containing polygons with assigned Class"""
     suffix = f"_reclass"
     output_path = get_laz_output_filename(input_laz_path, suffix)
@@ -29,12 +51,11 @@ def class_assign_from_polygon(input_laz_path, shp_file, log_widget, controller=N
             "datasource": shp_file,
             "column": "Class"
         },
+        *pdal_profile_filters(output_profile),
         {
             "type": "writers.las",
             "filename": output_path,
-            "minor_version": 2,
-            "dataformat_id": 3,
-            "forward": "all",
+            **pdal_writer_options(output_profile),
         }
     ]
     
@@ -92,6 +113,11 @@ class ManualReclassFrame(ttk.Frame):
         self.controller = controller
         self.input_laz_path = tk.StringVar()
         self.shp_file_path = tk.StringVar()
+        self.engine_var = tk.StringVar(value=RECLASS_ENGINES["strtree"])
+        self.as_deltas_var = tk.BooleanVar(value=False)
+        self.incremental_var = tk.BooleanVar(value=False)
+        self.tile_index_path = tk.StringVar()
+        self.output_profile_var = tk.StringVar(value=OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.is_processing = False
         self.create_widgets()
         
@@ -100,9 +126,12 @@ class ManualReclassFrame(ttk.Frame):
 
     def _check_run_button_state(self, *args):
         if self.is_processing: return
-        laz_ok = os.path.isfile(self.input_laz_path.get())
+        laz_paths = self._laz_paths()
+        laz_ok = bool(laz_paths) and all(os.path.isfile(p) for p in laz_paths)
         shp_ok = os.path.isfile(self.shp_file_path.get())
         self.run_button.config(state="normal" if laz_ok and shp_ok else "disabled")
+        deltas_ok = laz_ok and any(os.path.isfile(sidecar_path(p)) for p in laz_paths)
+        self.merge_button.config(state="normal" if deltas_ok else "disabled")
 
     def create_widgets(self):
         self.grid_columnconfigure(0, weight=1)
@@ -111,7 +140,7 @@ class ManualReclassFrame(ttk.Frame):
         input_frame.grid(row=0, column=0, sticky="ew")
         input_frame.grid_columnconfigure(1, weight=1)
 
-        ttk.Label(input_frame, text="Input point cloud file (.laz):").grid(row=0, column=0, sticky="w", padx=5, pady=10)
+        ttk.Label(input_frame, text="Input point cloud file(s) (.laz):").grid(row=0, column=0, sticky="w", padx=5, pady=10)
         laz_entry_frame = ttk.Frame(input_frame)
         laz_entry_frame.grid(row=0, column=1, columnspan=2, sticky="ew")
         laz_entry_frame.columnconfigure(0, weight=1)
@@ -125,6 +154,29 @@ class ManualReclassFrame(ttk.Frame):
         ttk.Entry(shp_entry_frame, textvariable=self.shp_file_path).grid(row=1, column=0, sticky="ew", padx=5)
         ttk.Button(shp_entry_frame, text="Browse...", command=self.browse_shp, bootstyle="secondary").grid(row=1, column=1, padx=5)
 
+        ttk.Label(input_frame, text="Engine:").grid(row=2, column=0, sticky="w", padx=5, pady=10)
+        engine_combo = ttk.Combobox(input_frame, textvariable=self.engine_var, values=list(RECLASS_ENGINES.values()), state="readonly", width=25)
+        engine_combo.grid(row=2, column=1, sticky="w", padx=5)
+        delta_check = ttk.Checkbutton(input_frame, text="Save edits as a delta sidecar (non-destructive)", variable=self.as_deltas_var, bootstyle="primary")
+        delta_check.grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=(0, 10))
+        Tooltip(delta_check, "Records only the changed classes in '<file>.cdelta.npz' next to the cloud instead of writing a '_reclass' copy.\nRepeated edits stack on the sidecar; the in-process tools (exports, viewer, spatial sort) apply them when they read the cloud.\nPDAL and LAStools steps read the raw file: use 'Merge Deltas' to write a final '_reclass' file first. Always uses the in-process engine.")
+        incremental_check = ttk.Checkbutton(input_frame, text="Incremental: only re-run tiles touched by polygons edited since the last run", variable=self.incremental_var, bootstyle="primary")
+        incremental_check.grid(row=4, column=0, columnspan=3, sticky="w", padx=5, pady=(0, 10))
+        Tooltip(incremental_check, "Compares the shapefile with the version applied last time (saved as '<shapefile>_applied.gpkg' in each tile folder)\nand only reprocesses the tiles whose bounds intersect added, removed or edited polygons, in parallel.\nOutputs are written as '<tile>_reclass.laz' and replaced on every run. Uses the in-process engine.")
+        ttk.Label(input_frame, text="Tile index (optional):").grid(row=5, column=0, sticky="w", padx=5, pady=10)
+        index_entry_frame = ttk.Frame(input_frame)
+        index_entry_frame.grid(row=5, column=1, columnspan=2, sticky="ew")
+        index_entry_frame.columnconfigure(0, weight=1)
+        index_entry = ttk.Entry(index_entry_frame, textvariable=self.tile_index_path)
+        index_entry.grid(row=0, column=0, sticky="ew", padx=5)
+        ttk.Button(index_entry_frame, text="Browse...", command=self.browse_tile_index, bootstyle="secondary").grid(row=0, column=1, padx=5)
+        Tooltip(index_entry, "Tile footprints from the Tile Index tool. Without it, tile bounds are read from the LAS headers.")
+        ttk.Label(input_frame, text="Output profile (PDAL engine):").grid(row=6, column=0, sticky="w", padx=5, pady=10)
+        profile_combo = ttk.Combobox(input_frame, textvariable=self.output_profile_var, values=profile_labels(), state="readonly", width=28)
+        profile_combo.grid(row=6, column=1, sticky="w", padx=5)
+        Tooltip(profile_combo, "Point format and precision of the PDAL engine's '_reclass' outputs.\nFull: keeps the source point format and every dimension.\nVisual RGB: point format 2 (no GPS time / extra bytes), 0.01 precision.\nGround-only DTM input: keeps only ground points (class 2), point format 0, 0.01 precision.")
+        Tooltip(engine_combo, "In-process: indexes the polygons once (STRtree), streams each file and only changes the\nClassification of points that fall in a polygon; several files run in parallel and keep their point format.\nPDAL: runs a filters.overlay pipeline per file and writes it with the selected output profile.")
+
         run_frame = ttk.Labelframe(self, text="2. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.grid(row=1, column=0, sticky="ew", pady=(10, 0))
         run_container = ttk.Frame(run_frame)
@@ -133,6 +185,9 @@ class ManualReclassFrame(ttk.Frame):
         self.run_button = ttk.Button(run_container, text="Run Reclassification", command=self.start_reclass_thread, bootstyle="primary", state="disabled")
         self.run_button.pack(side="left", padx=(0, 10))
         Tooltip(self.run_button, "Execute the reclassification process using the selected files.")
+        self.merge_button = ttk.Button(run_container, text="Merge Deltas", command=self.start_merge_thread, bootstyle="secondary", state="disabled")
+        self.merge_button.pack(side="left", padx=(0, 10))
+        Tooltip(self.merge_button, "Write a '_reclass' copy of each selected cloud with its delta sidecar merged in.")
         self.progress = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary")
         self.progress.pack(side="left")
 
@@ -150,11 +205,23 @@ class ManualReclassFrame(ttk.Frame):
     def reset_ui(self):
         self.input_laz_path.set("")
         self.shp_file_path.set("")
+        self.tile_index_path.set("")
+        self.engine_var.set(RECLASS_ENGINES["strtree"])
+        self.as_deltas_var.set(False)
+        self.incremental_var.set(False)
+        self.output_profile_var.set(OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.controller.log_frame.log("Manual Reclassification tool has been reset.")
 
     def browse_laz(self):
-        path = filedialog.askopenfilename(filetypes=[("LAZ files", "*.laz")])
-        if path: self.input_laz_path.set(path)
+        paths = filedialog.askopenfilenames(filetypes=[("LAZ files", "*.laz"), ("LAS files", "*.las")])
+        if paths: self.input_laz_path.set(";".join(paths))
+
+    def browse_tile_index(self):
+        path = filedialog.askopenfilename(filetypes=[("Tile index", "*.gpkg *.shp"), ("All files", "*.*")])
+        if path: self.tile_index_path.set(path)
+
+    def _laz_paths(self):
+        return [p.strip() for p in self.input_laz_path.get().split(";") if p.strip()]
 
     def browse_shp(self):
         path = filedialog.askopenfilename(filetypes=[("Shapefiles", "*.shp"), ("All files", "*.*")])
@@ -164,6 +231,7 @@ class ManualReclassFrame(ttk.Frame):
         self.is_processing = is_processing
         if is_processing:
             self.run_button.config(text="Processing...", state="disabled")
+            self.merge_button.config(state="disabled")
             self.progress.config(mode="indeterminate")
             self.progress.start()
             self.stop_button.config(state="normal")
@@ -193,9 +261,32 @@ class ManualReclassFrame(ttk.Frame):
         is_success = False
         message = ""
         try:
-            output_path = class_assign_from_polygon(self.input_laz_path.get(), self.shp_file_path.get(), self.controller.log_frame, controller=self.controller, frame_instance=self)
+            laz_paths = self._laz_paths()
+            shp_file = self.shp_file_path.get()
+            as_deltas = self.as_deltas_var.get()
+            if self.incremental_var.get():
+                tile_index = self.tile_index_path.get() if os.path.isfile(self.tile_index_path.get()) else None
+                outputs, failed, skipped = run_incremental_reclass_by_folder(laz_paths, shp_file, tile_index=tile_index, should_stop=lambda: self.controller.was_terminated, log_callback=self.controller.log_frame.log)
+                if failed:
+                    raise RuntimeError(f"{len(failed)} of {len(outputs) + len(failed)} reprocessed tile(s) failed. Check the log for details.")
+                is_success = True
+                message = f"Incremental reclassification complete!\n{len(outputs)} tile(s) reprocessed, {len(skipped)} unchanged."
+                return
+            if as_deltas or reclass_engine_from_label(self.engine_var.get()) == "strtree":
+                output_paths = {} if as_deltas else {path: get_laz_output_filename(path, "_reclass") for path in laz_paths}
+                outputs, failed = reclassify_batch(laz_paths, shp_file, output_paths, as_deltas=as_deltas, should_stop=lambda: self.controller.was_terminated, log_callback=self.controller.log_frame.log)
+                if failed:
+                    raise RuntimeError(f"{len(failed)} of {len(laz_paths)} file(s) failed. Check the log for details.")
+            else:
+                output_profile = profile_name_from_label(self.output_profile_var.get())
+                outputs = [class_assign_from_polygon(path, shp_file, self.controller.log_frame, controller=self.controller, frame_instance=self, output_profile=output_profile) for path in laz_paths]
             is_success = True
-            message = f"Reclassification complete!\nOutput saved to: {os.path.basename(output_path)}"
+            if len(outputs) == 1:
+                message = f"Reclassification complete!\nOutput saved to: {os.path.basename(outputs[0])}"
+            else:
+                message = f"Reclassification complete!\n{len(outputs)} files saved with the '_reclass' suffix."
+            if as_deltas:
+                message = f"Reclassification complete!\nEdits recorded in {len(outputs)} delta sidecar(s)."
         except Exception as e:
             if not self.controller.was_terminated:
                 is_success = False
@@ -203,6 +294,31 @@ class ManualReclassFrame(ttk.Frame):
         finally:
             self.after(0, self.on_reclass_complete, is_success, message)
 
+    def start_merge_thread(self):
+        if self.is_processing: return
+        self.controller.log_frame.log(f"\n{'='*20}\n--- [MANUAL RECLASS] Merging Classification Deltas ---\n{'='*20}")
+        self.set_processing_state(True)
+        threading.Thread(target=self.run_merge, daemon=True, name="Manual_Reclass_Merge").start()
+
+    def run_merge(self):
+        is_success = False
+        message = ""
+        try:
+            outputs = []
+            for path in self._laz_paths():
+                if not os.path.isfile(sidecar_path(path)):
+                    continue
+                output_path = get_laz_output_filename(path, "_reclass")
+                edited = materialize_deltas(path, output_path)
+                self.controller.log_frame.log(f"[{os.path.basename(path)}] {edited:,} edited point(s) merged -> {os.path.basename(output_path)}")
+                outputs.append(output_path)
+            is_success = True
+            message = f"Merge complete!\n{len(outputs)} file(s) saved with the '_reclass' suffix."
+        except Exception as e:
+            message = f"Merge Failed:\n{e}"
+        finally:
+            self.after(0, self.on_reclass_complete, is_success, message)
+
 # --- Sub-Frame 2: Pipeline Classification ---
 class PipelineClassificationFrame(ttk.Frame):
     def __init__(self, parent, controller):
@@ -220,6 +336,12 @@ class PipelineClassificationFrame(ttk.Frame):
         self.input_folder_var, self.denoised_file_var = tk.StringVar(), tk.StringVar()
         self.single_file_path_var = tk.StringVar()
         self.batch_mode_step1 = tk.BooleanVar(value=False)
+        self.denoise_mode_var = tk.StringVar(value=DENOISE_MODES["z_range"])
+        self.noise_action_var = tk.StringVar(value=NOISE_ACTIONS["classify"])
+        self.outlier_k_var = tk.StringVar(value=str(DEFAULT_MEAN_K))
+        self.outlier_multiplier_var = tk.StringVar(value=str(DEFAULT_MULTIPLIER))
+        self.outlier_radius_var = tk.StringVar(value=str(DEFAULT_RADIUS))
+        self.outlier_min_k_var = tk.StringVar(value=str(DEFAULT_MIN_K))
         self.batch_mode_step3 = tk.BooleanVar(value=False)
         self.input_files_list = []
         self.input_files_list_step3 = []
@@ -227,12 +349,20 @@ class PipelineClassificationFrame(ttk.Frame):
         self.stop_buttons = {}
         self.current_step, self.is_processing = None, False
         self.decimation_var = tk.StringVar(value="2")
+        self.thinning_method_var = tk.StringVar(value=THINNING_METHODS["every_nth"])
+        self.save_thinned_var = tk.BooleanVar(value=False)
         self.reso_var_step2 = tk.StringVar(value="US Feet (1.0)")
         self.window_var_step2 = tk.StringVar(value="103")
+        self.slopes_var_step2 = tk.StringVar(value="0.05, 0.15, 0.25, 0.35")
+        self.thresholds_var_step2 = tk.StringVar(value="0.2")
+        self.scalars_var_step2 = tk.StringVar(value="1.25")
+        self.checkpoint_file_var_step2 = tk.StringVar()
         self.reso_var_step3 = tk.StringVar(value="US Feet (1.0)")
         self.slope_var_step3 = tk.StringVar(value="0.05")
         self.window_var_step3 = tk.StringVar(value="25")
         self.threshold_var_step3 = tk.StringVar(value="0.20")
+        self.scalar_var_step3 = tk.StringVar(value="1.25")
+        self.write_gnd_laz_step3 = tk.BooleanVar(value=True)
 
         self.single_file_path_var.trace_add("write", self._check_pipeline_run_buttons_state)
         self.input_folder_var.trace_add("write", self._check_pipeline_run_buttons_state)
@@ -301,6 +431,19 @@ class PipelineClassificationFrame(ttk.Frame):
             text_variable.set(filepath)
             self.controller.log_frame.log(f"Selected file: {filepath}")
 
+    def browse_checkpoints_step2(self):
+        filepath = filedialog.askopenfilename(title="Select a checkpoint CSV", filetypes=(("CSV files", "*.csv"), ("All files", "*.*")))
+        if filepath:
+            self.checkpoint_file_var_step2.set(filepath)
+
+    def _apply_best_parameters(self, best):
+        """Pre-fills Step 3 with the best-ranked sweep parameters."""
+        self.slope_var_step3.set(str(best["slope"]))
+        self.threshold_var_step3.set(f"{best['threshold']:.2f}")
+        self.window_var_step3.set(str(best["window"]))
+        self.scalar_var_step3.set(str(best["scalar"]))
+        self.reso_var_step3.set(self.reso_var_step2.get())
+
     def browse_folder_step1(self):
         directory = filedialog.askdirectory(title="Select a folder with LAZ files")
         if directory:
@@ -325,13 +468,27 @@ class PipelineClassificationFrame(ttk.Frame):
         self.input_folder_var_step3.set("")
         self.input_files_list_step3.clear()
         self.decimation_var.set("2")
+        self.thinning_method_var.set(THINNING_METHODS["every_nth"])
+        self.save_thinned_var.set(False)
         self.reso_var_step2.set("US Feet (1.0)")
         self.window_var_step2.set("103")
+        self.slopes_var_step2.set("0.05, 0.15, 0.25, 0.35")
+        self.thresholds_var_step2.set("0.2")
+        self.scalars_var_step2.set("1.25")
+        self.checkpoint_file_var_step2.set("")
         self.reso_var_step3.set("US Feet (1.0)")
         self.slope_var_step3.set("0.05")
         self.window_var_step3.set("25")
         self.threshold_var_step3.set("0.20")
+        self.scalar_var_step3.set("1.25")
+        self.write_gnd_laz_step3.set(True)
         self.batch_mode_step1.set(False)
+        self.denoise_mode_var.set(DENOISE_MODES["z_range"])
+        self.noise_action_var.set(NOISE_ACTIONS["classify"])
+        self.outlier_k_var.set(str(DEFAULT_MEAN_K))
+        self.outlier_multiplier_var.set(str(DEFAULT_MULTIPLIER))
+        self.outlier_radius_var.set(str(DEFAULT_RADIUS))
+        self.outlier_min_k_var.set(str(DEFAULT_MIN_K))
         self.batch_mode_step3.set(False)
         self._toggle_input_mode_step1()
         self._toggle_input_mode_step3()
@@ -365,8 +522,29 @@ class PipelineClassificationFrame(ttk.Frame):
         entry_f.config(state="readonly")
         browse_f.config(command=self.browse_folder_step1)
         self.folder_frame_step1.pack_forget()
+
+        params_frame = ttk.Labelframe(parent, text="2. Denoise Mode", padding=10, style="Info.TLabelframe")
+        params_frame.pack(fill='x', pady=(10,0))
+        ttk.Label(params_frame, text="Mode:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        mode_combo = ttk.Combobox(params_frame, textvariable=self.denoise_mode_var, values=list(DENOISE_MODES.values()), state="readonly", width=30)
+        mode_combo.grid(row=0, column=1, sticky='w')
+        Tooltip(mode_combo, "Z range: drops points outside the Z range of the well-populated histogram bins.\nStatistical: also flags points whose mean distance to their k nearest neighbours is above mean + multiplier * std.\nRadius: also flags points with fewer than Min K neighbours within the radius.\nOutliers are found tile by tile (with buffers) in parallel processes, so memory stays bounded.")
+        ttk.Label(params_frame, text="Noise:").grid(row=0, column=2, sticky='w', padx=(20,10))
+        ttk.Combobox(params_frame, textvariable=self.noise_action_var, values=list(NOISE_ACTIONS.values()), state="readonly", width=22).grid(row=0, column=3, sticky='w')
+        ttk.Label(params_frame, text="Neighbours (k):").grid(row=1, column=0, sticky='w', padx=(0,10), pady=(5,0))
+        k_entry = ttk.Entry(params_frame, textvariable=self.outlier_k_var, width=8)
+        k_entry.grid(row=1, column=1, sticky='w', pady=(5,0))
+        Tooltip(k_entry, "Statistical: number of neighbours averaged (mean_k).")
+        ttk.Label(params_frame, text="Multiplier:").grid(row=1, column=2, sticky='w', padx=(20,10), pady=(5,0))
+        ttk.Entry(params_frame, textvariable=self.outlier_multiplier_var, width=8).grid(row=1, column=3, sticky='w', pady=(5,0))
+        ttk.Label(params_frame, text="Radius:").grid(row=1, column=4, sticky='w', padx=(20,10), pady=(5,0))
+        ttk.Entry(params_frame, textvariable=self.outlier_radius_var, width=8).grid(row=1, column=5, sticky='w', pady=(5,0))
+        ttk.Label(params_frame, text="Min K:").grid(row=1, column=6, sticky='w', padx=(20,10), pady=(5,0))
+        min_k_entry = ttk.Entry(params_frame, textvariable=self.outlier_min_k_var, width=8)
+        min_k_entry.grid(row=1, column=7, sticky='w', pady=(5,0))
+        Tooltip(min_k_entry, "Radius: minimum number of neighbours a point needs within the radius (min_k).")
         
-        run_frame = ttk.Labelframe(parent, text="2. Run Process", padding=10, style="Info.TLabelframe")
+        run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.pack(fill='x', pady=(10,0))
         run_container = ttk.Frame(run_frame)
         run_container.pack(anchor='w')
@@ -397,17 +575,29 @@ class PipelineClassificationFrame(ttk.Frame):
         input_frame = ttk.Labelframe(parent, text="1. Select Input File", padding=10, style="Info.TLabelframe")
         input_frame.pack(fill='x', pady=(0, 10))
         self.create_path_entry(input_frame, "Input denoised LAZ file (from Step 1 or browse manually) (.laz):", self.denoised_file_var)
+        cp_entry, cp_browse = self.create_path_entry(input_frame, "Checkpoint CSV for automatic ranking (optional, Name/E/N/H):", self.checkpoint_file_var_step2)
+        cp_browse.config(command=self.browse_checkpoints_step2)
+        Tooltip(cp_entry, "When set, every test DTM is sampled at the checkpoints and ranked by RMSE.\nThe best parameter set is copied into Step 3.")
         
         params_frame = ttk.Labelframe(parent, text="2. Set the Parameters", padding=10, style="Info.TLabelframe")
         params_frame.pack(fill='x', pady=(10,0))
         params_frame.grid_columnconfigure((0, 1, 2), weight=1)
 
-        ttk.Label(params_frame, text="Decimation Step:").grid(row=0, column=0, padx=(0,10), pady=5, sticky="w")
-        deci_entry = ttk.Entry(params_frame, textvariable=self.decimation_var); deci_entry.grid(row=1, column=0, sticky="ew", padx=(0,10)); Tooltip(deci_entry, "The step used to thin the point cloud for faster testing (e.g., a value of 2 keeps every 2nd point).")
+        ttk.Label(params_frame, text="Decimation Step / Voxel Size:").grid(row=0, column=0, padx=(0,10), pady=5, sticky="w")
+        deci_entry = ttk.Entry(params_frame, textvariable=self.decimation_var); deci_entry.grid(row=1, column=0, sticky="ew", padx=(0,10)); Tooltip(deci_entry, "The step used to thin the point cloud for faster testing (e.g., a value of 2 keeps every 2nd point).\nFor voxel thinning, the cell size in map units.")
         ttk.Label(params_frame, text="Resolution (Reso):").grid(row=0, column=1, padx=(0,10), pady=5, sticky="w")
         reso_combo = ttk.Combobox(params_frame, textvariable=self.reso_var_step2, values=["US Feet (1.0)", "Meters (0.25)"], state="readonly"); reso_combo.grid(row=1, column=1, sticky="ew", padx=(0,10)); Tooltip(reso_combo, "The resolution of the output test DTM rasters.")
-        ttk.Label(params_frame, text="Window Size:").grid(row=0, column=2, pady=5, sticky="w")
-        win_entry = ttk.Entry(params_frame, textvariable=self.window_var_step2); win_entry.grid(row=1, column=2, sticky="ew"); Tooltip(win_entry, "The SMRF window size parameter to use for all test runs.")
+        ttk.Label(params_frame, text="Window Size(s):").grid(row=0, column=2, pady=5, sticky="w")
+        win_entry = ttk.Entry(params_frame, textvariable=self.window_var_step2); win_entry.grid(row=1, column=2, sticky="ew"); Tooltip(win_entry, "One or more SMRF window sizes to test, separated by commas (e.g., 25, 103).")
+        ttk.Label(params_frame, text="Slopes:").grid(row=2, column=0, padx=(0,10), pady=5, sticky="w")
+        slopes_entry = ttk.Entry(params_frame, textvariable=self.slopes_var_step2); slopes_entry.grid(row=3, column=0, sticky="ew", padx=(0,10)); Tooltip(slopes_entry, "SMRF slopes to test, separated by commas.")
+        ttk.Label(params_frame, text="Thresholds:").grid(row=2, column=1, padx=(0,10), pady=5, sticky="w")
+        thresh_entry = ttk.Entry(params_frame, textvariable=self.thresholds_var_step2); thresh_entry.grid(row=3, column=1, sticky="ew", padx=(0,10)); Tooltip(thresh_entry, "SMRF elevation thresholds to test, separated by commas.")
+        ttk.Label(params_frame, text="Scalars:").grid(row=2, column=2, pady=5, sticky="w")
+        ttk.Label(params_frame, text="Thinning:").grid(row=4, column=0, padx=(0,10), pady=5, sticky="w")
+        thin_combo = ttk.Combobox(params_frame, textvariable=self.thinning_method_var, values=list(THINNING_METHODS.values()), state="readonly"); thin_combo.grid(row=5, column=0, sticky="ew", padx=(0,10)); Tooltip(thin_combo, "How the test cloud is thinned while it is read: every nth point, a random 1-in-n sample, or one point per voxel.\nThe thinned cloud stays in the run's scratch space and is shared by every test.")
+        save_thin_toggle = ttk.Checkbutton(params_frame, text="Save thinned cloud (_thinned.laz)", variable=self.save_thinned_var, bootstyle="round-toggle"); save_thin_toggle.grid(row=5, column=1, columnspan=2, sticky="w"); Tooltip(save_thin_toggle, "Also write the thinned cloud next to the input. Existing '_thinned.laz' files are overwritten.")
+        scalar_entry = ttk.Entry(params_frame, textvariable=self.scalars_var_step2); scalar_entry.grid(row=3, column=2, sticky="ew"); Tooltip(scalar_entry, "SMRF elevation scalars to test, separated by commas.\nEvery slope x threshold x window x scalar combination produces one test DTM; they run in parallel on one decimated copy of the input.")
 
         run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.pack(fill='x', pady=(10,0))
@@ -415,7 +605,7 @@ class PipelineClassificationFrame(ttk.Frame):
         run_container.pack(anchor='w')
         self.run_buttons[2] = ttk.Button(run_container, text="Run Test Parameters", bootstyle="primary", command=lambda: self.start_run_process(2))
         self.run_buttons[2].pack(side='left', padx=(0, 10))
-        Tooltip(self.run_buttons[2], "Run the test process, which generates multiple DTMs using different slope parameters.")
+        Tooltip(self.run_buttons[2], "Run the parameter sweep, which generates one test DTM per parameter combination.")
         self.progress_bars[2] = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary")
         self.progress_bars[2].pack(side='left')
 
@@ -458,7 +648,7 @@ class PipelineClassificationFrame(ttk.Frame):
         
         params_frame = ttk.Labelframe(parent, text="2. Set the Parameters", padding=10, style="Info.TLabelframe")
         params_frame.pack(fill='x', pady=(10,0))
-        params_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+        params_frame.grid_columnconfigure((0, 1, 2, 3, 4), weight=1)
 
         ttk.Label(params_frame, text="Resolution (Reso):").grid(row=0, column=0, padx=(0,10), pady=5, sticky="w")
         reso_combo = ttk.Combobox(params_frame, textvariable=self.reso_var_step3, values=["US Feet (1.0)", "Meters (0.25)"], state="readonly"); reso_combo.grid(row=1, column=0, sticky="ew", padx=(0,10)); Tooltip(reso_combo, "The resolution for the final DTM created from the classified ground points.")
@@ -467,7 +657,12 @@ class PipelineClassificationFrame(ttk.Frame):
         ttk.Label(params_frame, text="Window Size:").grid(row=0, column=2, padx=(0,10), pady=5, sticky="w")
         win_entry = ttk.Entry(params_frame, textvariable=self.window_var_step3); win_entry.grid(row=1, column=2, sticky="ew", padx=(0,10)); Tooltip(win_entry, "The SMRF window size parameter for the final classification.")
         ttk.Label(params_frame, text="Threshold:").grid(row=0, column=3, pady=5, sticky="w")
-        thresh_entry = ttk.Entry(params_frame, textvariable=self.threshold_var_step3); thresh_entry.grid(row=1, column=3, sticky="ew"); Tooltip(thresh_entry, "The SMRF elevation threshold parameter for the final classification.")
+        thresh_entry = ttk.Entry(params_frame, textvariable=self.threshold_var_step3); thresh_entry.grid(row=1, column=3, sticky="ew", padx=(0,10)); Tooltip(thresh_entry, "The SMRF elevation threshold parameter for the final classification.")
+        ttk.Label(params_frame, text="Scalar:").grid(row=0, column=4, pady=5, sticky="w")
+        scalar_entry = ttk.Entry(params_frame, textvariable=self.scalar_var_step3); scalar_entry.grid(row=1, column=4, sticky="ew"); Tooltip(scalar_entry, "The SMRF elevation scalar for the final classification.")
+        gnd_toggle = ttk.Checkbutton(params_frame, text="Write classified LAZ", variable=self.write_gnd_laz_step3, bootstyle="round-toggle")
+        gnd_toggle.grid(row=2, column=0, columnspan=5, sticky="w", pady=(10, 0))
+        Tooltip(gnd_toggle, "Write the classified '_gnd.laz' next to the DTM. Uncheck when only the DTM is needed.")
 
         run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.pack(fill='x', pady=(10,0))
@@ -566,20 +761,13 @@ class PipelineClassificationFrame(ttk.Frame):
         log = self.controller.log_frame.log
         try:
             log("Reading LAZ file for statistics...")
-            with self.laspy.open(file_path, mode='r') as file_handler: las_data = file_handler.read()
-            z_coords = las_data.z
-            min_z, max_z = int(z_coords.min()), int(z_coords.max()) + 1
-            z_bins = range(min_z, max_z + 1, 1)
-            counts, _ = pd.cut(z_coords, bins=z_bins, include_lowest=True, right=False, retbins=True)
-            counts = counts.value_counts().sort_index()
-            bin_df = pd.DataFrame({'bin': [int(b.left) for b in counts.index], 'count': counts.values})
-            filtered_df = bin_df[bin_df['count'] >= 100].reset_index(drop=True)
-            if not filtered_df.empty:
-                first_bin, last_bin = filtered_df['bin'].iloc[0], filtered_df['bin'].iloc[-1]
+            z_coords = read_dimensions(file_path, ["z"], point_cache=self.controller.get_point_cache())["z"]
+            first_bin, last_bin = z_range_from_histogram(z_coords)
+            if first_bin is not None:
                 log(f"Automatically determined Z-Range: [{first_bin}, {last_bin}]")
                 return first_bin, last_bin
             else:
-                log("Warning: Filtered DataFrame is empty. Using full range.")
+                log("Warning: No Z bin holds enough points. Using full range.")
                 return None, None
         except Exception as e:
             log(f"An error occurred during statistics processing: {e}")
@@ -602,6 +790,7 @@ class PipelineClassificationFrame(ttk.Frame):
         log_frame = self.controller.log_frame
         is_success = False
         message = ""
+        store = None
         try:
             if self.batch_mode_step1.get():
                 files_to_process = self.input_files_list
@@ -618,31 +807,61 @@ class PipelineClassificationFrame(ttk.Frame):
                 raise ValueError("No valid input files selected.")
 
             total_files = len(files_to_process)
-            all_files_succeeded = True
-
-            for i, input_path_str in enumerate(files_to_process):
-                log_frame.log(f"\n--- ({i+1}/{total_files}) Processing: {os.path.basename(input_path_str)} ---")
-                input_path = Path(input_path_str)
+            mode = denoise_mode_from_label(self.denoise_mode_var.get())
+            action = noise_action_from_label(self.noise_action_var.get())
+            if mode != "z_range":
+                try:
+                    k = int(self.outlier_k_var.get())
+                    multiplier = float(self.outlier_multiplier_var.get())
+                    radius = float(self.outlier_radius_var.get())
+                    min_k = int(self.outlier_min_k_var.get())
+                    if k < 1 or radius <= 0 or min_k < 1: raise ValueError
+                except ValueError:
+                    raise ValueError("The outlier parameters must be a positive whole k, a multiplier, a positive radius and a positive whole Min K.")
+                store = self.controller.create_intermediate_store()
+
+            # Stats (in-process Z read) of the next file overlap the PDAL pass of the current one
+            def stats_stage(input_path_str, _):
+                log_frame.log(f"\n--- Reading statistics: {os.path.basename(input_path_str)} ---")
                 first_bin, last_bin = self._process_laz_file_stats(input_path_str)
-                range_filter = f"Z[{first_bin}:{last_bin}]" if first_bin is not None and last_bin is not None else "Z[:]"
-                
+                return f"Z[{first_bin}:{last_bin}]" if first_bin is not None and last_bin is not None else "Z[:]"
+
+            # Outliers are found in-process before the PDAL pass; the cleaned cloud is a scratch intermediate
+            def outliers_stage(input_path_str, range_filter):
+                log_frame.log(f"\n--- Finding outliers: {os.path.basename(input_path_str)} ---")
+                cleaned = store.path(f"{Path(input_path_str).stem}_outliers")
+                filter_outliers(input_path_str, cleaned, method=mode, mean_k=k, multiplier=multiplier, radius=radius, min_k=min_k,
+                                action=action, work_dir=store.work_dir, log_callback=log_frame.log)
+                return range_filter, cleaned
+
+            def products_stage(input_path_str, value):
+                range_filter, source = value if mode != "z_range" else (value, input_path_str)
+                input_path = Path(input_path_str)
+                log_frame.log(f"\n--- Processing: {input_path.name} ---")
                 output_denoised_laz = input_path.with_name(f"{input_path.stem}_denoised.laz")
                 output_dsm_tif = input_path.with_name(f"{input_path.stem}_dsm.tif")
                 output_stat_tif = input_path.with_name(f"{input_path.stem}_stat.tif")
-
+                pipeline = denoise_products_pipeline(source, range_filter, output_denoised_laz, output_dsm_tif, output_stat_tif,
+                                                     keep_noise=mode != "z_range" and action == "classify")
                 try:
-                    pipeline = [str(input_path), {"type": "filters.range", "limits": range_filter}, {"type": "filters.assign", "assignment": "Classification[:]=0"}, {"type": "writers.las", "filename": str(output_denoised_laz), "minor_version": "4"}]
-                    _execute_pdal_pipeline(pipeline, log_frame, "Denoising...", controller=self.controller, frame_instance=self)
-                    
-                    pipeline = [str(output_denoised_laz), {"type": "writers.gdal", "filename": str(output_dsm_tif), "resolution": 1.0, "output_type": "max"}]
-                    _execute_pdal_pipeline(pipeline, log_frame, "Creating DSM...", controller=self.controller, frame_instance=self)
-                    
-                    pipeline = [str(output_denoised_laz), {"type": "writers.gdal", "filename": str(output_stat_tif), "resolution": 1.0, "output_type": "min,count"}]
-                    _execute_pdal_pipeline(pipeline, log_frame, "Creating STAT...", controller=self.controller, frame_instance=self)
-                except Exception as file_error:
-                    all_files_succeeded = False
-                    if self.controller.was_terminated: break
-                    log_frame.log(f"--- ERROR processing {input_path.name}: {file_error} ---")
+                    _execute_pdal_pipeline(pipeline, log_frame, "Denoising and creating DSM / STAT in one pass...", controller=self.controller, frame_instance=self)
+                finally:
+                    if source != input_path_str and os.path.exists(source):
+                        os.remove(source)
+
+            def on_failed(input_path_str, stage_name, file_error):
+                if not self.controller.was_terminated:
+                    log_frame.log(f"--- ERROR processing {os.path.basename(input_path_str)} ({stage_name}): {file_error} ---")
+
+            stages = [Stage("stats", stats_stage)]
+            if mode != "z_range":
+                stages.append(Stage("outliers", outliers_stage))
+            stages.append(Stage("denoise", products_stage))
+            _, failed = run_pipelined(
+                files_to_process, stages,
+                should_stop=lambda: self.controller.was_terminated, on_item_failed=on_failed
+            )
+            all_files_succeeded = not failed and not self.controller.was_terminated
             
             self.after(0, self.denoised_file_var.set, "")
             is_success = True
@@ -652,39 +871,62 @@ class PipelineClassificationFrame(ttk.Frame):
                 log_frame.log(f"A critical error occurred: {e}")
                 message = f"A critical error occurred:\n{e}"
         finally:
+            if store is not None:
+                store.close()
             self.after(0, self.on_pipeline_step_complete, 1, is_success, message)
 
     def execute_step2_test(self):
         is_success = False
         message = ""
         log_frame = self.controller.log_frame
+        store = self.controller.create_intermediate_store()
         try:
             input_path = self.denoised_file_var.get()
             if not input_path or not os.path.exists(input_path):
                 raise ValueError("Denoised input file not found. Please run Step 1 or browse for a file.")
-            thinned_laz_path = get_laz_output_filename(input_path, "_thinned")
-            decimation, reso, window = self.decimation_var.get(), ("1.0" if self.reso_var_step2.get() == "US Feet (1.0)" else "0.25"), self.window_var_step2.get()
-            cmd_decimate = ["pdal", "translate", input_path, thinned_laz_path, "decimation", f"--filters.decimation.step={decimation}"]
-            if not self.run_command_in_thread(cmd_decimate, f"Executing Decimation...\nOutput: {os.path.basename(thinned_laz_path)}", "Decimation successful."):
-                raise RuntimeError("Decimation step failed.")
-            
-            all_slopes_successful = True
-            for slope in ["0.05", "0.15", "0.25", "0.35"]:
-                log_frame.log("\n" + "-"*20)
-                output_tif = Path(thinned_laz_path).with_name(f"{Path(thinned_laz_path).stem}_dtm_pt{slope.replace('.', '')}.tif")
-                pipeline = [thinned_laz_path, {"type": "filters.smrf", "scalar": 1.25, "slope": slope, "threshold": 0.2, "window": window}, {"type": "filters.range", "limits": "Classification[2:2]"}, {"type": "writers.gdal", "filename": str(output_tif), "resolution": reso, "output_type": "mean"}]
-                try:
-                    _execute_pdal_pipeline(pipeline, log_frame, f"Testing slope {slope}...", controller=self.controller, frame_instance=self)
-                except Exception:
-                    all_slopes_successful = False
-                    if self.controller.was_terminated: break
-            
+            try:
+                combinations = expand_grid(
+                    parse_values(self.slopes_var_step2.get()), parse_values(self.thresholds_var_step2.get()),
+                    parse_values(self.window_var_step2.get(), int), parse_values(self.scalars_var_step2.get()))
+                thinning_method = thinning_method_from_label(self.thinning_method_var.get())
+                thinning_value = float(self.decimation_var.get()) if thinning_method == "voxel" else int(self.decimation_var.get())
+            except ValueError as e:
+                raise ValueError(f"Invalid sweep parameters: {e}")
+            reso = 1.0 if self.reso_var_step2.get() == "US Feet (1.0)" else 0.25
+            dtm_base = Path(input_path).with_name(f"{Path(input_path).stem}_thinned")
+
+            # The thinned cloud is produced once into the run's scratch folder and shared by every combination
+            results, failed = run_sweep(
+                input_path, combinations, store.work_dir, str(dtm_base), reso,
+                thinning=(thinning_method, thinning_value),
+                save_thinned=f"{dtm_base}.laz" if self.save_thinned_var.get() else None,
+                pdal_exe=self.controller.pdal_path_var.get() or "pdal",
+                register_process=lambda p: self.controller.register_process(self, p),
+                unregister_process=lambda p: self.controller.unregister_process(self, p),
+                should_stop=lambda: self.controller.was_terminated,
+                log_callback=log_frame.log,
+                engine=self.controller.get_smrf_engine(),
+                point_cache=self.controller.get_point_cache()
+            )
+            if not results:
+                raise RuntimeError("Every parameter combination failed.")
+
             is_success = True
-            message = "Step 2 completed successfully!" if all_slopes_successful else "Step 2 finished, but some slope tests failed."
+            message = f"Step 2 completed successfully! {len(results)} test DTMs written." if not failed else f"Step 2 finished, but {len(failed)} of {len(combinations)} parameter tests failed."
+
+            checkpoint_file = self.checkpoint_file_var_step2.get()
+            if checkpoint_file and not self.controller.was_terminated:
+                ranking = rank_sweep(results, checkpoint_file, log_callback=log_frame.log)
+                if ranking:
+                    best = ranking[0]
+                    self.after(0, self._apply_best_parameters, best)
+                    message += (f"\n\nBest parameters (copied to Step 3): slope {best['slope']}, threshold {best['threshold']}, "
+                                f"window {best['window']}, scalar {best['scalar']}\nRMSE {best['rmse']:.3f}, bias {best['bias']:+.3f}, coverage {best['coverage']:.0%}")
         except Exception as e:
             if not self.controller.was_terminated:
                 message = f"An error occurred in Step 2:\n{e}"
         finally:
+            store.close()
             self.after(0, self.on_pipeline_step_complete, 2, is_success, message)
 
     def execute_step3_classify(self):
@@ -706,13 +948,14 @@ class PipelineClassificationFrame(ttk.Frame):
             slope = self.slope_var_step3.get()
             window = self.window_var_step3.get()
             threshold = self.threshold_var_step3.get()
+            scalar = self.scalar_var_step3.get()
+            engine = self.controller.get_smrf_engine()
+            write_gnd_laz = self.write_gnd_laz_step3.get()
             
             total_files = len(files_to_process)
             all_files_succeeded = True
 
-            for i, input_path in enumerate(files_to_process):
-                log_frame.log(f"\n--- ({i+1}/{total_files}) Classifying: {os.path.basename(input_path)} ---")
-
+            def output_paths(input_path):
                 slope_for_filename = slope.replace('.', '')
                 
                 if threshold != "0.20":
@@ -723,23 +966,57 @@ class PipelineClassificationFrame(ttk.Frame):
 
                 gnd_laz_path = get_laz_output_filename(input_path, suffix)
                 dtm_tif_path = get_output_filename(gnd_laz_path, "_dtm").replace(os.path.splitext(gnd_laz_path)[1], ".tif")
+                return gnd_laz_path, dtm_tif_path
 
-                cmd_smrf = ["pdal", "translate", input_path, gnd_laz_path, "smrf", f"--filters.smrf.scalar=1.25", f"--filters.smrf.slope={slope}", f"--filters.smrf.threshold={threshold}", f"--filters.smrf.window={window}", "--filters.smrf.returns=first,last,intermediate,only"]
-                
-                try:
-                    if not self.run_command_in_thread(cmd_smrf, f"Executing SMRF for ground classification...\nOutput: {os.path.basename(gnd_laz_path)}", "Ground classification successful."):
-                        raise RuntimeError("SMRF classification step failed.")
+            if engine == "numpy":
+                # Classification of the next file overlaps the LAZ / DTM writes of the current one
+                positions = {path: i for i, path in enumerate(files_to_process, start=1)}
 
-                    cmd_dtm = ["pdal", "translate", gnd_laz_path, dtm_tif_path, "range", "-w", "writers.gdal", "--filters.range.limits=Classification[2:2]", f"--writers.gdal.resolution={reso}", "--writers.gdal.output_type=mean"]
-                    if not self.run_command_in_thread(cmd_dtm, f"\nExecuting DTM Creation...\nOutput: {os.path.basename(dtm_tif_path)}", "DTM created successfully."):
-                        raise RuntimeError("DTM creation step failed.")
+                def smrf_stage(input_path, _):
+                    log_frame.log(f"\n--- ({positions[input_path]}/{total_files}) Classifying: {os.path.basename(input_path)} ---")
+                    return self._classify_step3_numpy(input_path, slope, window, threshold, scalar)
 
-                except Exception as file_error:
-                    all_files_succeeded = False
-                    if self.controller.was_terminated:
-                        log_frame.log(f"--- Process for {os.path.basename(input_path)} was terminated by user. ---")
-                        break
-                    log_frame.log(f"--- ERROR processing {os.path.basename(input_path)}: {file_error} ---")
+                def write_stage(input_path, classified):
+                    gnd_laz_path, dtm_tif_path = output_paths(input_path)
+                    self._write_step3_outputs(input_path, classified, gnd_laz_path if write_gnd_laz else None, dtm_tif_path, reso)
+
+                def on_failed(input_path, stage_name, file_error):
+                    if not self.controller.was_terminated:
+                        log_frame.log(f"--- ERROR processing {os.path.basename(input_path)} ({stage_name}): {file_error} ---")
+
+                # Each queued item holds a whole cloud, so only one waits between the stages
+                _, failed = run_pipelined(
+                    files_to_process, [Stage("smrf", smrf_stage), Stage("write", write_stage)], queue_size=1,
+                    should_stop=lambda: self.controller.was_terminated, on_item_failed=on_failed
+                )
+                all_files_succeeded = not failed and not self.controller.was_terminated
+            else:
+                for i, input_path in enumerate(files_to_process):
+                    log_frame.log(f"\n--- ({i+1}/{total_files}) Classifying: {os.path.basename(input_path)} ---")
+                    gnd_laz_path, dtm_tif_path = output_paths(input_path)
+
+                    try:
+                        # One read: the pipeline branches after SMRF into the classified LAZ and the ground-only DTM
+                        pipeline = [
+                            input_path,
+                            {"type": "filters.smrf", "scalar": scalar, "slope": slope, "threshold": threshold, "window": window, "returns": "first,last,intermediate,only", "tag": "classified"},
+                        ]
+                        if write_gnd_laz:
+                            pipeline.append({"type": "writers.las", "filename": gnd_laz_path, "inputs": ["classified"]})
+                        pipeline += [
+                            {"type": "filters.range", "limits": "Classification[2:2]", "inputs": ["classified"], "tag": "ground"},
+                            {"type": "writers.gdal", "filename": dtm_tif_path, "resolution": reso, "output_type": "mean", "inputs": ["ground"]},
+                        ]
+                        outputs = f"{os.path.basename(gnd_laz_path)}, {os.path.basename(dtm_tif_path)}" if write_gnd_laz else os.path.basename(dtm_tif_path)
+                        _execute_pdal_pipeline(pipeline, log_frame, f"Executing SMRF and DTM creation...\nOutput: {outputs}", controller=self.controller, frame_instance=self)
+                        log_frame.log("\nGround classification and DTM creation successful.")
+
+                    except Exception as file_error:
+                        all_files_succeeded = False
+                        if self.controller.was_terminated:
+                            log_frame.log(f"--- Process for {os.path.basename(input_path)} was terminated by user. ---")
+                            break
+                        log_frame.log(f"--- ERROR processing {os.path.basename(input_path)}: {file_error} ---")
 
             is_success = True
             message = f"Step 3 completed successfully for all {total_files} files!" if all_files_succeeded else "Step 3 finished, but one or more files failed."
@@ -749,6 +1026,40 @@ class PipelineClassificationFrame(ttk.Frame):
         finally:
             self.after(0, self.on_pipeline_step_complete, 3, is_success, message)
             
+    def _classify_step3_numpy(self, input_path, slope, window, threshold, scalar):
+        """
+        Step 3 with the built-in SMRF engine: classifies in-process from the SMRF dimensions only
+        (memory-mapped from the point cache when it is enabled). Returns the arrays and the new classes.
+        """
+        log = self.controller.log_frame.log
+        log("Executing built-in SMRF for ground classification...")
+        arrays = read_dimensions(input_path, SMRF_DIMENSIONS, point_cache=self.controller.get_point_cache())
+        classes, ground = classify_dimensions(arrays, slope=float(slope), window=float(window), threshold=float(threshold),
+                                              scalar=float(scalar), returns="first,last,intermediate,only", log_callback=log)
+        log(f"Ground classification successful: {int(ground.sum()):,} of {len(ground):,} points classified as ground.")
+        return arrays, classes
+
+    def _write_step3_outputs(self, input_path, classified, gnd_laz_path, dtm_tif_path, reso):
+        """Writes the classified LAZ (unless None) by streaming the source with the new classes, then grids the ground points into the DTM."""
+        log = self.controller.log_frame.log
+        arrays, classes = classified
+        with open_las(input_path) as reader:
+            header = reader.header
+            if gnd_laz_path:
+                log(f"Writing classified points...\nOutput: {os.path.basename(gnd_laz_path)}")
+                with open_las(gnd_laz_path, mode='w', header=header) as writer:
+                    start = 0
+                    for points in reader.chunk_iterator(DEFAULT_CHUNK_SIZE):
+                        points.classification = classes[start:start + len(points)]
+                        start += len(points)
+                        writer.write_points(points)
+        ground = classes == 2
+        crs = parse_crs_or_none(header)
+        log(f"Executing DTM Creation...\nOutput: {os.path.basename(dtm_tif_path)}")
+        write_mean_raster(np.asarray(arrays["x"])[ground], np.asarray(arrays["y"])[ground], np.asarray(arrays["z"])[ground],
+                          dtm_tif_path, float(reso), crs=crs.to_wkt() if crs is not None else None)
+        log("DTM created successfully.")
+
     def run_command_in_thread(self, command, log_message, success_message):
         try:
             _execute_command(command, self.controller.log_frame, log_message, controller=self.controller, frame_instance=self)
@@ -757,6 +1068,40 @@ class PipelineClassificationFrame(ttk.Frame):
         except Exception:
             return False
 
+# --- Helper: FLAI batch script template ---
+class FlaiScriptTemplate:
+    """
+    The configured FLAI .bat parsed once. render() swaps in the 'set INPUT=' line for one file
+    (or injects it after '@echo off' when the script has none).
+    """
+    def __init__(self, bat_path):
+        self.bat_path = bat_path
+        with open(bat_path, 'r') as f:
+            lines = f.read().splitlines()
+        self.input_index = next((i for i, line in enumerate(lines) if line.strip().lower().startswith('set input=')), None)
+        if self.input_index is None:
+            self.insert_index = next((i + 1 for i, line in enumerate(lines) if line.strip().lower() == '@echo off'), 0)
+        self.lines = lines
+
+    @property
+    def has_input_line(self):
+        return self.input_index is not None
+
+    def render(self, input_laz):
+        replacement_line = f'set INPUT="{os.path.normpath(input_laz)}"'
+        lines = list(self.lines)
+        if self.has_input_line:
+            lines[self.input_index] = replacement_line
+        else:
+            lines.insert(self.insert_index, replacement_line)
+        return "\r\n".join(lines)
+
+    def write(self, work_dir, input_laz):
+        script_path = os.path.join(work_dir, os.path.basename(self.bat_path))
+        with open(script_path, 'w', newline='') as f:
+            f.write(self.render(input_laz))
+        return script_path
+
 # --- Sub-Frame 3: FLAI Frame ---
 class FlaiFrame(ttk.Frame):
     def __init__(self, parent, controller, classification_frame):
@@ -768,6 +1113,9 @@ class FlaiFrame(ttk.Frame):
         self.single_file_path_var = tk.StringVar()
         self.batch_mode = tk.BooleanVar(value=False)
         self.unit_override_var = tk.StringVar(value="(Auto-detect)")
+        # FLAI is GPU-bound: several jobs at once only pay off with GPU memory to spare
+        self.max_jobs_var = tk.StringVar(value="1")
+        self._outputs_lock = threading.Lock()
         self.UNIT_MAP = {"(Auto-detect)": None, "Meters": "meters", "US Survey Feet": "us-survey-foot", "International Feet": "foot"}
         self.files_list = []
         self.is_processing = False
@@ -819,6 +1167,10 @@ class FlaiFrame(ttk.Frame):
         unit_combo = ttk.Combobox(params_frame, textvariable=self.unit_override_var, values=list(self.UNIT_MAP.keys()), state="readonly", width=20)
         unit_combo.grid(row=0, column=1, sticky="w")
         Tooltip(unit_combo, "Optional: Force a specific unit. This will skip unit detection from the file header.")
+        ttk.Label(params_frame, text="Parallel Jobs:").grid(row=1, column=0, sticky="w", padx=(0,10), pady=(10, 0))
+        jobs_spin = ttk.Spinbox(params_frame, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.max_jobs_var, width=6)
+        jobs_spin.grid(row=1, column=1, sticky="w", pady=(10, 0))
+        Tooltip(jobs_spin, "How many files are classified at the same time in batch mode (FLAI runs on the GPU; keep 1 unless it has memory to spare).\nEach job runs its own copy of the script in an isolated work folder; files it writes to relative paths are moved\nnext to the .bat afterwards, prefixed with the input's name when another job of the run already wrote that name.")
 
         run_frame = ttk.Labelframe(self, text="3. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.grid(row=2, column=0, sticky="ew", pady=10)
@@ -847,6 +1199,7 @@ class FlaiFrame(ttk.Frame):
         self.files_list.clear()
         self.batch_mode.set(False)
         self.unit_override_var.set("(Auto-detect)")
+        self.max_jobs_var.set("1")
         self._toggle_input_mode()
         self.controller.log_frame.log("FLAI Classification tool has been reset.")
 
@@ -903,9 +1256,72 @@ class FlaiFrame(ttk.Frame):
         if self.is_processing: return
         self.set_ui_state(True)
         self.controller.log_frame.log(f"\n{'='*20}\n--- [FLAI] Starting Classification ---\n{'='*20}")
-        threading.Thread(target=self.run_flai_processing, args=(self.bat_file_path.get(),), daemon=True, name="FLAI_Process").start()
+        # Tk variables are read here, on the UI thread; every job gets its own copy of the settings
+        try:
+            max_jobs = max(1, int(self.max_jobs_var.get()))
+        except ValueError:
+            max_jobs = 1
+        unit = self.UNIT_MAP.get(self.unit_override_var.get())
+        threading.Thread(target=self.run_flai_processing, args=(self.bat_file_path.get(), unit, max_jobs), daemon=True, name="FLAI_Process").start()
     
-    def run_flai_processing(self, bat_path):
+    def _collect_job_outputs(self, run_dir, dest_dir, prefix, claimed):
+        """
+        Moves the files a job wrote to relative paths from its run folder to the .bat's folder.
+        A name another job of the same run already wrote gets the input's name as prefix instead of overwriting it.
+        """
+        for root, _, files in os.walk(run_dir):
+            rel_root = os.path.relpath(root, run_dir)
+            for file_name in files:
+                rel_path = os.path.normpath(os.path.join(rel_root, file_name))
+                with self._outputs_lock:
+                    if rel_path in claimed:
+                        rel_path = os.path.join(os.path.dirname(rel_path), f"{prefix}_{file_name}")
+                    claimed.add(rel_path)
+                target = os.path.join(dest_dir, rel_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(os.path.join(root, file_name), target)
+
+    def _run_flai_job(self, template, input_laz, unit, claimed):
+        """
+        Runs one file through its own rendered script, with its own working folder and TEMP/TMP inside an
+        isolated folder, so concurrent jobs never share relative paths. What the script wrote there is moved
+        next to the original .bat afterwards (see _collect_job_outputs) and the folder is removed.
+        """
+        log = self.controller.log_frame.log
+        name = os.path.basename(input_laz)
+        work_dir = tempfile.mkdtemp(prefix="flai_")
+        run_dir, temp_dir = os.path.join(work_dir, "run"), os.path.join(work_dir, "tmp")
+        os.makedirs(run_dir)
+        os.makedirs(temp_dir)
+        bat_dir = os.path.dirname(os.path.abspath(template.bat_path))
+        try:
+            script_path = template.write(work_dir, input_laz)
+            command = [script_path] + ([unit] if unit else [])
+            log(f"[{name}] Running {os.path.basename(template.bat_path)}" + (f" with unit '{unit}'" if unit else "") + f" in {work_dir}")
+            # The script's own temporary files stay in the job folder as well
+            env = dict(os.environ, TEMP=temp_dir, TMP=temp_dir)
+            creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+            process = subprocess.Popen(command, cwd=run_dir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, creationflags=creation_flags, encoding='utf-8', errors='ignore')
+            self.controller.register_process(self, process)
+            try:
+                for line in iter(process.stdout.readline, ''):
+                    if line.strip():
+                        log(f"[{name}] {line.strip()}")
+                process.stdout.close()
+                return_code = process.wait()
+            finally:
+                self.controller.unregister_process(self, process)
+            if return_code != 0:
+                raise subprocess.CalledProcessError(return_code, command)
+        finally:
+            # Logs are kept for failed jobs too
+            try:
+                self._collect_job_outputs(run_dir, bat_dir, os.path.splitext(name)[0], claimed)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def run_flai_processing(self, bat_path, unit=None, max_jobs=1):
         log = self.controller.log_frame
         
         if self.batch_mode.get():
@@ -924,58 +1340,37 @@ class FlaiFrame(ttk.Frame):
         all_success = True
         final_message = ""
 
-        for i, input_laz in enumerate(files_to_process):
-            log.log(f"\n--- ({i+1}/{total_files}) Processing: {os.path.basename(input_laz)} ---")
-            temp_bat_filepath = None
-            try:
-                with open(bat_path, 'r') as f: original_script_content = f.read()
-                safe_input_laz = os.path.normpath(input_laz)
-                replacement_line = f'set INPUT="{safe_input_laz}"'
-                lines, new_lines, found_and_replaced = original_script_content.splitlines(), [], False
-                for line in lines:
-                    if not found_and_replaced and line.strip().lower().startswith('set input='):
-                        new_lines.append(replacement_line)
-                        found_and_replaced = True
-                        log.log(f"Found and replaced INPUT variable with: {safe_input_laz}")
-                    else:
-                        new_lines.append(line)
-                if not found_and_replaced:
-                    log.log("Could not find 'set INPUT=' line. Injecting variable at the top of the script.")
-                    try: insert_pos = next(i for i, line in enumerate(new_lines) if line.strip().lower() == '@echo off') + 1
-                    except StopIteration: insert_pos = 0
-                    new_lines.insert(insert_pos, replacement_line)
-                modified_script_content = "\r\n".join(new_lines)
-                with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.bat', newline='') as temp_bat_file:
-                    temp_bat_file.write(modified_script_content)
-                    temp_bat_filepath = temp_bat_file.name
-
-                unit_display_name = self.unit_override_var.get()
-                unit_command_value = self.UNIT_MAP.get(unit_display_name)
-                
-                command_to_run = [temp_bat_filepath]
-                if unit_command_value:
-                    command_to_run.append(unit_command_value)
-                    log.log(f"Unit override selected: Appending '{unit_command_value}' to the command.")
-
-                _execute_command(
-                    command=command_to_run, log_widget=self.controller.log_frame,
-                    log_message=f"--- Executing temporary batch script based on {os.path.basename(bat_path)} ---",
-                    controller=self.controller, frame_instance=self
-                )
-            except Exception as e:
-                all_success = False
-                if self.controller.was_terminated:
-                    log.log(f"--- Process for {os.path.basename(input_laz)} was terminated by user. ---")
-                    final_message = "Process was terminated by the user."
-                    break
-                log.log(f"--- ERROR processing {os.path.basename(input_laz)}: {e} ---")
-            finally:
-                if temp_bat_filepath and os.path.exists(temp_bat_filepath):
-                    try:
-                        os.remove(temp_bat_filepath)
-                        log.log(f"Cleaned up temporary file: {temp_bat_filepath}")
-                    except OSError as err:
-                        log.log(f"Error cleaning up temporary file: {err}")
+        try:
+            template = FlaiScriptTemplate(bat_path)
+        except OSError as e:
+            self.after(0, self.on_processing_complete, total_files, False, f"Could not read the FLAI script:\n{e}")
+            return
+        if not template.has_input_line:
+            log.log("Could not find 'set INPUT=' line. Injecting variable at the top of the script.")
+        if unit:
+            log.log(f"Unit override selected: Appending '{unit}' to every job.")
+
+        max_jobs = min(max_jobs, total_files)
+        log.log(f"Classifying {total_files} file(s) with up to {max_jobs} concurrent job(s).")
+        claimed = set()
+        with ThreadPoolExecutor(max_workers=max_jobs) as executor:
+            futures = {}
+            for input_laz in files_to_process:
+                futures[executor.submit(self._run_flai_job, template, input_laz, unit, claimed)] = input_laz
+            for done, future in enumerate(as_completed(futures), start=1):
+                input_laz = futures[future]
+                try:
+                    future.result()
+                    log.log(f"--- ({done}/{total_files}) Finished: {os.path.basename(input_laz)} ---")
+                except Exception as e:
+                    all_success = False
+                    if self.controller.was_terminated:
+                        # Jobs that have not started yet are dropped; running ones were killed by Stop
+                        for pending in futures:
+                            pending.cancel()
+                        final_message = "Process was terminated by the user."
+                        continue
+                    log.log(f"--- ({done}/{total_files}) ERROR processing {os.path.basename(input_laz)}: {e} ---")
         
         if not final_message:
             final_message = f"FLAI processing is complete for all {total_files} file(s)." if all_success else "Process finished, but one or more files failed. Check the log for details."
@@ -5,6 +5,9 @@ import webbrowser
 import sys
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
+from utils.spatial_sort import SORT_CURVES
+from utils.intermediates import INTERMEDIATE_POLICIES
+from modules.smrf_numpy import SMRF_ENGINES
 
 class ConfigurationSettingsFrame(BaseToolFrame):
     def __init__(self, parent, controller):
@@ -18,6 +21,14 @@ class ConfigurationSettingsFrame(BaseToolFrame):
         self.pdal_path_local = tk.StringVar(value=self.controller.pdal_path_var.get())
         self.pdal_wrench_path_local = tk.StringVar(value=self.controller.pdal_wrench_path_var.get())
         self.rtklib_path_local = tk.StringVar(value=self.controller.rtklib_path_var.get())
+        self.point_cache_enabled_local = tk.BooleanVar(value=self.controller.point_cache_enabled_var.get())
+        self.point_cache_dir_local = tk.StringVar(value=self.controller.point_cache_dir_var.get())
+        self.point_cache_max_gb_local = tk.StringVar(value=self.controller.point_cache_max_gb_var.get())
+        self.spatial_sort_local = tk.StringVar(value=self.controller.spatial_sort_var.get())
+        self.intermediate_policy_local = tk.StringVar(value=self.controller.intermediate_policy_var.get())
+        self.scratch_dir_local = tk.StringVar(value=self.controller.scratch_dir_var.get())
+        self.laz_threads_local = tk.StringVar(value=self.controller.laz_threads_var.get())
+        self.smrf_engine_local = tk.StringVar(value=self.controller.get_smrf_engine())
 
         self.create_widgets()
 
@@ -92,9 +103,47 @@ class ConfigurationSettingsFrame(BaseToolFrame):
         Tooltip(rtk_entry, "Path to the 'bin' directory of RTKLib (containing convbin.exe, rtkplot.exe, etc.).")
         ttk.Button(rtk_frame, text="Browse...", command=lambda: self.browse_path(self.rtklib_path_local, False), bootstyle="secondary").grid(row=0, column=2, padx=(10, 0))
 
+        # --- Performance Settings ---
+        perf_frame = ttk.Labelframe(self.content_frame, text="Performance", padding=15, style="Info.TLabelframe")
+        perf_frame.grid(row=6, column=0, sticky="ew", pady=10)
+        perf_frame.columnconfigure(1, weight=1)
+        cache_toggle = ttk.Checkbutton(perf_frame, text="Enable point cache", variable=self.point_cache_enabled_local, bootstyle="round-toggle")
+        cache_toggle.grid(row=0, column=0, columnspan=3, sticky="w", pady=(0, 5))
+        Tooltip(cache_toggle, "Decompress each point cloud once into memory-mapped .npy files so repeated reads of the same file (e.g. Step 1 statistics) skip the LAZ decode.")
+        ttk.Label(perf_frame, text="Cache Folder:").grid(row=1, column=0, sticky="w", padx=(0, 10), pady=5)
+        cache_entry = ttk.Entry(perf_frame, textvariable=self.point_cache_dir_local, width=50)
+        cache_entry.grid(row=1, column=1, sticky="ew")
+        Tooltip(cache_entry, "Folder for the point cache. Leave empty to use the system temporary folder. A fast local SSD is recommended.")
+        ttk.Button(perf_frame, text="Browse...", command=lambda: self.browse_path(self.point_cache_dir_local, False), bootstyle="secondary").grid(row=1, column=2, padx=(10, 0))
+        ttk.Label(perf_frame, text="Cache Size Limit (GB):").grid(row=2, column=0, sticky="w", padx=(0, 10), pady=5)
+        cache_size_entry = ttk.Entry(perf_frame, textvariable=self.point_cache_max_gb_local, width=10)
+        cache_size_entry.grid(row=2, column=1, sticky="w")
+        Tooltip(cache_size_entry, "Least recently used files are removed from the cache once it grows beyond this size.")
+        ttk.Label(perf_frame, text="Sort Merged Outputs:").grid(row=3, column=0, sticky="w", padx=(0, 10), pady=5)
+        sort_combo = ttk.Combobox(perf_frame, textvariable=self.spatial_sort_local, values=list(SORT_CURVES), state="readonly", width=10)
+        sort_combo.grid(row=3, column=1, sticky="w")
+        Tooltip(sort_combo, "Reorder merged point clouds along a Morton or Hilbert curve. Improves LAZ compression and speeds up later clips and rasterization.")
+        ttk.Label(perf_frame, text="Intermediate Files:").grid(row=4, column=0, sticky="w", padx=(0, 10), pady=5)
+        policy_combo = ttk.Combobox(perf_frame, textvariable=self.intermediate_policy_local, values=list(INTERMEDIATE_POLICIES), state="readonly", width=10)
+        policy_combo.grid(row=4, column=1, sticky="w")
+        Tooltip(policy_combo, "laz: compressed intermediates next to the inputs (default).\nlas: uncompressed intermediates in the scratch folder, removed after each run.\nmemory: one-pass local SMRF keeps its point copy in memory and, with the built-in SMRF engine, hands the zone subsets over in memory; otherwise as 'las'.")
+        ttk.Label(perf_frame, text="Scratch Folder:").grid(row=5, column=0, sticky="w", padx=(0, 10), pady=5)
+        scratch_entry = ttk.Entry(perf_frame, textvariable=self.scratch_dir_local, width=50)
+        scratch_entry.grid(row=5, column=1, sticky="ew")
+        Tooltip(scratch_entry, "Fast local folder (tmpfs / NVMe) for uncompressed intermediates. Leave empty to use the system temporary folder.")
+        ttk.Button(perf_frame, text="Browse...", command=lambda: self.browse_path(self.scratch_dir_local, False), bootstyle="secondary").grid(row=5, column=2, padx=(10, 0))
+        ttk.Label(perf_frame, text="LAZ Codec Threads:").grid(row=6, column=0, sticky="w", padx=(0, 10), pady=5)
+        laz_threads_entry = ttk.Entry(perf_frame, textvariable=self.laz_threads_local, width=10)
+        laz_threads_entry.grid(row=6, column=1, sticky="w")
+        Tooltip(laz_threads_entry, "Threads used to decompress / compress LAZ in-process (0 = all cores, 1 = single-threaded).\nChanges take effect after restarting the application.")
+        ttk.Label(perf_frame, text="Ground Classifier:").grid(row=7, column=0, sticky="w", padx=(0, 10), pady=5)
+        engine_combo = ttk.Combobox(perf_frame, textvariable=self.smrf_engine_local, values=list(SMRF_ENGINES), state="readonly", width=10)
+        engine_combo.grid(row=7, column=1, sticky="w")
+        Tooltip(engine_combo, "SMRF implementation used by Local SMRF and Steps 2 / 3 of the PDAL pipeline.\npdal: PDAL's filters.smrf (requires PDAL).\nnumpy: built-in NumPy/SciPy implementation that runs in-process, tiled and in parallel for large clouds.")
+
         # --- Action Buttons ---
         action_frame = ttk.Frame(self.content_frame)
-        action_frame.grid(row=6, column=0, sticky="ew", pady=20)
+        action_frame.grid(row=7, column=0, sticky="ew", pady=20)
         action_frame.grid_columnconfigure(0, weight=1)
         action_frame.grid_columnconfigure(2, weight=1)
         
@@ -185,6 +234,14 @@ class ConfigurationSettingsFrame(BaseToolFrame):
         self.controller.pdal_path_var.set(self.pdal_path_local.get())
         self.controller.pdal_wrench_path_var.set(self.pdal_wrench_path_local.get())
         self.controller.rtklib_path_var.set(self.rtklib_path_local.get())
+        self.controller.point_cache_enabled_var.set(self.point_cache_enabled_local.get())
+        self.controller.point_cache_dir_var.set(self.point_cache_dir_local.get())
+        self.controller.point_cache_max_gb_var.set(self.point_cache_max_gb_local.get())
+        self.controller.spatial_sort_var.set(self.spatial_sort_local.get())
+        self.controller.intermediate_policy_var.set(self.intermediate_policy_local.get())
+        self.controller.scratch_dir_var.set(self.scratch_dir_local.get())
+        self.controller.laz_threads_var.set(self.laz_threads_local.get())
+        self.controller.smrf_engine_var.set(self.smrf_engine_local.get())
         
         # Trigger the theme change immediately
         self.controller.toggle_theme() 
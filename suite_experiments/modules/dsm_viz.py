@@ -9,8 +9,6 @@ from pathlib import Path
 
 # External dependencies (wrapped in try/except for safety)
 try:
-    import pandas as pd
-    import laspy
     import rasterio
     import numpy as np
     import matplotlib
@@ -26,6 +24,8 @@ except ImportError as e:
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
 from core.execution import _execute_pdal_pipeline
+from utils.las_io import read_dimensions, z_range_from_histogram
+from utils.pipelines import denoise_products_pipeline
 
 class DsmMapToolFrame(BaseToolFrame):
     def __init__(self, parent, controller):
@@ -177,22 +177,8 @@ class DsmMapToolFrame(BaseToolFrame):
     def _process_laz_stats(self, filepath):
         log = self.controller.log_frame.log
         try:
-            with laspy.open(filepath, mode='r') as fh:
-                las_data = fh.read()
-            z_coords = las_data.z
-            if len(z_coords) == 0: return None, None
-
-            min_z, max_z = int(z_coords.min()), int(z_coords.max()) + 1
-            z_bins = range(min_z, max_z + 1, 1)
-            counts, _ = pd.cut(z_coords, bins=z_bins, include_lowest=True, right=False, retbins=True)
-            counts = counts.value_counts().sort_index()
-            
-            bin_df = pd.DataFrame({'bin': [int(b.left) for b in counts.index], 'count': counts.values})
-            filtered = bin_df[bin_df['count'] >= 100].reset_index(drop=True)
-            
-            if not filtered.empty:
-                return filtered['bin'].iloc[0], filtered['bin'].iloc[-1]
-            return None, None
+            z_coords = read_dimensions(filepath, ["z"], point_cache=self.controller.get_point_cache())["z"]
+            return z_range_from_histogram(z_coords)
         except Exception as e:
             log(f"Stats Error: {e}")
             return None, None
@@ -203,28 +189,9 @@ class DsmMapToolFrame(BaseToolFrame):
         out_dsm = input_path.with_name(f"{input_path.stem}_dsm.tif")
         out_stat = input_path.with_name(f"{input_path.stem}_stat.tif")
         
-        # Denoise
-        pipeline_denoise = [
-            str(input_path),
-            {"type": "filters.range", "limits": f"Z[{first}:{last}]"},
-            {"type": "filters.assign", "assignment": "Classification[:]=0"},
-            {"type": "writers.las", "filename": str(out_denoised), "minor_version": "4"}
-        ]
-        _execute_pdal_pipeline(pipeline_denoise, self.controller.log_frame, "Denoising...", self.controller, self)
-        
-        # DSM
-        pipeline_dsm = [
-            str(out_denoised),
-            {"type": "writers.gdal", "filename": str(out_dsm), "resolution": 1.0, "output_type": "max"}
-        ]
-        _execute_pdal_pipeline(pipeline_dsm, self.controller.log_frame, "Creating DSM TIF...", self.controller, self)
-
-        # Stat
-        pipeline_stat = [
-            str(out_denoised),
-            {"type": "writers.gdal", "filename": str(out_stat), "resolution": 1.0, "output_type": "min,count"}
-        ]
-        _execute_pdal_pipeline(pipeline_stat, self.controller.log_frame, "Creating Stat TIF...", self.controller, self)
+        # Denoise, DSM and Stat from a single read of the input
+        pipeline = denoise_products_pipeline(input_path, f"Z[{first}:{last}]", out_denoised, out_dsm, out_stat)
+        _execute_pdal_pipeline(pipeline, self.controller.log_frame, "Denoising and creating DSM / Stat TIFs...", self.controller, self)
         
         return str(out_dsm), str(out_stat)
 
@@ -0,0 +1,262 @@
+import os
+import copy
+import json
+import math
+import shutil
+import tempfile
+from concurrent.futures import as_completed
+
+from utils.common import log_message
+from utils.las_io import iter_chunks, open_las, parse_crs_or_none, require_laspy, process_pool, DEFAULT_CHUNK_SIZE
+
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+DEFAULT_SPAN = 128                 # Voxel grid resolution per node edge used for sampling
+DEFAULT_MAX_NODE_POINTS = 100_000  # Nodes holding fewer points become leaves
+DEFAULT_CHUNK_POINTS = 5_000_000   # Target points per subtree handed to one worker
+MAX_CHUNK_LEVEL = 5
+
+# laspy dimension name -> (EPT/PDAL name, type)
+SCHEMA_NAMES = {
+    "intensity": ("Intensity", "unsigned"), "return_number": ("ReturnNumber", "unsigned"),
+    "number_of_returns": ("NumberOfReturns", "unsigned"), "scan_direction_flag": ("ScanDirectionFlag", "unsigned"),
+    "edge_of_flight_line": ("EdgeOfFlightLine", "unsigned"), "classification": ("Classification", "unsigned"),
+    "synthetic": ("Synthetic", "unsigned"), "key_point": ("KeyPoint", "unsigned"), "withheld": ("Withheld", "unsigned"),
+    "overlap": ("Overlap", "unsigned"), "scan_angle_rank": ("ScanAngleRank", "float"), "scan_angle": ("ScanAngleRank", "float"),
+    "user_data": ("UserData", "unsigned"), "point_source_id": ("PointSourceId", "unsigned"), "gps_time": ("GpsTime", "float"),
+    "red": ("Red", "unsigned"), "green": ("Green", "unsigned"), "blue": ("Blue", "unsigned"), "nir": ("Infrared", "unsigned"),
+    "scanner_channel": ("ScannerChannel", "unsigned"),
+}
+
+def _node_name(depth, x, y, z):
+    return f"{depth}-{x}-{y}-{z}"
+
+def _scan_inputs(input_files):
+    """Reads the headers of all inputs and returns the shared point format, bounds, point count, CRS and sources."""
+    mins, maxs, total, point_format, crs_wkt, version = None, None, 0, None, None, None
+    sources = []
+    for path in input_files:
+        with open_las(path) as reader:
+            header = reader.header
+            if point_format is None:
+                point_format, version = copy.deepcopy(header.point_format), header.version
+                scales = [float(s) for s in header.scales]
+                crs = parse_crs_or_none(header)
+                crs_wkt = crs.to_wkt() if crs is not None else None
+            elif header.point_format.id != point_format.id or header.point_format.num_extra_bytes != point_format.num_extra_bytes:
+                raise ValueError(f"'{os.path.basename(path)}' uses a different point format than the other inputs.")
+            mins = np.minimum(mins, header.mins) if mins is not None else np.array(header.mins, dtype=np.float64)
+            maxs = np.maximum(maxs, header.maxs) if maxs is not None else np.array(header.maxs, dtype=np.float64)
+            total += int(header.point_count)
+            sources.append({"id": os.path.basename(path), "bounds": [float(v) for v in header.mins] + [float(v) for v in header.maxs], "inserts": True})
+    return point_format, version, scales, mins, maxs, total, crs_wkt, sources
+
+def _cube_bounds(mins, maxs, scales):
+    """Returns the cubic root bounds enclosing the data (EPT nodes are cubes)."""
+    side = float(np.max(maxs - mins)) + 2 * max(scales)
+    center = (mins + maxs) / 2.0
+    return center - side / 2.0, side
+
+def _cells(coords, cube_min, side, depth):
+    """Returns the integer node coordinates of scaled points at a given octree depth."""
+    n = 1 << depth
+    return np.clip(((coords - cube_min) / side * n).astype(np.int64), 0, n - 1)
+
+def _distribute_file(path, spill_dir, file_index, layout):
+    """Re-quantizes one input to the shared scale/offset and spills its points into per-chunk files."""
+    dtype = np.dtype(layout["dtype"])
+    cube_min, side, level = np.array(layout["cube_min"]), layout["side"], layout["chunk_level"]
+    scales, offsets = np.array(layout["scales"]), np.array(layout["offsets"])
+    n = 1 << level
+    # iter_chunks applies classification delta sidecars, so the viewer shows the edited classes
+    for points in iter_chunks(path, DEFAULT_CHUNK_SIZE):
+        xyz = np.stack([np.asarray(points.x), np.asarray(points.y), np.asarray(points.z)], axis=1)
+        records = np.array(points.array, copy=True).view(dtype)
+        for axis, dim in enumerate(("X", "Y", "Z")):
+            records[dim] = np.round((xyz[:, axis] - offsets[axis]) / scales[axis]).astype(np.int32)
+        cells = _cells(xyz, cube_min, side, level)
+        keys = (cells[:, 0] * n + cells[:, 1]) * n + cells[:, 2]
+        order = np.argsort(keys, kind='stable')
+        keys, records = keys[order], records[order]
+        uniques, starts = np.unique(keys, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        for key, start, end in zip(uniques, starts, ends):
+            with open(os.path.join(spill_dir, f"chunk_{key}_{file_index}.bin"), 'ab') as f:
+                records[start:end].tofile(f)
+    return path
+
+def _voxel_sample(xyz, node_min, node_side, span):
+    """Returns a mask keeping the first point of every occupied voxel of a span^3 grid over the node."""
+    voxel = np.clip(((xyz - node_min) / node_side * span).astype(np.int64), 0, span - 1)
+    keys = (voxel[:, 0] * span + voxel[:, 1]) * span + voxel[:, 2]
+    _, first = np.unique(keys, return_index=True)
+    mask = np.zeros(len(xyz), dtype=bool)
+    mask[first] = True
+    return mask
+
+def _write_node(output_dir, name, records, layout):
+    header = laspy.LasHeader(point_format=copy.deepcopy(layout["point_format"]), version=layout["version"])
+    header.scales = np.array(layout["scales"])
+    header.offsets = np.array(layout["offsets"])
+    with open_las(os.path.join(output_dir, "ept-data", f"{name}.laz"), mode='w', header=header) as writer:
+        writer.write_points(laspy.PackedPointRecord(records, header.point_format))
+
+def _build_chunk(key, spill_dir, output_dir, layout):
+    """
+    Builds the subtree of one level-L chunk. Points promoted to the upper levels are spilled
+    per ancestor node; the chunk root and its descendants are written directly.
+    Returns the hierarchy counts of the written nodes.
+    """
+    dtype = np.dtype(layout["dtype"])
+    parts = sorted(f for f in os.listdir(spill_dir) if f.startswith(f"chunk_{key}_"))
+    records = np.concatenate([np.fromfile(os.path.join(spill_dir, f), dtype=dtype) for f in parts])
+    scales, offsets = np.array(layout["scales"]), np.array(layout["offsets"])
+    cube_min, side, level, span = np.array(layout["cube_min"]), layout["side"], layout["chunk_level"], layout["span"]
+    xyz = np.stack([records[dim] * scales[i] + offsets[i] for i, dim in enumerate(("X", "Y", "Z"))], axis=1)
+
+    # Bottom-up sampling for the shared upper levels (coarsest first)
+    keep = np.ones(len(records), dtype=bool)
+    for depth in range(level):
+        idx = np.nonzero(keep)[0]
+        if len(idx) == 0:
+            break
+        cell = _cells(xyz[idx[0]:idx[0] + 1], cube_min, side, depth)[0]
+        node_side = side / (1 << depth)
+        chosen = idx[_voxel_sample(xyz[idx], cube_min + cell * node_side, node_side, span)]
+        with open(os.path.join(spill_dir, f"up_{_node_name(depth, *cell)}_{key}.bin"), 'ab') as f:
+            records[chosen].tofile(f)
+        keep[chosen] = False
+
+    hierarchy = {}
+    stack = [(level, tuple(_cells(xyz[:1], cube_min, side, level)[0]), np.nonzero(keep)[0])]
+    while stack:
+        depth, cell, idx = stack.pop()
+        if len(idx) == 0:
+            continue
+        node_side = side / (1 << depth)
+        node_min = cube_min + np.array(cell) * node_side
+        if len(idx) <= layout["max_node_points"]:
+            selected, rest = idx, idx[:0]
+        else:
+            mask = _voxel_sample(xyz[idx], node_min, node_side, span)
+            selected, rest = idx[mask], idx[~mask]
+        name = _node_name(depth, *cell)
+        _write_node(output_dir, name, records[selected], layout)
+        hierarchy[name] = int(len(selected))
+        if len(rest):
+            child = _cells(xyz[rest], cube_min, side, depth + 1)
+            octant = (child[:, 0] & 1) * 4 + (child[:, 1] & 1) * 2 + (child[:, 2] & 1)
+            for o in range(8):
+                child_idx = rest[octant == o]
+                if len(child_idx):
+                    child_cell = (cell[0] * 2 + (o >> 2), cell[1] * 2 + ((o >> 1) & 1), cell[2] * 2 + (o & 1))
+                    stack.append((depth + 1, child_cell, child_idx))
+    return hierarchy
+
+def _schema(point_format, scales, offsets):
+    schema = []
+    for i, dim in enumerate(("X", "Y", "Z")):
+        schema.append({"name": dim, "type": "signed", "size": 4, "scale": scales[i], "offset": offsets[i]})
+    dtype = point_format.dtype()
+    for dim in point_format.dimension_names:
+        if dim in ("X", "Y", "Z"):
+            continue
+        if dim in SCHEMA_NAMES:
+            name, kind = SCHEMA_NAMES[dim]
+            size = 8 if name == "GpsTime" else 4 if kind == "float" else 2 if dim in ("intensity", "point_source_id", "red", "green", "blue", "nir") else 1
+        elif dim in dtype.names:
+            kind_char = dtype[dim].kind
+            name, kind, size = dim, {"f": "float", "i": "signed"}.get(kind_char, "unsigned"), dtype[dim].itemsize
+        else:
+            continue
+        if any(entry["name"] == name for entry in schema):
+            continue
+        schema.append({"name": name, "type": kind, "size": size})
+    return schema
+
+def build_ept(input_files, output_dir, span=DEFAULT_SPAN, max_node_points=DEFAULT_MAX_NODE_POINTS, chunk_points=DEFAULT_CHUNK_POINTS, max_workers=None, scratch_dir=None, log_callback=None):
+    """
+    Builds an Entwine Point Tile (EPT) octree from one or more LAS/LAZ files.
+    Points are first distributed into level-L chunks on disk, every chunk subtree is built in a
+    worker process, and the upper levels are filled bottom-up from voxel samples of the chunks.
+    Memory use is bounded by 'chunk_points' per worker. Returns the path of ept.json.
+    """
+    require_laspy()
+    if span & (span - 1):
+        raise ValueError("The octree span must be a power of two.")
+
+    point_format, version, scales, mins, maxs, total, crs_wkt, sources = _scan_inputs(input_files)
+    if total == 0:
+        raise ValueError("The input files contain no points.")
+    cube_min, side = _cube_bounds(mins, maxs, scales)
+    offsets = [float(round(v, 2)) for v in cube_min + side / 2.0]
+    chunk_level = min(MAX_CHUNK_LEVEL, max(0, math.ceil(math.log(max(total / chunk_points, 1), 4))))
+
+    log_message(log_callback, f"--- Building EPT octree from {len(input_files)} file(s), {total:,} points (chunk level {chunk_level}) ---")
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    for sub in ("ept-data", "ept-hierarchy", "ept-sources"):
+        os.makedirs(os.path.join(output_dir, sub), exist_ok=True)
+
+    layout = {
+        "dtype": point_format.dtype().descr, "point_format": point_format, "version": version,
+        "scales": scales, "offsets": offsets, "cube_min": cube_min.tolist(), "side": side,
+        "chunk_level": chunk_level, "span": span, "max_node_points": max_node_points,
+    }
+    spill_dir = tempfile.mkdtemp(prefix="ept_spill_", dir=scratch_dir)
+    hierarchy = {}
+    try:
+        with process_pool(max_workers) as executor:
+            log_message(log_callback, "Step 1: Distributing points into chunks...")
+            futures = [executor.submit(_distribute_file, path, spill_dir, i, layout) for i, path in enumerate(input_files)]
+            for i, future in enumerate(as_completed(futures), start=1):
+                log_message(log_callback, f"    ({i}/{len(input_files)}) Distributed: {os.path.basename(future.result())}")
+
+            chunk_keys = sorted({int(f.split("_")[1]) for f in os.listdir(spill_dir) if f.startswith("chunk_")})
+            log_message(log_callback, f"Step 2: Building {len(chunk_keys)} chunk subtree(s) in parallel...")
+            futures = [executor.submit(_build_chunk, key, spill_dir, output_dir, layout) for key in chunk_keys]
+            for i, future in enumerate(as_completed(futures), start=1):
+                hierarchy.update(future.result())
+                if i % max(1, len(futures) // 10) == 0 or i == len(futures):
+                    log_message(log_callback, f"    {i}/{len(futures)} subtree(s) complete")
+
+        log_message(log_callback, "Step 3: Writing the shared upper levels...")
+        dtype = np.dtype(layout["dtype"])
+        upper_nodes = sorted({f.split("_")[1] for f in os.listdir(spill_dir) if f.startswith("up_")})
+        for name in upper_nodes:
+            parts = sorted(f for f in os.listdir(spill_dir) if f.startswith(f"up_{name}_"))
+            records = np.concatenate([np.fromfile(os.path.join(spill_dir, f), dtype=dtype) for f in parts])
+            _write_node(output_dir, name, records, layout)
+            hierarchy[name] = int(len(records))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    with open(os.path.join(output_dir, "ept-hierarchy", "0-0-0-0.json"), 'w') as f:
+        json.dump(hierarchy, f)
+    with open(os.path.join(output_dir, "ept-sources", "list.json"), 'w') as f:
+        json.dump(sources, f, indent=4)
+
+    cube_max = cube_min + side
+    ept = {
+        "bounds": cube_min.tolist() + cube_max.tolist(),
+        "boundsConforming": mins.tolist() + maxs.tolist(),
+        "dataType": "laszip",
+        "hierarchyType": "json",
+        "points": int(sum(hierarchy.values())),
+        "schema": _schema(point_format, scales, offsets),
+        "span": span,
+        "srs": {"wkt": crs_wkt} if crs_wkt else {},
+        "version": "1.0.0",
+    }
+    ept_path = os.path.join(output_dir, "ept.json")
+    with open(ept_path, 'w') as f:
+        json.dump(ept, f, indent=4)
+
+    log_message(log_callback, f"EPT octree complete: {len(hierarchy)} node(s), {ept['points']:,} points written to {output_dir}")
+    return ept_path
@@ -12,6 +12,7 @@ from gui.widgets import Tooltip
 from utils.geometry import calculate_3d_affine, calculate_2d_conformal, calculate_translation_only
 from utils.files import get_laz_output_filename
 from core.execution import _execute_pdal_pipeline
+from utils.output_profiles import pdal_writer_options, pdal_profile_filters, profile_labels, profile_name_from_label, DEFAULT_OUTPUT_PROFILE, OUTPUT_PROFILES
 
 # Optional imports for plotting
 try:
@@ -28,6 +29,7 @@ class GeoreferenceFrame(BaseToolFrame):
         self.point_vars = {}
         self.matrix_3d_affine, self.matrix_2d_conformal, self.matrix_translation_only = "", "", ""
         self.input_laz_path, self.results_data = tk.StringVar(), {}
+        self.output_profile_var = tk.StringVar(value=OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.sash_configured = False
         self.is_processing = False
         self.create_widgets()
@@ -134,6 +136,10 @@ class GeoreferenceFrame(BaseToolFrame):
         laz_entry.grid(row=0, column=1, sticky="ew")
         Tooltip(laz_entry, "Select the point cloud file (.laz or .las) that you want to transform.")
         ttk.Button(load_frame, text="Browse...", command=self.browse_laz, bootstyle="secondary").grid(row=0, column=2, padx=(10, 0))
+        ttk.Label(load_frame, text="Output profile:").grid(row=1, column=0, padx=(0, 10), pady=5, sticky="w")
+        profile_combo = ttk.Combobox(load_frame, textvariable=self.output_profile_var, values=profile_labels(allow_class_filter=False), state="readonly", width=28)
+        profile_combo.grid(row=1, column=1, sticky="w")
+        Tooltip(profile_combo, "Full: keeps the source point format and every dimension.\nVisual RGB: point format 2 (no GPS time / extra bytes).\nThe output is always written at 0.001 precision.")
         
         run_frame = ttk.Labelframe(self.content_frame, text="5. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.grid(row=3, column=0, sticky="ew", pady=(10, 0))
@@ -159,6 +165,7 @@ class GeoreferenceFrame(BaseToolFrame):
     def reset_ui(self):
         self.csv_file_path_var.set("")
         self.input_laz_path.set("")
+        self.output_profile_var.set(OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.master_df = None
         for widget in self.point_frame.winfo_children():
             widget.destroy()
@@ -580,18 +587,16 @@ class GeoreferenceFrame(BaseToolFrame):
             
             suffix = f"_{abbreviations[selected_type_key]}"
             output_path = get_laz_output_filename(input_laz, suffix)
+            output_profile = profile_name_from_label(self.output_profile_var.get())
 
             pipeline = [
                 {"type": "readers.las", "filename": input_laz},
                 {"type": "filters.transformation", "matrix": chosen_matrix},
+                *pdal_profile_filters(output_profile, allow_class_filter=False),
                 {
                     "type": "writers.las",
                     "filename": output_path,
-                    "minor_version": 2,
-                    "dataformat_id": 3,
-                    "forward": "all",
-                    "scale_x": 0.001, "scale_y": 0.001, "scale_z": 0.001,
-                    "offset_x": "auto", "offset_y": "auto", "offset_z": "auto"
+                    **pdal_writer_options(output_profile, scale=0.001)
                 }
             ]
             
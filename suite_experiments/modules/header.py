@@ -10,6 +10,7 @@ from gui.widgets import Tooltip
 from utils.projections import get_published_from_local, get_published_from_epsg
 from utils.files import get_laz_output_filename
 from core.execution import _execute_pdal_pipeline
+from utils.output_profiles import pdal_writer_options, pdal_profile_filters, profile_labels, profile_name_from_label, DEFAULT_OUTPUT_PROFILE, OUTPUT_PROFILES
 import webbrowser
 from utils.projections import get_published_from_local, get_published_from_epsg, validate_and_format_wkt
 
@@ -26,6 +27,7 @@ class HeaderToolFrame(BaseToolFrame):
         self.files_list = []
         self.is_processing = False
         self.batch_mode = tk.BooleanVar(value=False)
+        self.output_profile_var = tk.StringVar(value=OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.UNIT_MAP_DISPLAY = {"Meters": "meters", "US Survey Feet": "us-ft", "International Feet": "ft"}
         self.create_widgets()
         self.update_ui_for_crs_type()
@@ -128,8 +130,14 @@ class HeaderToolFrame(BaseToolFrame):
         
         action_frame = ttk.Labelframe(self.content_frame, text="3. Run Process", padding=10, style="Info.TLabelframe")
         action_frame.grid(row=3, column=0, sticky="ew", pady=(10, 0))
+        profile_container = ttk.Frame(action_frame)
+        profile_container.grid(row=0, column=0, sticky="w", pady=(0, 10))
+        ttk.Label(profile_container, text="Output Profile:").pack(side="left", padx=(0, 10))
+        profile_combo = ttk.Combobox(profile_container, textvariable=self.output_profile_var, values=profile_labels(allow_class_filter=False), state="readonly", width=28)
+        profile_combo.pack(side="left")
+        Tooltip(profile_combo, "Full: keeps the source point format and every dimension.\nVisual RGB: point format 2 (no GPS time / extra bytes), 0.01 precision.")
         run_container = ttk.Frame(action_frame)
-        run_container.grid(row=0, column=0, sticky="w")
+        run_container.grid(row=1, column=0, sticky="w")
         self.run_button = ttk.Button(run_container, text="Run Header Update", command=self.start_processing_thread, bootstyle="primary", state="disabled")
         self.run_button.pack(side="left", padx=(0, 10))
         Tooltip(self.run_button, "Execute the PDAL pipeline to assign the new Coordinate Reference System to the file.")
@@ -302,6 +310,7 @@ class HeaderToolFrame(BaseToolFrame):
         self.files_list.clear()
         self.batch_mode.set(False)
         self._toggle_input_mode()
+        self.output_profile_var.set(OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self.crs_type.set("local")
         self.progress['value'] = 0
         self.update_ui_for_crs_type()
@@ -351,6 +360,7 @@ class HeaderToolFrame(BaseToolFrame):
             
             total_files = len(files_to_process)
             all_success = True
+            output_profile = profile_name_from_label(self.output_profile_var.get())
 
             for i, las_path in enumerate(files_to_process):
                 self.controller.log_frame.log(f"\n({i+1}/{total_files}) Processing: {os.path.basename(las_path)}")
@@ -358,13 +368,12 @@ class HeaderToolFrame(BaseToolFrame):
                     output_path = get_laz_output_filename(las_path, '_header')
                     pipeline = [
                         {"type": "readers.las", "filename": las_path}, 
+                        *pdal_profile_filters(output_profile, allow_class_filter=False),
                         {
                             "type": "writers.las", 
                             "filename": output_path, 
                             "a_srs": wkt_srs, 
-                            "minor_version": 2, 
-                            "dataformat_id": 3, 
-                            "forward": "all"
+                            **pdal_writer_options(output_profile)
                         }
                     ]
                     
@@ -0,0 +1,224 @@
+import os
+import json
+import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.common import log_message
+from utils.las_io import open_las, parse_crs_or_none, require_laspy
+from modules.polygon_reclass import reclassify_batch
+
+# Graceful import for GeoPandas / Shapely
+try:
+    import geopandas as gpd
+    import shapely
+except ImportError:
+    gpd = None
+    shapely = None
+
+RECLASS_SUFFIX = "_reclass"
+
+def require_geopandas():
+    if gpd is None or shapely is None:
+        raise ImportError("GeoPandas / Shapely are not installed. Please run 'pip install geopandas shapely' to use this tool.")
+
+def snapshot_path(output_dir, shp_file):
+    """The copy of the polygon layer as it was last applied to the tiles of 'output_dir'."""
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(shp_file))[0]}_applied.gpkg")
+
+def applied_tiles_path(output_dir, shp_file):
+    """The table of which layer version (by hash) each tile's output was last made from."""
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(shp_file))[0]}_applied.json")
+
+def reclass_output_path(tile_path, output_dir):
+    """Incremental runs overwrite a fixed output per tile so unchanged tiles keep their last result."""
+    return os.path.join(output_dir, f"{os.path.splitext(os.path.basename(tile_path))[0]}{RECLASS_SUFFIX}.laz")
+
+def _header_bounds(path):
+    with open_las(path) as reader:
+        min_x, min_y, _ = reader.header.mins
+        max_x, max_y, _ = reader.header.maxs
+        crs = parse_crs_or_none(reader.header)
+    return shapely.box(min_x, min_y, max_x, max_y), crs
+
+def tile_bounds_from_headers(tile_paths, max_workers=None):
+    """Returns {path: bounding box} from the LAS headers (no points are decoded) and the first CRS found."""
+    require_laspy()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_header_bounds, tile_paths))
+    crs = next((c for _, c in results if c is not None), None)
+    return {path: box for path, (box, _) in zip(tile_paths, results)}, crs
+
+def tile_bounds_from_index(index_path, tile_paths):
+    """
+    Returns {path: footprint} from a tile index built by the Tile Index tool (matched on its
+    'path' column, falling back to 'file') and the index CRS. Tiles missing from the index are left out.
+    """
+    gdf = gpd.read_file(index_path)
+    by_path = {os.path.normcase(os.path.abspath(p)): geom for p, geom in zip(gdf["path"], gdf.geometry)} if "path" in gdf.columns else {}
+    by_name = {name: geom for name, geom in zip(gdf["file"], gdf.geometry)} if "file" in gdf.columns else {}
+    bounds = {}
+    for path in tile_paths:
+        geom = by_path.get(os.path.normcase(os.path.abspath(path)), by_name.get(os.path.basename(path)))
+        if geom is not None:
+            bounds[path] = geom
+    return bounds, gdf.crs
+
+def _feature_keys(gdf, column):
+    """One hashable key per feature: its normalized geometry and class value."""
+    geometries = shapely.to_wkb(shapely.normalize(gdf.geometry.values))
+    return [(geom, str(value)) for geom, value in zip(geometries, gdf[column])]
+
+def layer_hash(gdf, column="Class"):
+    """A hash of a reclass layer version that ignores feature order."""
+    digest = hashlib.sha1()
+    for geom, value in sorted(_feature_keys(gdf, column)):
+        digest.update(geom)
+        digest.update(value.encode("utf-8"))
+    return digest.hexdigest()
+
+def _tile_key(path):
+    """Tiles are recorded by absolute path, so same-named tiles of different folders never share a version."""
+    return os.path.normcase(os.path.abspath(path))
+
+def _load_applied_tiles(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get("tiles", {})
+
+def _save_applied_tiles(path, layer, tiles):
+    with open(path, 'w') as f:
+        json.dump({"layer": layer, "tiles": tiles}, f, indent=4)
+
+def changed_geometries(previous, current, column="Class"):
+    """
+    Diffs two versions of a reclass layer. Returns the geometries of features that were added, removed
+    or edited (geometry or class); an edited feature contributes both its old and its new shape.
+    """
+    old_keys, new_keys = _feature_keys(previous, column), _feature_keys(current, column)
+    old_left, new_left = Counter(old_keys) - Counter(new_keys), Counter(new_keys) - Counter(old_keys)
+    changed = []
+    for keys, gdf, left in ((old_keys, previous, old_left), (new_keys, current, new_left)):
+        for key, geom in zip(keys, gdf.geometry.values):
+            if left.get(key, 0) > 0:
+                left[key] -= 1
+                changed.append(geom)
+    return changed
+
+def select_tiles(tile_bounds, geometries):
+    """Returns the tiles whose bounds intersect any of 'geometries', in the order of 'tile_bounds'."""
+    if not geometries or not tile_bounds:
+        return []
+    paths = list(tile_bounds)
+    tree = shapely.STRtree(list(tile_bounds.values()))
+    _, hits = tree.query(geometries, predicate="intersects")
+    hit = set(hits.tolist())
+    return [path for i, path in enumerate(paths) if i in hit]
+
+def _column(gdf, column):
+    columns = {c.lower(): c for c in gdf.columns}
+    if column.lower() not in columns:
+        raise ValueError(f"The polygon layer has no '{column}' column.")
+    return columns[column.lower()]
+
+def run_incremental_reclass(tile_paths, shp_file, output_dir, tile_index=None, max_workers=None, column="Class",
+                            should_stop=None, log_callback=None):
+    """
+    Re-applies a reclass layer to a project, reprocessing only the tiles touched by polygons that changed
+    since the last applied version (kept as a snapshot in 'output_dir'). Tile bounds come from the tile
+    index when given, otherwise from the LAS headers. Every tile records the layer version its output was
+    made from; tiles without an output, or made from a version older than the snapshot, are always
+    processed. Tiles whose outputs would share a name in 'output_dir' are rejected (see run_incremental_reclass_by_folder).
+    Returns (outputs, failed, skipped).
+    """
+    require_geopandas()
+    output_names = Counter(os.path.basename(reclass_output_path(p, output_dir)) for p in tile_paths)
+    duplicates = sorted(name for name, count in output_names.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Tiles from different folders would share the output(s) {', '.join(duplicates)} in {output_dir}.")
+    os.makedirs(output_dir, exist_ok=True)
+    current = gpd.read_file(shp_file)
+    current_column = _column(current, column)
+    current_hash = layer_hash(current, current_column)
+    snapshot = snapshot_path(output_dir, shp_file)
+    tiles_path = applied_tiles_path(output_dir, shp_file)
+    applied = _load_applied_tiles(tiles_path)
+
+    if tile_index:
+        bounds, bounds_crs = tile_bounds_from_index(tile_index, tile_paths)
+        unindexed = [p for p in tile_paths if p not in bounds]
+        if unindexed:
+            log_message(log_callback, f"{len(unindexed)} tile(s) are not in the tile index; reading their headers instead.")
+            header_bounds, _ = tile_bounds_from_headers(unindexed, max_workers)
+            bounds.update(header_bounds)
+    else:
+        bounds, bounds_crs = tile_bounds_from_headers(tile_paths, max_workers)
+
+    def applied_version(path):
+        if not os.path.isfile(reclass_output_path(path, output_dir)):
+            return None
+        return applied.get(_tile_key(path))
+
+    if not os.path.isfile(snapshot):
+        log_message(log_callback, "No previously applied version of this layer was found: processing every tile.")
+        selected = [p for p in tile_paths if applied_version(p) != current_hash]
+    else:
+        previous = gpd.read_file(snapshot)
+        previous_column = _column(previous, column)
+        previous_hash = layer_hash(previous, previous_column)
+        changed = changed_geometries(previous.rename(columns={previous_column: current_column}), current, current_column)
+        if changed and bounds_crs is not None and current.crs is not None and current.crs != bounds_crs:
+            changed = list(gpd.GeoSeries(changed, crs=current.crs).to_crs(bounds_crs).values)
+        touched = set(select_tiles(bounds, changed))
+        # Only tiles made from the snapshot version can rely on the diff; older or missing outputs are redone
+        stale = {p for p in tile_paths if applied_version(p) not in (previous_hash, current_hash)}
+        log_message(log_callback, f"{len(changed)} changed polygon shape(s) since the last run touch {len(touched)} of {len(tile_paths)} tile(s); "
+                           f"{len(stale)} tile(s) have no output from the last applied version.")
+        selected = [p for p in tile_paths if p in stale or (p in touched and applied_version(p) != current_hash)]
+    selected_set = set(selected)
+    skipped = [p for p in tile_paths if p not in selected_set]
+
+    outputs, failed = [], []
+    if selected:
+        output_paths = {p: reclass_output_path(p, output_dir) for p in selected}
+        # Earlier results are replaced, not suffixed, so the project keeps one output per tile
+        for path in output_paths.values():
+            if os.path.isfile(path):
+                os.remove(path)
+        outputs, failed = reclassify_batch(selected, shp_file, output_paths, max_workers=max_workers, should_stop=should_stop, log_callback=log_callback)
+
+    # Skipped tiles are up to date with the current version; failed ones keep no version and are redone next time
+    failed_set = set(failed)
+    for path in tile_paths:
+        if path in failed_set:
+            applied.pop(_tile_key(path), None)
+        else:
+            applied[_tile_key(path)] = current_hash
+    current[[current_column, current.geometry.name]].to_file(snapshot, driver="GPKG")
+    _save_applied_tiles(tiles_path, current_hash, applied)
+    log_message(log_callback, f"Applied version of the layer saved to: {os.path.basename(snapshot)}")
+    return outputs, failed, skipped
+
+def run_incremental_reclass_by_folder(tile_paths, shp_file, tile_index=None, max_workers=None, column="Class",
+                                      should_stop=None, log_callback=None):
+    """
+    Runs run_incremental_reclass once per folder of 'tile_paths', so each folder keeps its own snapshot,
+    applied-version table and outputs next to its tiles. Returns the combined (outputs, failed, skipped).
+    """
+    folders = {}
+    for path in tile_paths:
+        folders.setdefault(os.path.dirname(os.path.abspath(path)), []).append(path)
+    outputs, failed, skipped = [], [], []
+    for folder, paths in folders.items():
+        if should_stop and should_stop():
+            break
+        if len(folders) > 1:
+            log_message(log_callback, f"--- {folder}: {len(paths)} tile(s) ---")
+        folder_outputs, folder_failed, folder_skipped = run_incremental_reclass(
+            paths, shp_file, folder, tile_index=tile_index, max_workers=max_workers, column=column,
+            should_stop=should_stop, log_callback=log_callback)
+        outputs += folder_outputs
+        failed += folder_failed
+        skipped += folder_skipped
+    return outputs, failed, skipped
@@ -8,6 +8,14 @@ from pathlib import Path
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
 from core.execution import _execute_command
+from utils.las_io import list_point_cloud_files
+from modules.tile_index import build_tile_index, DEFAULT_CELL_SIZE
+from modules.parquet_export import export_to_parquet, manifest_partition, grid_partition, EXPORT_DIMENSIONS, DEFAULT_DIMENSIONS
+from utils.files import read_split_manifest, SPLIT_MANIFEST_NAME
+from utils.spatial_sort import spatial_sort_file
+from utils.output_profiles import las2las_profile_args, profile_labels, profile_name_from_label, DEFAULT_OUTPUT_PROFILE, OUTPUT_PROFILES
+from modules.ept_builder import build_ept
+from modules.class_remap import REMAP_PRESETS, DEFAULT_PRESET, parse_mapping, load_mapping_csv, format_mapping, remap_batch
 
 class Las2lasFrame(BaseToolFrame):
     def __init__(self, parent, controller):
@@ -21,6 +29,7 @@ class Las2lasFrame(BaseToolFrame):
         self.convert_folder_path_display = tk.StringVar()
         self.convert_files_list = []
         self.convert_batch_mode = tk.BooleanVar(value=False)
+        self.convert_profile_var = tk.StringVar(value=OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
 
         # Decimate
         self.decimate_single_file_path = tk.StringVar()
@@ -28,11 +37,13 @@ class Las2lasFrame(BaseToolFrame):
         self.decimate_files_list = []
         self.decimate_batch_mode = tk.BooleanVar(value=False)
 
-        # Drop 0
-        self.drop0_single_file_path = tk.StringVar()
-        self.drop0_folder_path_display = tk.StringVar()
-        self.drop0_files_list = []
-        self.drop0_batch_mode = tk.BooleanVar(value=False)
+        # Class Remap
+        self.remap_single_file_path = tk.StringVar()
+        self.remap_folder_path_display = tk.StringVar()
+        self.remap_files_list = []
+        self.remap_batch_mode = tk.BooleanVar(value=False)
+        self.remap_preset_var = tk.StringVar(value=DEFAULT_PRESET)
+        self.remap_mapping_var = tk.StringVar(value=REMAP_PRESETS[DEFAULT_PRESET])
         
         # Rescale
         self.rescale_single_file_path = tk.StringVar()
@@ -45,6 +56,21 @@ class Las2lasFrame(BaseToolFrame):
         self.info_file_path = tk.StringVar()
         self.view_file_path = tk.StringVar()
 
+        # Tile Index
+        self.index_folder_path = tk.StringVar()
+        self.index_files_list = []
+        self.index_format_var = tk.StringVar(value="GeoPackage (.gpkg)")
+        self.index_cell_size_var = tk.StringVar(value=str(DEFAULT_CELL_SIZE))
+
+        # Parquet Export
+        self.parquet_folder_path = tk.StringVar()
+        self.parquet_files_list = []
+        self.parquet_input_dir = ""
+        self.parquet_dimension_vars = {d: tk.BooleanVar(value=d in DEFAULT_DIMENSIONS) for d in EXPORT_DIMENSIONS}
+        self.parquet_partition_var = tk.StringVar(value="None")
+        self.parquet_grid_size_var = tk.StringVar(value="500")
+        self.parquet_manifest_path = tk.StringVar()
+
         self.merge_files_list = []
         self.is_processing = False
         self.create_widgets()
@@ -59,39 +85,47 @@ class Las2lasFrame(BaseToolFrame):
         
         # Create Tabs (Renamed variables for clarity)
         tab_decimate = ttk.Frame(notebook, padding=15)
-        tab_drop0 = ttk.Frame(notebook, padding=15)
+        tab_remap = ttk.Frame(notebook, padding=15)
         tab_info = ttk.Frame(notebook, padding=15)
         tab_convert = ttk.Frame(notebook, padding=15) # LAS to LAZ
         tab_merge = ttk.Frame(notebook, padding=15)
+        tab_parquet = ttk.Frame(notebook, padding=15)
         tab_rescale = ttk.Frame(notebook, padding=15)
+        tab_index = ttk.Frame(notebook, padding=15)
         tab_view = ttk.Frame(notebook, padding=15)
         
         # Add Tabs in Alphabetical Order
         notebook.add(tab_decimate, text='Decimate')
-        notebook.add(tab_drop0, text='Drop Class 0')
+        notebook.add(tab_remap, text='Class Remap')
         notebook.add(tab_info, text='Info')
         notebook.add(tab_convert, text='LAS to LAZ')
         notebook.add(tab_merge, text='Merge')
+        notebook.add(tab_parquet, text='Parquet Export')
         notebook.add(tab_rescale, text='Rescale')
+        notebook.add(tab_index, text='Tile Index')
         notebook.add(tab_view, text='View')
         
         # Setup Tabs content
         self.setup_decimate_tab(tab_decimate)
-        self.setup_drop_class_0_tab(tab_drop0)
+        self.setup_class_remap_tab(tab_remap)
         self.setup_info_tab(tab_info)
         self.setup_las_to_laz_tab(tab_convert)
         self.setup_merge_tab(tab_merge)
+        self.setup_parquet_tab(tab_parquet)
         self.setup_rescale_tab(tab_rescale)
+        self.setup_tile_index_tab(tab_index)
         self.setup_view_tab(tab_view)
         
         # Tooltips
         Tooltip(tab_decimate, "Reduce the point density of a .laz file by keeping every 4th point.")
-        Tooltip(tab_drop0, "Remove all points assigned to Class 0 (Never Classified).")
+        Tooltip(tab_remap, "Remap or drop classification codes with a mapping table (e.g. drop Class 0, ASPRS 1.2 -> 1.4, vendor -> client codes).")
         Tooltip(tab_info, "Run lasinfo to view file header, bounding box, and VLRs.")
         Tooltip(tab_convert, "Convert a single .las file to the compressed .laz format.")
         Tooltip(tab_merge, "Combine multiple .las or .laz files into a single merged .laz file.")
+        Tooltip(tab_parquet, "Export point clouds to columnar Parquet files for pandas / DuckDB analysis.")
         Tooltip(tab_rescale, "Rescale coordinate resolution (e.g. to 0.01) to fix precision issues.")
-        Tooltip(tab_view, "Launch lasview to visualize the point cloud in 3D.")
+        Tooltip(tab_index, "Build a tile index layer with the footprint and statistics of every file in a folder.")
+        Tooltip(tab_view, "Launch lasview to visualize the point cloud in 3D, or build an EPT octree for streaming viewers.")
 
         # Footer Actions
         action_frame = ttk.Frame(self.content_frame)
@@ -112,6 +146,7 @@ class Las2lasFrame(BaseToolFrame):
         self.convert_folder_path_display.set("")
         self.convert_files_list.clear()
         self.convert_batch_mode.set(False)
+        self.convert_profile_var.set(OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE]["label"])
         self._toggle_input_mode_convert()
 
         # Decimate
@@ -121,12 +156,14 @@ class Las2lasFrame(BaseToolFrame):
         self.decimate_batch_mode.set(False)
         self._toggle_input_mode_decimate()
         
-        # Drop 0
-        self.drop0_single_file_path.set("")
-        self.drop0_folder_path_display.set("")
-        self.drop0_files_list.clear()
-        self.drop0_batch_mode.set(False)
-        self._toggle_input_mode_drop0()
+        # Class Remap
+        self.remap_single_file_path.set("")
+        self.remap_folder_path_display.set("")
+        self.remap_files_list.clear()
+        self.remap_batch_mode.set(False)
+        self.remap_preset_var.set(DEFAULT_PRESET)
+        self.remap_mapping_var.set(REMAP_PRESETS[DEFAULT_PRESET])
+        self._toggle_input_mode_remap()
         
         # Rescale
         self.rescale_single_file_path.set("")
@@ -140,6 +177,22 @@ class Las2lasFrame(BaseToolFrame):
         self.info_file_path.set("")
         self.view_file_path.set("")
 
+        # Tile Index
+        self.index_folder_path.set("")
+        self.index_files_list.clear()
+        self.index_format_var.set("GeoPackage (.gpkg)")
+        self.index_cell_size_var.set(str(DEFAULT_CELL_SIZE))
+
+        # Parquet Export
+        self.parquet_folder_path.set("")
+        self.parquet_files_list.clear()
+        self.parquet_input_dir = ""
+        for d, var in self.parquet_dimension_vars.items():
+            var.set(d in DEFAULT_DIMENSIONS)
+        self.parquet_partition_var.set("None")
+        self.parquet_grid_size_var.set("500")
+        self.parquet_manifest_path.set("")
+
         # Merge
         self.merge_files_summary.set("")
         self.merge_output_name.set("")
@@ -152,10 +205,12 @@ class Las2lasFrame(BaseToolFrame):
         self.is_processing = is_processing
         all_buttons = [
             self.convert_btn, self.browse_las_btn, 
-            self.run_decimate_btn, self.run_drop0_btn, 
+            self.run_decimate_btn, self.run_remap_btn, 
             self.run_rescale_btn, self.run_info_btn, 
             self.run_view_btn, self.run_merge_btn, 
-            self.select_merge_btn
+            self.select_merge_btn, self.run_index_btn,
+            self.run_parquet_btn, self.run_ept_file_btn,
+            self.run_ept_folder_btn
         ]
         
         if is_processing:
@@ -195,11 +250,11 @@ class Las2lasFrame(BaseToolFrame):
         else:
             self.run_decimate_btn.config(state="normal" if os.path.isfile(self.decimate_single_file_path.get()) else "disabled")
 
-        # Drop 0
-        if self.drop0_batch_mode.get():
-            self.run_drop0_btn.config(state="normal" if self.drop0_files_list else "disabled")
+        # Class Remap
+        if self.remap_batch_mode.get():
+            self.run_remap_btn.config(state="normal" if self.remap_files_list else "disabled")
         else:
-            self.run_drop0_btn.config(state="normal" if os.path.isfile(self.drop0_single_file_path.get()) else "disabled")
+            self.run_remap_btn.config(state="normal" if os.path.isfile(self.remap_single_file_path.get()) else "disabled")
 
         # Rescale
         if self.rescale_batch_mode.get():
@@ -210,6 +265,13 @@ class Las2lasFrame(BaseToolFrame):
         # Info & View
         self.run_info_btn.config(state="normal" if os.path.isfile(self.info_file_path.get()) else "disabled")
         self.run_view_btn.config(state="normal" if os.path.isfile(self.view_file_path.get()) else "disabled")
+        self.run_ept_file_btn.config(state="normal" if os.path.isfile(self.view_file_path.get()) else "disabled")
+
+        # Tile Index
+        self.run_index_btn.config(state="normal" if self.index_files_list else "disabled")
+
+        # Parquet Export
+        self.run_parquet_btn.config(state="normal" if self.parquet_files_list else "disabled")
 
         # Merge
         self.run_merge_btn.config(state="normal" if len(self.merge_files_list) > 1 else "disabled")
@@ -270,57 +332,103 @@ class Las2lasFrame(BaseToolFrame):
         widgets = {'run_button': self.run_decimate_btn, 'progress_bar': self.decimate_progress, 'original_text': 'Run Decimation'}
         self._run_batch_process(files, {'output_name': "{stem}_deci.laz", 'args': ["-keep_every_nth", "4"]}, "Decimation", widgets)
 
-    # ==================== TAB 2: DROP CLASS 0 ====================
-    def setup_drop_class_0_tab(self, parent):
+    # ==================== TAB 2: CLASS REMAP ====================
+    def setup_class_remap_tab(self, parent):
         parent.columnconfigure(0, weight=1)
-        ttk.Label(parent, text="Removes points with classification 0 (Never Classified)").pack(anchor='w', pady=(0, 10), fill='x')
+        ttk.Label(parent, text="Remaps or drops classification codes with a 256-entry lookup table, streamed in chunks without LAStools.").pack(anchor='w', pady=(0, 10), fill='x')
         input_frame = ttk.Labelframe(parent, text="1. Select Input", padding=10, style="Info.TLabelframe"); input_frame.pack(fill='x', pady=(0, 10)); input_frame.columnconfigure(0, weight=1)
-        ttk.Checkbutton(input_frame, text="Batch Mode (Process entire folder)", variable=self.drop0_batch_mode, command=self._toggle_input_mode_drop0, bootstyle="round-toggle").pack(anchor='w', pady=(0, 10))
-        
-        self.drop0_single_file_frame = ttk.Frame(input_frame); self.drop0_single_file_frame.pack(fill='x'); self.drop0_single_file_frame.columnconfigure(1, weight=1)
-        ttk.Label(self.drop0_single_file_frame, text="Input File (.laz/.las):").grid(row=0, column=0, sticky='w', padx=(0,10))
-        ttk.Entry(self.drop0_single_file_frame, textvariable=self.drop0_single_file_path, state="readonly").grid(row=0, column=1, sticky='ew')
-        ttk.Button(self.drop0_single_file_frame, text="Select File...", bootstyle="secondary", command=self.select_drop0_file).grid(row=0, column=2, padx=(5,0))
-        self.drop0_single_file_path.trace_add("write", self._check_all_run_buttons_state)
-        
-        self.drop0_folder_frame = ttk.Frame(input_frame); self.drop0_folder_frame.pack(fill='x'); self.drop0_folder_frame.columnconfigure(1, weight=1)
-        ttk.Label(self.drop0_folder_frame, text="Input Folder:").grid(row=0, column=0, sticky='w', padx=(0,10))
-        ttk.Entry(self.drop0_folder_frame, textvariable=self.drop0_folder_path_display, state="readonly").grid(row=0, column=1, sticky='ew')
-        ttk.Button(self.drop0_folder_frame, text="Select Folder...", bootstyle="secondary", command=self.select_drop0_folder).grid(row=0, column=2, padx=(5,0))
-        self.drop0_folder_frame.pack_forget()
+        ttk.Checkbutton(input_frame, text="Batch Mode (Process entire folder)", variable=self.remap_batch_mode, command=self._toggle_input_mode_remap, bootstyle="round-toggle").pack(anchor='w', pady=(0, 10))
+        
+        self.remap_single_file_frame = ttk.Frame(input_frame); self.remap_single_file_frame.pack(fill='x'); self.remap_single_file_frame.columnconfigure(1, weight=1)
+        ttk.Label(self.remap_single_file_frame, text="Input File (.laz/.las):").grid(row=0, column=0, sticky='w', padx=(0,10))
+        ttk.Entry(self.remap_single_file_frame, textvariable=self.remap_single_file_path, state="readonly").grid(row=0, column=1, sticky='ew')
+        ttk.Button(self.remap_single_file_frame, text="Select File...", bootstyle="secondary", command=self.select_remap_file).grid(row=0, column=2, padx=(5,0))
+        self.remap_single_file_path.trace_add("write", self._check_all_run_buttons_state)
+        
+        self.remap_folder_frame = ttk.Frame(input_frame); self.remap_folder_frame.pack(fill='x'); self.remap_folder_frame.columnconfigure(1, weight=1)
+        ttk.Label(self.remap_folder_frame, text="Input Folder:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        ttk.Entry(self.remap_folder_frame, textvariable=self.remap_folder_path_display, state="readonly").grid(row=0, column=1, sticky='ew')
+        ttk.Button(self.remap_folder_frame, text="Select Folder...", bootstyle="secondary", command=self.select_remap_folder).grid(row=0, column=2, padx=(5,0))
+        self.remap_folder_frame.pack_forget()
+
+        mapping_frame = ttk.Labelframe(parent, text="2. Mapping Table", padding=10, style="Info.TLabelframe"); mapping_frame.pack(fill='x', pady=(0, 10)); mapping_frame.columnconfigure(1, weight=1)
+        ttk.Label(mapping_frame, text="Preset:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        preset_combo = ttk.Combobox(mapping_frame, textvariable=self.remap_preset_var, values=list(REMAP_PRESETS.keys()), state="readonly", width=40); preset_combo.grid(row=0, column=1, sticky='w')
+        preset_combo.bind("<<ComboboxSelected>>", lambda e: self.remap_mapping_var.set(REMAP_PRESETS[self.remap_preset_var.get()]))
+        ttk.Label(mapping_frame, text="Mapping:").grid(row=1, column=0, sticky='w', padx=(0,10), pady=(5,0))
+        mapping_entry = ttk.Entry(mapping_frame, textvariable=self.remap_mapping_var); mapping_entry.grid(row=1, column=1, sticky='ew', pady=(5,0))
+        Tooltip(mapping_entry, "Comma-separated 'source:target' pairs, e.g. '0:drop, 12:1, 3:5'.\n'drop' removes the points; codes that are not listed are kept as they are.")
+        ttk.Button(mapping_frame, text="Load CSV...", bootstyle="secondary", command=self.load_remap_csv).grid(row=1, column=2, padx=(5,0), pady=(5,0))
 
-        run_frame = ttk.Labelframe(parent, text="2. Run Process", padding=10, style="Info.TLabelframe"); run_frame.pack(fill='x'); run_container = ttk.Frame(run_frame); run_container.pack(anchor='w')
-        self.run_drop0_btn = ttk.Button(run_container, text="Run Process", command=self.run_drop_class_0, bootstyle="primary"); self.run_drop0_btn.pack(side='left', padx=(0,10))
-        self.drop0_progress = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary"); self.drop0_progress.pack(side='left')
+        run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe"); run_frame.pack(fill='x'); run_container = ttk.Frame(run_frame); run_container.pack(anchor='w')
+        self.run_remap_btn = ttk.Button(run_container, text="Run Process", command=self.run_class_remap, bootstyle="primary"); self.run_remap_btn.pack(side='left', padx=(0,10))
+        self.remap_progress = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary"); self.remap_progress.pack(side='left')
 
-    def _toggle_input_mode_drop0(self):
-        is_batch = self.drop0_batch_mode.get()
-        self.drop0_single_file_frame.pack_forget() if is_batch else self.drop0_single_file_frame.pack(fill='x', expand=True)
-        self.drop0_folder_frame.pack(fill='x', expand=True) if is_batch else self.drop0_folder_frame.pack_forget()
+    def _toggle_input_mode_remap(self):
+        is_batch = self.remap_batch_mode.get()
+        self.remap_single_file_frame.pack_forget() if is_batch else self.remap_single_file_frame.pack(fill='x', expand=True)
+        self.remap_folder_frame.pack(fill='x', expand=True) if is_batch else self.remap_folder_frame.pack_forget()
         self._check_all_run_buttons_state()
 
-    def select_drop0_file(self):
+    def select_remap_file(self):
         path = filedialog.askopenfilename(filetypes=[("Lidar Files", "*.laz *.las")])
-        if path: self.drop0_single_file_path.set(path)
+        if path: self.remap_single_file_path.set(path)
         self._check_all_run_buttons_state()
         
-    def select_drop0_folder(self):
+    def select_remap_folder(self):
         directory = filedialog.askdirectory()
         if directory:
-            files = [os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(('.laz', '.las'))]
+            files = list_point_cloud_files(directory)
             if files:
-                self.drop0_files_list = files
-                self.drop0_folder_path_display.set(f"{len(files)} file(s) found")
+                self.remap_files_list = files
+                self.remap_folder_path_display.set(f"{len(files)} file(s) found")
             else:
-                self.drop0_files_list = []
-                self.drop0_folder_path_display.set("No files found")
+                self.remap_files_list = []
+                self.remap_folder_path_display.set("No files found")
         self._check_all_run_buttons_state()
 
-    def run_drop_class_0(self):
-        files = self.drop0_files_list if self.drop0_batch_mode.get() else [self.drop0_single_file_path.get()]
+    def load_remap_csv(self):
+        path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path: return
+        try:
+            self.remap_mapping_var.set(format_mapping(load_mapping_csv(path)))
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Invalid Mapping", f"Could not read the mapping table:\n{e}")
+
+    def run_class_remap(self):
+        files = self.remap_files_list if self.remap_batch_mode.get() else [self.remap_single_file_path.get()]
         if not any(files): return
-        widgets = {'run_button': self.run_drop0_btn, 'progress_bar': self.drop0_progress, 'original_text': 'Run Process'}
-        self._run_batch_process(files, {'output_name': "{stem}_drop0.laz", 'args': ["-drop_class", "0"]}, "Drop Class 0", widgets)
+        try:
+            mapping = parse_mapping(self.remap_mapping_var.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Mapping", str(e))
+            return
+        widgets = {'run_button': self.run_remap_btn, 'progress_bar': self.remap_progress, 'original_text': 'Run Process'}
+        self.set_processing_state(True, widgets)
+        self.controller.log_frame.log(f"\n{'='*20}\n--- [LAS2LAS] Starting Class Remap ---\n{'='*20}")
+        threading.Thread(target=self._class_remap_thread, args=(list(files), mapping, widgets), daemon=True, name="Class_Remap").start()
+
+    def _class_remap_thread(self, files, mapping, widgets):
+        is_success = False
+        message = ""
+        try:
+            written, failed = remap_batch(files, mapping, log_callback=self.controller.log_frame.log)
+            is_success = True
+            message = f"Class remap complete!\n{len(written)} file(s) saved with the '_remap' suffix."
+            if failed:
+                message += f"\n\n{len(failed)} file(s) could not be remapped. Check the log for details."
+        except Exception as e:
+            message = f"An error occurred during the class remap:\n{e}"
+            self.controller.log_frame.log(f"Error: {e}")
+        finally:
+            self.after(0, self.on_class_remap_complete, is_success, message, widgets)
+
+    def on_class_remap_complete(self, is_success, message, widgets):
+        self.set_processing_state(False, widgets)
+        if is_success:
+            messagebox.showinfo("Success", message)
+        else:
+            messagebox.showerror("Error", message)
 
     # ==================== TAB 3: INFO ====================
     def setup_info_tab(self, parent):
@@ -386,6 +494,10 @@ class Las2lasFrame(BaseToolFrame):
         output_frame = ttk.Labelframe(parent, text="2. Configure Output", padding=10, style="Info.TLabelframe"); output_frame.pack(fill='x', pady=(0, 10)); output_frame.columnconfigure(1, weight=1)
         ttk.Label(output_frame, text="Output File Name (Single Mode Only):").grid(row=0, column=0, sticky='w', padx=(0,10))
         ttk.Entry(output_frame, textvariable=self.output_base_name).grid(row=0, column=1, sticky='ew')
+        ttk.Label(output_frame, text="Output Profile:").grid(row=1, column=0, sticky='w', padx=(0,10), pady=(5,0))
+        profile_combo = ttk.Combobox(output_frame, textvariable=self.convert_profile_var, values=profile_labels(allow_class_filter=False), state="readonly", width=28)
+        profile_combo.grid(row=1, column=1, sticky='w', pady=(5,0))
+        Tooltip(profile_combo, "Full: keeps the source point format and every dimension.\nVisual RGB: point format 2 (no GPS time / extra bytes), 0.01 precision.")
         
         run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe"); run_frame.pack(fill='x'); run_container = ttk.Frame(run_frame); run_container.pack(anchor='w')
         self.convert_btn = ttk.Button(run_container, text="Convert to LAZ", command=self.run_conversion, bootstyle="primary"); self.convert_btn.pack(side='left', padx=(0,10))
@@ -438,6 +550,7 @@ class Las2lasFrame(BaseToolFrame):
             las2las_exe = os.path.join(lastools_path, "las2las.exe")
             if not os.path.exists(las2las_exe): raise FileNotFoundError("las2las.exe not found.")
             is_batch = self.convert_batch_mode.get()
+            profile_args = las2las_profile_args(profile_name_from_label(self.convert_profile_var.get()), allow_class_filter=False)
             for i, file_path_str in enumerate(files_to_process):
                 input_path = Path(file_path_str)
                 self.controller.log_frame.log(f"\n({i+1}/{len(files_to_process)}) Converting: {input_path.name}")
@@ -446,7 +559,7 @@ class Las2lasFrame(BaseToolFrame):
                 else: 
                     output_base = self.output_base_name.get().strip()
                     output_file = input_path.with_name(f"{output_base}.laz") if output_base else input_path.with_suffix(".laz")
-                command = [las2las_exe, "-i", str(input_path), "-o", str(output_file), "-olaz"]
+                command = [las2las_exe, "-i", str(input_path), "-o", str(output_file), *profile_args, "-olaz"]
                 try:
                     _execute_command(command, self.controller.log_frame, f"    Output: {output_file.name}", controller=self.controller, frame_instance=self)
                 except Exception as file_error:
@@ -517,6 +630,9 @@ class Las2lasFrame(BaseToolFrame):
             output_file_path = output_directory / output_file_name
             command = [lasmerge_exe, "-i", *self.merge_files_list, "-o", str(output_file_path), "-olaz"]
             _execute_command(command, self.controller.log_frame, "Merging files...", controller=self.controller, frame_instance=self)
+            sort_curve = self.controller.get_spatial_sort_curve()
+            if sort_curve:
+                spatial_sort_file(str(output_file_path), curve=sort_curve, log_callback=self.controller.log_frame.log)
             is_success = True
         except Exception as e:
             is_success = False
@@ -534,7 +650,96 @@ class Las2lasFrame(BaseToolFrame):
                 messagebox.showerror("Error", f"An error occurred during merge:\n{output_file_name}")
         self.controller.was_terminated = False
 
-    # ==================== TAB 6: RESCALE ====================
+    # ==================== TAB 6: PARQUET EXPORT ====================
+    def setup_parquet_tab(self, parent):
+        parent.columnconfigure(0, weight=1)
+        ttk.Label(parent, text="Streams every file of a folder into Parquet (one row group per chunk) for pandas / DuckDB queries.").pack(anchor='w', pady=(0, 10), fill='x')
+        input_frame = ttk.Labelframe(parent, text="1. Select Input Folder", padding=10, style="Info.TLabelframe"); input_frame.pack(fill='x', pady=(0, 10)); input_frame.columnconfigure(1, weight=1)
+        ttk.Label(input_frame, text="Input Folder:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        ttk.Entry(input_frame, textvariable=self.parquet_folder_path, state="readonly").grid(row=0, column=1, sticky='ew')
+        ttk.Button(input_frame, text="Select Folder...", bootstyle="secondary", command=self.select_parquet_folder).grid(row=0, column=2, padx=(5,0))
+
+        dims_frame = ttk.Labelframe(parent, text="2. Dimensions", padding=10, style="Info.TLabelframe"); dims_frame.pack(fill='x', pady=(0, 10))
+        for i, (d, var) in enumerate(self.parquet_dimension_vars.items()):
+            ttk.Checkbutton(dims_frame, text=d, variable=var).grid(row=i // 5, column=i % 5, sticky='w', padx=(0, 15), pady=2)
+        Tooltip(dims_frame, "Dimensions missing from a file's point format are skipped for that file.")
+
+        part_frame = ttk.Labelframe(parent, text="3. Partitioning", padding=10, style="Info.TLabelframe"); part_frame.pack(fill='x', pady=(0, 10)); part_frame.columnconfigure(1, weight=1)
+        ttk.Label(part_frame, text="Layout:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        part_combo = ttk.Combobox(part_frame, textvariable=self.parquet_partition_var, values=["None", "Split Manifest Tiles", "XY Grid"], state="readonly", width=22); part_combo.grid(row=0, column=1, sticky='w')
+        Tooltip(part_combo, "Partitioned output is written as a hive-style dataset (e.g. tile=3/ or tile_x=.../tile_y=.../) so queries can skip whole folders.")
+        ttk.Label(part_frame, text="Grid Size:").grid(row=1, column=0, sticky='w', padx=(0,10), pady=(5,0))
+        ttk.Entry(part_frame, textvariable=self.parquet_grid_size_var, width=10).grid(row=1, column=1, sticky='w', pady=(5,0))
+        ttk.Label(part_frame, text="Split Manifest:").grid(row=2, column=0, sticky='w', padx=(0,10), pady=(5,0))
+        ttk.Entry(part_frame, textvariable=self.parquet_manifest_path).grid(row=2, column=1, sticky='ew', pady=(5,0))
+        ttk.Button(part_frame, text="Browse...", bootstyle="secondary", command=self.select_parquet_manifest).grid(row=2, column=2, padx=(5,0), pady=(5,0))
+
+        run_frame = ttk.Labelframe(parent, text="4. Run Process", padding=10, style="Info.TLabelframe"); run_frame.pack(fill='x'); run_container = ttk.Frame(run_frame); run_container.pack(anchor='w')
+        self.run_parquet_btn = ttk.Button(run_container, text="Export to Parquet", command=self.run_parquet_export, bootstyle="primary"); self.run_parquet_btn.pack(side='left', padx=(0,10))
+        self.parquet_progress = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary"); self.parquet_progress.pack(side='left')
+
+    def select_parquet_folder(self):
+        directory = filedialog.askdirectory()
+        if directory:
+            files = list_point_cloud_files(directory)
+            self.parquet_files_list = files
+            self.parquet_input_dir = directory if files else ""
+            self.parquet_folder_path.set(f"{len(files)} file(s) found in '{os.path.basename(directory)}'" if files else "No files found")
+            manifest = os.path.join(directory, SPLIT_MANIFEST_NAME)
+            if os.path.isfile(manifest):
+                self.parquet_manifest_path.set(manifest)
+        self._check_all_run_buttons_state()
+
+    def select_parquet_manifest(self):
+        path = filedialog.askopenfilename(filetypes=[("Split Manifest", "*.json"), ("All files", "*.*")])
+        if path: self.parquet_manifest_path.set(path)
+
+    def run_parquet_export(self):
+        if not self.parquet_files_list: return
+        dimensions = [d for d, var in self.parquet_dimension_vars.items() if var.get()]
+        if not dimensions:
+            messagebox.showerror("Invalid Parameter", "Select at least one dimension to export.")
+            return
+        try:
+            layout = self.parquet_partition_var.get()
+            if layout == "XY Grid":
+                partition = grid_partition(float(self.parquet_grid_size_var.get()))
+            elif layout == "Split Manifest Tiles":
+                partition = manifest_partition(read_split_manifest(self.parquet_manifest_path.get()))
+            else:
+                partition = None
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Invalid Parameter", f"Could not set up the partitioning:\n{e}")
+            return
+        output_dir = os.path.join(self.parquet_input_dir, "parquet")
+        widgets = {'run_button': self.run_parquet_btn, 'progress_bar': self.parquet_progress, 'original_text': 'Export to Parquet'}
+        self.set_processing_state(True, widgets)
+        self.controller.log_frame.log(f"\n{'='*20}\n--- [LAS2LAS] Starting Parquet Export ---\n{'='*20}")
+        threading.Thread(target=self._parquet_export_thread, args=(list(self.parquet_files_list), output_dir, dimensions, partition, widgets), daemon=True, name="Parquet_Export").start()
+
+    def _parquet_export_thread(self, files, output_dir, dimensions, partition, widgets):
+        is_success = False
+        message = ""
+        try:
+            written, failed = export_to_parquet(files, output_dir, dimensions=dimensions, partition=partition, log_callback=self.controller.log_frame.log)
+            is_success = True
+            message = f"Parquet export complete!\n{len(written)} file(s) written to: {output_dir}"
+            if failed:
+                message += f"\n\n{len(failed)} file(s) could not be exported. Check the log for details."
+        except Exception as e:
+            message = f"An error occurred during the Parquet export:\n{e}"
+            self.controller.log_frame.log(f"Error: {e}")
+        finally:
+            self.after(0, self.on_parquet_export_complete, is_success, message, widgets)
+
+    def on_parquet_export_complete(self, is_success, message, widgets):
+        self.set_processing_state(False, widgets)
+        if is_success:
+            messagebox.showinfo("Success", message)
+        else:
+            messagebox.showerror("Error", message)
+
+    # ==================== TAB 7: RESCALE ====================
     def setup_rescale_tab(self, parent):
         parent.columnconfigure(0, weight=1)
         ttk.Label(parent, text="Rescale coordinate resolution to fix precision issues.").pack(anchor='w', pady=(0, 10), fill='x')
@@ -592,7 +797,76 @@ class Las2lasFrame(BaseToolFrame):
         widgets = {'run_button': self.run_rescale_btn, 'progress_bar': self.rescale_progress, 'original_text': 'Run Rescale'}
         self._run_batch_process(files, {'output_name': "{stem}_rescaled.laz", 'args': ["-rescale", factor, factor, factor]}, "Rescale", widgets)
 
-    # ==================== TAB 7: VIEW ====================
+    # ==================== TAB 8: TILE INDEX ====================
+    def setup_tile_index_tab(self, parent):
+        parent.columnconfigure(0, weight=1)
+        ttk.Label(parent, text="Builds a footprint layer with point count, density, class counts and CRS for every tile.").pack(anchor='w', pady=(0, 10), fill='x')
+        input_frame = ttk.Labelframe(parent, text="1. Select Input Folder", padding=10, style="Info.TLabelframe"); input_frame.pack(fill='x', pady=(0, 10)); input_frame.columnconfigure(1, weight=1)
+        ttk.Label(input_frame, text="Input Folder:").grid(row=0, column=0, sticky='w', padx=(0,10))
+        ttk.Entry(input_frame, textvariable=self.index_folder_path, state="readonly").grid(row=0, column=1, sticky='ew')
+        ttk.Button(input_frame, text="Select Folder...", bootstyle="secondary", command=self.select_index_folder).grid(row=0, column=2, padx=(5,0))
+
+        params_frame = ttk.Labelframe(parent, text="2. Parameters", padding=10, style="Info.TLabelframe"); params_frame.pack(fill='x', pady=(0, 10))
+        ttk.Label(params_frame, text="Output Format:").pack(side="left", padx=(0, 10))
+        ttk.Combobox(params_frame, textvariable=self.index_format_var, values=["GeoPackage (.gpkg)", "Shapefile (.shp)"], state="readonly", width=20).pack(side="left", padx=(0, 20))
+        ttk.Label(params_frame, text="Grid Cell Size:").pack(side="left", padx=(0, 10))
+        cell_entry = ttk.Entry(params_frame, textvariable=self.index_cell_size_var, width=10); cell_entry.pack(side="left")
+        Tooltip(cell_entry, "Size of the coarse occupancy grid cells used to trace each footprint (in file units).")
+
+        run_frame = ttk.Labelframe(parent, text="3. Run Process", padding=10, style="Info.TLabelframe"); run_frame.pack(fill='x'); run_container = ttk.Frame(run_frame); run_container.pack(anchor='w')
+        self.run_index_btn = ttk.Button(run_container, text="Build Tile Index", command=self.run_tile_index, bootstyle="primary"); self.run_index_btn.pack(side='left', padx=(0,10))
+        self.index_progress = ttk.Progressbar(run_container, orient="horizontal", length=300, mode="determinate", bootstyle="primary"); self.index_progress.pack(side='left')
+
+    def select_index_folder(self):
+        directory = filedialog.askdirectory()
+        if directory:
+            files = list_point_cloud_files(directory)
+            if files:
+                self.index_files_list = files
+                self.index_folder_path.set(f"{len(files)} file(s) found in '{os.path.basename(directory)}'")
+            else:
+                self.index_files_list = []
+                self.index_folder_path.set("No files found")
+        self._check_all_run_buttons_state()
+
+    def run_tile_index(self):
+        if not self.index_files_list: return
+        try:
+            cell_size = float(self.index_cell_size_var.get())
+            if cell_size <= 0: raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Parameter", "Grid Cell Size must be a positive number.")
+            return
+        extension = ".shp" if self.index_format_var.get().startswith("Shapefile") else ".gpkg"
+        output_path = os.path.join(os.path.dirname(self.index_files_list[0]), f"tile_index{extension}")
+        widgets = {'run_button': self.run_index_btn, 'progress_bar': self.index_progress, 'original_text': 'Build Tile Index'}
+        self.set_processing_state(True, widgets)
+        self.controller.log_frame.log(f"\n{'='*20}\n--- [LAS2LAS] Starting Tile Index ---\n{'='*20}")
+        threading.Thread(target=self._tile_index_thread, args=(list(self.index_files_list), output_path, cell_size, widgets), daemon=True, name="Tile_Index").start()
+
+    def _tile_index_thread(self, files, output_path, cell_size, widgets):
+        is_success = False
+        message = ""
+        try:
+            _, failed = build_tile_index(files, output_path, cell_size=cell_size, log_callback=self.controller.log_frame.log)
+            is_success = True
+            message = f"Tile index created!\nOutput: {os.path.basename(output_path)}"
+            if failed:
+                message += f"\n\n{len(failed)} file(s) could not be indexed. Check the log for details."
+        except Exception as e:
+            message = f"An error occurred while building the tile index:\n{e}"
+            self.controller.log_frame.log(f"Error: {e}")
+        finally:
+            self.after(0, self.on_tile_index_complete, is_success, message, widgets)
+
+    def on_tile_index_complete(self, is_success, message, widgets):
+        self.set_processing_state(False, widgets)
+        if is_success:
+            messagebox.showinfo("Success", message)
+        else:
+            messagebox.showerror("Error", message)
+
+    # ==================== TAB 9: VIEW ====================
     def setup_view_tab(self, parent):
         parent.columnconfigure(0, weight=1)
         ttk.Label(parent, text="Launches the 3D viewer (lasview).").pack(anchor='w', pady=(0, 15))
@@ -608,6 +882,60 @@ class Las2lasFrame(BaseToolFrame):
         self.run_view_btn = ttk.Button(parent, text="Launch Viewer", command=self.run_lasview, bootstyle="success", state="disabled")
         self.run_view_btn.pack(anchor="w", pady=10)
 
+        ept_frame = ttk.Labelframe(parent, text="2. Build LOD Octree (EPT)", padding=10, style="Info.TLabelframe")
+        ept_frame.pack(fill='x', pady=(10, 0))
+        ttk.Label(ept_frame, text="Builds a multi-resolution Entwine Point Tile octree that web viewers (Potree, QGIS, plas.io) stream level by level.").pack(anchor='w', pady=(0, 10), fill='x')
+        ept_container = ttk.Frame(ept_frame); ept_container.pack(anchor='w')
+        self.run_ept_file_btn = ttk.Button(ept_container, text="Build from Selected File", command=self.run_ept_from_file, bootstyle="primary", state="disabled"); self.run_ept_file_btn.pack(side='left', padx=(0, 10))
+        Tooltip(self.run_ept_file_btn, "Writes '<file name>_ept' next to the selected file.")
+        self.run_ept_folder_btn = ttk.Button(ept_container, text="Build from Folder...", command=self.run_ept_from_folder, bootstyle="primary-outline"); self.run_ept_folder_btn.pack(side='left', padx=(0, 10))
+        Tooltip(self.run_ept_folder_btn, "Combines every tile of a folder into one octree written to '<folder>/ept'. All tiles must share the same point format.")
+        self.ept_progress = ttk.Progressbar(ept_container, orient="horizontal", length=200, mode="determinate", bootstyle="primary"); self.ept_progress.pack(side='left')
+
+    def run_ept_from_file(self):
+        file_path = self.view_file_path.get()
+        if not os.path.isfile(file_path): return
+        output_dir = os.path.join(os.path.dirname(file_path), f"{Path(file_path).stem}_ept")
+        self._start_ept_build([file_path], output_dir)
+
+    def run_ept_from_folder(self):
+        directory = filedialog.askdirectory()
+        if not directory: return
+        files = list_point_cloud_files(directory)
+        if not files:
+            messagebox.showwarning("No Files Found", "The selected folder does not contain any .las or .laz files.")
+            return
+        self._start_ept_build(files, os.path.join(directory, "ept"))
+
+    def _start_ept_build(self, files, output_dir):
+        if os.path.exists(os.path.join(output_dir, "ept.json")):
+            if not messagebox.askyesno("Overwrite?", f"An octree already exists in:\n{output_dir}\n\nReplace it?"): return
+        widgets = {'run_button': self.run_ept_file_btn if len(files) == 1 else self.run_ept_folder_btn, 'progress_bar': self.ept_progress,
+                   'original_text': 'Build from Selected File' if len(files) == 1 else 'Build from Folder...'}
+        self.set_processing_state(True, widgets)
+        self.controller.log_frame.log(f"\n{'='*20}\n--- [LAS2LAS] Starting EPT Octree Build ---\n{'='*20}")
+        threading.Thread(target=self._ept_thread, args=(files, output_dir, widgets), daemon=True, name="EPT_Build").start()
+
+    def _ept_thread(self, files, output_dir, widgets):
+        is_success = False
+        message = ""
+        try:
+            build_ept(files, output_dir, scratch_dir=self.controller.scratch_dir_var.get() or None, log_callback=self.controller.log_frame.log)
+            is_success = True
+            message = f"EPT octree created!\nOutput: {output_dir}"
+        except Exception as e:
+            message = f"An error occurred while building the octree:\n{e}"
+            self.controller.log_frame.log(f"Error: {e}")
+        finally:
+            self.after(0, self.on_ept_complete, is_success, message, widgets)
+
+    def on_ept_complete(self, is_success, message, widgets):
+        self.set_processing_state(False, widgets)
+        if is_success:
+            messagebox.showinfo("Success", message)
+        else:
+            messagebox.showerror("Error", message)
+
     def run_lasview(self):
         file_path = self.view_file_path.get()
         if not file_path: return
@@ -6,7 +6,7 @@ import os
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
 # Import the logic function directly from the internal module
-from modules.smrf_logic import run_smrf_workflow
+from modules.smrf_logic import run_smrf_workflow, run_smrf_one_pass, run_smrf_zones, run_smrf_batch
 
 class LocalSMRFFrame(BaseToolFrame):
     def __init__(self, parent, controller):
@@ -22,6 +22,8 @@ class LocalSMRFFrame(BaseToolFrame):
         self.threshold_var = tk.StringVar(value="0.1")
         self.cell_var = tk.StringVar(value="1.0")
         self.window_var = tk.StringVar(value="9")
+        self.one_pass_var = tk.BooleanVar(value=True)
+        self.zones_var = tk.BooleanVar(value=False)
         
         self.create_widgets()
 
@@ -49,13 +51,13 @@ class LocalSMRFFrame(BaseToolFrame):
         cloud_btn.grid(row=0, column=1, padx=(5, 0))
         
         # Input Polygon
-        ttk.Label(io_settings, text="Input Polygon (.shp):").grid(row=1, column=0, sticky="w", padx=5, pady=(10, 5))
+        ttk.Label(io_settings, text="Input Polygon(s) (.shp):").grid(row=1, column=0, sticky="w", padx=5, pady=(10, 5))
         poly_frame = ttk.Frame(io_settings)
         poly_frame.grid(row=1, column=1, sticky="ew", pady=(10, 0))
         poly_frame.columnconfigure(0, weight=1)
         poly_entry = ttk.Entry(poly_frame, textvariable=self.input_polygon_var)
         poly_entry.grid(row=0, column=0, sticky="ew", padx=(0, 5))
-        Tooltip(poly_entry, "Select the input shapefile polygon for clipping and classification.")
+        Tooltip(poly_entry, "Select the input shapefile polygon for clipping and classification.\nSelect several polygons (separated by ';') to process them as parallel, independent runs.")
         poly_btn = ttk.Button(poly_frame, text="Browse...", command=self.browse_polygon, bootstyle="secondary")
         poly_btn.grid(row=0, column=1, padx=(5, 0))
 
@@ -84,6 +86,14 @@ class LocalSMRFFrame(BaseToolFrame):
         window_entry.grid(row=1, column=3, sticky="ew", padx=5, pady=5)
         Tooltip(window_entry, "SMRF Window Size (e.g., 9 or 145)")
 
+        one_pass_toggle = ttk.Checkbutton(smrf_settings, text="One-pass mode", variable=self.one_pass_var, bootstyle="round-toggle")
+        one_pass_toggle.grid(row=2, column=0, columnspan=4, sticky="w", padx=5, pady=(10, 5))
+        Tooltip(one_pass_toggle, "Read the cloud once, split it against the polygon in memory and run SMRF only on the buffered subset.\nSkips the pdal_wrench boundary/clip passes and keeps the original point order.\nUncheck to use the classic clip / boundary / merge workflow.")
+
+        zones_toggle = ttk.Checkbutton(smrf_settings, text="Per-zone parameters from polygon attributes", variable=self.zones_var, bootstyle="round-toggle")
+        zones_toggle.grid(row=3, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+        Tooltip(zones_toggle, "Treat every polygon feature as its own zone. Columns named SLOPE, THRESHOLD, CELL or WINDOW\noverride the values above for that zone (empty cells keep them).\nZones are classified in parallel and stitched into one output in a single write (always one-pass).")
+
         # --- 3. Run Process ---
         run_frame = ttk.Labelframe(self.content_frame, text="3. Run Process", padding=10, style="Info.TLabelframe")
         run_frame.grid(row=2, column=0, sticky="ew", pady=10)
@@ -115,9 +125,12 @@ class LocalSMRFFrame(BaseToolFrame):
             self.input_cloud_var.set(path)
 
     def browse_polygon(self):
-        path = filedialog.askopenfilename(filetypes=[("Shapefiles", "*.shp"), ("All files", "*.*")])
-        if path:
-            self.input_polygon_var.set(path)
+        paths = filedialog.askopenfilenames(filetypes=[("Shapefiles", "*.shp"), ("All files", "*.*")])
+        if paths:
+            self.input_polygon_var.set(";".join(paths))
+
+    def _polygon_paths(self):
+        return [p.strip() for p in self.input_polygon_var.get().split(";") if p.strip()]
 
     def reset_ui(self):
         self.input_cloud_var.set("")
@@ -126,13 +139,16 @@ class LocalSMRFFrame(BaseToolFrame):
         self.threshold_var.set("0.1")
         self.cell_var.set("1.0")
         self.window_var.set("9")
+        self.one_pass_var.set(True)
+        self.zones_var.set(False)
         self.controller.log_frame.log("Local SMRF tool has been reset.")
         self._check_run_button_state()
 
     def _check_run_button_state(self, *args):
         if self.is_processing:
             return
-        files_ok = os.path.isfile(self.input_cloud_var.get()) and os.path.isfile(self.input_polygon_var.get())
+        polygons = self._polygon_paths()
+        files_ok = os.path.isfile(self.input_cloud_var.get()) and bool(polygons) and all(os.path.isfile(p) for p in polygons)
         self.run_button.config(state="normal" if files_ok else "disabled")
 
     def set_processing_state(self, is_processing):
@@ -184,7 +200,7 @@ class LocalSMRFFrame(BaseToolFrame):
         try:
             # --- 1. Get all inputs ---
             input_cloud = self.input_cloud_var.get()
-            input_polygon = self.input_polygon_var.get()
+            polygons = self._polygon_paths()
             
             slope = float(self.slope_var.get())
             threshold = float(self.threshold_var.get())
@@ -195,13 +211,59 @@ class LocalSMRFFrame(BaseToolFrame):
             pdal_exe = self.controller.pdal_path_var.get() or "pdal"
             pdal_wrench_exe = self.controller.pdal_wrench_path_var.get() or "pdal_wrench"
             
-            # --- 2. Run the imported workflow ---
+            # --- 2. Several polygons: independent runs in their own workspaces, in parallel ---
+            if len(polygons) > 1:
+                cloud_base, cloud_ext = os.path.splitext(input_cloud)
+                jobs = [{
+                    "input_cloud": input_cloud, "input_polygon": polygon,
+                    "slope": slope, "threshold": threshold, "cell": cell, "window": window,
+                    "output_path": f"{cloud_base}_{os.path.splitext(os.path.basename(polygon))[0]}_SMRF{cloud_ext}",
+                    "zones": self.zones_var.get(),
+                } for polygon in polygons]
+                outputs, failed = run_smrf_batch(
+                    jobs, pdal_exe, pdal_wrench_exe,
+                    one_pass=self.one_pass_var.get(),
+                    store_factory=self.controller.create_intermediate_store,
+                    sort_curve=self.controller.get_spatial_sort_curve(),
+                    log_callback=self.controller.log_frame.log,
+                    engine=self.controller.get_smrf_engine()
+                )
+                if failed:
+                    raise RuntimeError(f"{len(failed)} of {len(jobs)} runs failed: " + ", ".join(os.path.basename(job["input_polygon"]) for job, _ in failed))
+                is_success = True
+                message = f"Local SMRF processing complete!\n{len(outputs)} outputs written next to {os.path.basename(input_cloud)}."
+                return
+
+            # --- 3. Run the imported workflow ---
             # We pass the controller's log function as the callback so the logic can print to the GUI
-            final_output = run_smrf_workflow(
-                input_cloud, input_polygon, slope, threshold, cell, window,
-                pdal_exe, pdal_wrench_exe,
-                log_callback=self.controller.log_frame.log
-            )
+            input_polygon = polygons[0]
+            if self.zones_var.get():
+                final_output = run_smrf_zones(
+                    input_cloud, input_polygon, slope, threshold, cell, window,
+                    pdal_exe,
+                    log_callback=self.controller.log_frame.log,
+                    sort_curve=self.controller.get_spatial_sort_curve(),
+                    store=self.controller.create_intermediate_store(),
+                    engine=self.controller.get_smrf_engine()
+                )
+            elif self.one_pass_var.get():
+                final_output = run_smrf_one_pass(
+                    input_cloud, input_polygon, slope, threshold, cell, window,
+                    pdal_exe,
+                    log_callback=self.controller.log_frame.log,
+                    sort_curve=self.controller.get_spatial_sort_curve(),
+                    store=self.controller.create_intermediate_store(),
+                    engine=self.controller.get_smrf_engine()
+                )
+            else:
+                final_output = run_smrf_workflow(
+                    input_cloud, input_polygon, slope, threshold, cell, window,
+                    pdal_exe, pdal_wrench_exe,
+                    log_callback=self.controller.log_frame.log,
+                    sort_curve=self.controller.get_spatial_sort_curve(),
+                    store=self.controller.create_intermediate_store(),
+                    engine=self.controller.get_smrf_engine()
+                )
             
             is_success = True
             message = f"Local SMRF processing complete!\nOutput: {os.path.basename(final_output)}"
@@ -0,0 +1,195 @@
+import os
+import math
+import shutil
+import tempfile
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from utils.common import log_message, key_from_label, require_scipy
+from utils.las_io import iter_chunks, open_las, process_pool, require_laspy, DEFAULT_CHUNK_SIZE
+
+# Graceful import for NumPy / SciPy
+try:
+    import numpy as np
+    from scipy.spatial import cKDTree
+except ImportError:
+    np = None
+    cKDTree = None
+
+DENOISE_MODES = {
+    "z_range": "Z range only",
+    "statistical": "Z range + Statistical outliers",
+    "radius": "Z range + Radius outliers",
+}
+NOISE_ACTIONS = {
+    "classify": "Classify as Noise (7)",
+    "drop": "Drop noise points",
+}
+NOISE_CLASS = 7
+# Same defaults as PDAL's filters.outlier
+DEFAULT_MEAN_K = 8
+DEFAULT_MULTIPLIER = 2.0
+DEFAULT_RADIUS = 1.0
+DEFAULT_MIN_K = 2
+
+_SPILL_DTYPE = np.dtype([('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('index', '<i8'), ('core', '?')]) if np is not None else None
+
+def denoise_mode_from_label(label):
+    """Maps a UI label back to its mode key."""
+    return key_from_label(DENOISE_MODES, label, "z_range")
+
+def noise_action_from_label(label):
+    """Maps a UI label back to its action key."""
+    return key_from_label(NOISE_ACTIONS, label, "classify")
+
+def _spill_tiles(input_path, work_dir, x0, y0, tile, buffer, tiles_x, tiles_y, chunk_size):
+    """
+    Streams the cloud once and appends every point to the scratch file of its tile, and to the files of
+    the neighbouring tiles whose buffer it falls in (flagged as non-core there). Returns the tile files.
+    """
+    files = set()
+    start = 0
+    for points in iter_chunks(input_path, chunk_size):
+        x, y, z = (np.asarray(getattr(points, d), dtype=np.float64) for d in ("x", "y", "z"))
+        index = np.arange(start, start + len(x), dtype=np.int64)
+        start += len(x)
+        ix = np.clip(((x - x0) // tile).astype(np.int64), 0, tiles_x - 1)
+        iy = np.clip(((y - y0) // tile).astype(np.int64), 0, tiles_y - 1)
+        fx, fy = x - (x0 + ix * tile), y - (y0 + iy * tile)
+        # The tile is at least twice the buffer, so only the 8 direct neighbours can need a point
+        near = {-1: fx < buffer, 0: np.ones(len(x), dtype=bool), 1: fx >= tile - buffer}
+        near_y = {-1: fy < buffer, 0: near[0], 1: fy >= tile - buffer}
+        tile_ids, rows, cores = [], [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                tx, ty = ix + dx, iy + dy
+                mask = near[dx] & near_y[dy] & (tx >= 0) & (tx < tiles_x) & (ty >= 0) & (ty < tiles_y)
+                picked = np.nonzero(mask)[0]
+                tile_ids.append(ty[picked] * tiles_x + tx[picked])
+                rows.append(picked)
+                cores.append(np.full(len(picked), dx == 0 and dy == 0))
+        tile_ids, rows, cores = np.concatenate(tile_ids), np.concatenate(rows), np.concatenate(cores)
+        order = np.argsort(tile_ids, kind='stable')
+        tile_ids, rows, cores = tile_ids[order], rows[order], cores[order]
+        bounds = np.concatenate(([0], np.nonzero(np.diff(tile_ids))[0] + 1, [len(tile_ids)]))
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            if lo == hi:
+                continue
+            records = np.empty(hi - lo, dtype=_SPILL_DTYPE)
+            picked = rows[lo:hi]
+            records['x'], records['y'], records['z'] = x[picked], y[picked], z[picked]
+            records['index'], records['core'] = index[picked], cores[lo:hi]
+            path = os.path.join(work_dir, f"tile_{int(tile_ids[lo])}.bin")
+            with open(path, 'ab') as f:
+                records.tofile(f)
+            files.add(path)
+    return sorted(files)
+
+def _score_tile(args):
+    """
+    Scores the core points of one buffered tile into the shared score file: the mean distance to the
+    'mean_k' nearest neighbours (statistical) or the neighbour count within 'radius' (radius).
+    Returns the number, sum and sum of squares of the scores for the global statistics.
+    """
+    path, scores_path, point_count, method, mean_k, radius = args
+    records = np.fromfile(path, dtype=_SPILL_DTYPE)
+    core = records['core']
+    if not core.any():
+        return 0, 0.0, 0.0
+    xyz = np.column_stack((records['x'], records['y'], records['z']))
+    tree = cKDTree(xyz)
+    if method == "statistical":
+        k = min(mean_k + 1, len(xyz))
+        distances, _ = tree.query(xyz[core], k=k)
+        # The first neighbour is the point itself
+        values = distances[:, 1:].mean(axis=1) if k > 1 else np.zeros(int(core.sum()))
+    else:
+        values = tree.query_ball_point(xyz[core], r=radius, return_length=True) - 1
+    scores = np.memmap(scores_path, dtype=np.float32, mode='r+', shape=(point_count,))
+    scores[records['index'][core]] = values
+    scores.flush()
+    del scores
+    values = values.astype(np.float64)
+    return len(values), float(values.sum()), float((values ** 2).sum())
+
+def filter_outliers(input_path, output_path, method="statistical", mean_k=DEFAULT_MEAN_K, multiplier=DEFAULT_MULTIPLIER,
+                    radius=DEFAULT_RADIUS, min_k=DEFAULT_MIN_K, action="classify", buffer=None, tile_points=DEFAULT_CHUNK_SIZE,
+                    work_dir=None, max_workers=None, log_callback=None):
+    """
+    Statistical or radius outlier removal (like PDAL's filters.outlier) with memory bounded by the tile size.
+    The cloud is split into XY tiles of about 'tile_points' points, each spilled to scratch with a buffer
+    of neighbouring points so tile edges see their full neighbourhood; tiles are scored by cKDTree in
+    worker processes. Statistical: noise when the mean k-NN distance exceeds mean + multiplier * std of
+    all points. Radius: noise when fewer than 'min_k' neighbours lie within 'radius'.
+    Noise is set to class 7 or dropped ('action'). Returns (points written, noise points).
+    """
+    require_laspy()
+    require_scipy("the outlier filter")
+    with open_las(input_path) as reader:
+        header = reader.header
+        point_count = int(header.point_count)
+        (min_x, min_y, _), (max_x, max_y, _) = header.mins, header.maxs
+    if point_count == 0:
+        raise ValueError(f"'{os.path.basename(input_path)}' contains no points.")
+
+    area = max((max_x - min_x) * (max_y - min_y), 1e-9)
+    spacing = math.sqrt(area / point_count)
+    if buffer is None:
+        buffer = radius if method == "radius" else 3 * spacing * math.sqrt(mean_k)
+    tile = max(math.sqrt(area * tile_points / point_count), 2 * buffer, spacing)
+    tiles_x = max(1, int(math.ceil((max_x - min_x) / tile)))
+    tiles_y = max(1, int(math.ceil((max_y - min_y) / tile)))
+
+    work_dir = tempfile.mkdtemp(prefix="outliers_", dir=work_dir)
+    try:
+        log_message(log_callback, f"Outlier filter ({method}): {tiles_x * tiles_y} tile(s) of {tile:.1f} units with a {buffer:.2f} unit buffer.")
+        tile_files = _spill_tiles(input_path, work_dir, min_x, min_y, tile, buffer, tiles_x, tiles_y, DEFAULT_CHUNK_SIZE)
+        scores_path = os.path.join(work_dir, "scores.f4")
+        np.memmap(scores_path, dtype=np.float32, mode='w+', shape=(point_count,)).flush()
+
+        count, total, total_sq = 0, 0.0, 0.0
+        max_workers = max_workers or os.cpu_count() or 1
+        with process_pool(max_workers) as executor:
+            # A few tiles in flight at a time keep the memory bounded regardless of the file size
+            pending = set()
+            for path in tile_files:
+                pending.add(executor.submit(_score_tile, (path, scores_path, point_count, method, mean_k, radius)))
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        n, s, sq = future.result()
+                        count, total, total_sq = count + n, total + s, total_sq + sq
+            for future in pending:
+                n, s, sq = future.result()
+                count, total, total_sq = count + n, total + s, total_sq + sq
+
+        if method == "statistical":
+            mean = total / count
+            std = math.sqrt(max(total_sq / count - mean ** 2, 0.0))
+            threshold = mean + multiplier * std
+            log_message(log_callback, f"Mean k-NN distance {mean:.3f} (std {std:.3f}); noise above {threshold:.3f}.")
+            is_noise = lambda values: values > threshold
+        else:
+            is_noise = lambda values: values < min_k
+
+        scores = np.memmap(scores_path, dtype=np.float32, mode='r', shape=(point_count,))
+        written = noise_total = 0
+        start = 0
+        with open_las(output_path, mode='w', header=header) as writer:
+            for points in iter_chunks(input_path, DEFAULT_CHUNK_SIZE):
+                noise = is_noise(scores[start:start + len(points)])
+                start += len(points)
+                noise_total += int(noise.sum())
+                if action == "drop":
+                    points = points[np.nonzero(~noise)[0]]
+                elif noise.any():
+                    classes = np.asarray(points.classification).copy()
+                    classes[noise] = NOISE_CLASS
+                    points.classification = classes
+                if len(points):
+                    writer.write_points(points)
+                    written += len(points)
+        del scores
+        log_message(log_callback, f"Outlier filter: {noise_total:,} of {point_count:,} points flagged as noise ({'dropped' if action == 'drop' else 'class 7'}).")
+        return written, noise_total
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
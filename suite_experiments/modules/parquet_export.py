@@ -0,0 +1,155 @@
+import os
+import json
+from concurrent.futures import as_completed
+
+from utils.common import log_message
+from utils.las_io import iter_chunks, open_las, parse_crs_or_none, require_laspy, process_pool, DEFAULT_CHUNK_SIZE
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Graceful import for PyArrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_DIMENSIONS = (
+    "x", "y", "z", "intensity", "return_number", "number_of_returns", "classification",
+    "scan_angle_rank", "scan_angle", "user_data", "point_source_id", "gps_time", "red", "green", "blue",
+)
+DEFAULT_DIMENSIONS = ("x", "y", "z", "intensity", "classification", "return_number", "gps_time")
+PARTITION_MODES = ("none", "manifest", "grid")
+
+def require_pyarrow():
+    """Raises a readable error when the Parquet writer is unavailable."""
+    if pa is None:
+        raise ImportError("PyArrow is not installed. Please run 'pip install pyarrow' to use this tool.")
+
+def manifest_partition(manifest):
+    """Builds a partition spec that assigns every point to the split tile whose core range contains it."""
+    tiles = sorted(manifest["tiles"], key=lambda t: t["min"])
+    return {
+        "mode": "manifest",
+        "axis": manifest["axis"].lower(),
+        "edges": [t["max"] for t in tiles[:-1]],
+        "tiles": [int(t["tile"]) for t in tiles],
+    }
+
+def grid_partition(grid_size):
+    """Builds a partition spec that buckets points into square XY cells of 'grid_size' file units."""
+    if grid_size <= 0:
+        raise ValueError("The partition grid size must be a positive number.")
+    return {"mode": "grid", "size": float(grid_size)}
+
+def _partition_groups(points, partition):
+    """Yields (hive directory, row mask) pairs for one chunk of points."""
+    if not partition or partition["mode"] == "none":
+        yield "", None
+        return
+
+    if partition["mode"] == "manifest":
+        coords = np.asarray(points.y if partition["axis"] == "y" else points.x)
+        tile_idx = np.searchsorted(np.asarray(partition["edges"], dtype=np.float64), coords, side='right')
+        for idx in np.unique(tile_idx):
+            yield f"tile={partition['tiles'][idx]}", tile_idx == idx
+        return
+
+    size = partition["size"]
+    cell_x = np.floor(np.asarray(points.x) / size).astype(np.int64)
+    cell_y = np.floor(np.asarray(points.y) / size).astype(np.int64)
+    cells, inverse = np.unique(np.stack([cell_x, cell_y], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    for i, (cx, cy) in enumerate(cells):
+        yield f"tile_x={_cell_origin(cx, size)}/tile_y={_cell_origin(cy, size)}", inverse == i
+
+def _cell_origin(cell, size):
+    """Formats a grid cell's lower coordinate without truncating it ('1000', '2.5'), so non-integer sizes keep one directory per cell."""
+    return np.format_float_positional(round(float(cell) * size, 9), trim='-')
+
+def _las_metadata(header):
+    """Returns the Parquet key/value metadata that keeps the LAS scale, offset and CRS."""
+    metadata = {
+        "las_scales": json.dumps([float(v) for v in header.scales]),
+        "las_offsets": json.dumps([float(v) for v in header.offsets]),
+        "las_point_format": str(header.point_format.id),
+    }
+    crs = parse_crs_or_none(header)
+    if crs is not None:
+        metadata["crs"] = crs.to_wkt()
+    return metadata
+
+def export_file_to_parquet(laz_path, output_dir, dimensions=DEFAULT_DIMENSIONS, partition=None, chunk_size=DEFAULT_CHUNK_SIZE, compression="zstd"):
+    """
+    Streams one LAS/LAZ file into Parquet, writing one row group per chunk (and partition).
+    Unpartitioned output goes to '<output_dir>/<stem>.parquet'; partitioned output uses a
+    hive-style layout such as '<output_dir>/tile=3/<stem>.parquet'.
+    """
+    require_laspy()
+    require_pyarrow()
+    stem = os.path.splitext(os.path.basename(laz_path))[0]
+
+    with open_las(laz_path) as reader:
+        header = reader.header
+    available = set(header.point_format.dimension_names) | {"x", "y", "z"}
+    columns = [d for d in dimensions if d in available]
+    if not columns:
+        raise ValueError(f"None of the selected dimensions exist in '{os.path.basename(laz_path)}'.")
+    metadata = _las_metadata(header)
+
+    writers = {}
+    total_rows = 0
+    try:
+        for points in iter_chunks(laz_path, chunk_size):
+            arrays = {d: np.asarray(getattr(points, d)) if d in ("x", "y", "z") else np.asarray(points[d]) for d in columns}
+            for partition_dir, mask in _partition_groups(points, partition):
+                table = pa.table({d: arr if mask is None else arr[mask] for d, arr in arrays.items()})
+                if partition_dir not in writers:
+                    out_path = os.path.join(output_dir, partition_dir, f"{stem}.parquet")
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    schema = table.schema.with_metadata(metadata)
+                    writers[partition_dir] = pq.ParquetWriter(out_path, schema, compression=compression)
+                writers[partition_dir].write_table(table.replace_schema_metadata(metadata), row_group_size=max(1, table.num_rows))
+                total_rows += table.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    written = sorted(os.path.join(output_dir, partition_dir, f"{stem}.parquet") for partition_dir in writers)
+    return total_rows, written
+
+def export_to_parquet(input_files, output_dir, dimensions=DEFAULT_DIMENSIONS, partition=None, max_workers=None, log_callback=None):
+    """
+    Exports LAS/LAZ files to a Parquet dataset folder, one file per worker process at a time.
+    Returns the list of written Parquet files and the list of inputs that failed.
+    """
+    require_laspy()
+    require_pyarrow()
+    os.makedirs(output_dir, exist_ok=True)
+
+    total_files = len(input_files)
+    log_message(log_callback, f"--- Exporting {total_files} file(s) to Parquet ({', '.join(dimensions)}) ---")
+
+    written, failed = [], []
+    with process_pool(max_workers) as executor:
+        futures = {executor.submit(export_file_to_parquet, path, output_dir, tuple(dimensions), partition): path for path in input_files}
+        for i, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                rows, files = future.result()
+                written.extend(files)
+                log_message(log_callback, f"({i}/{total_files}) Exported: {os.path.basename(path)} ({rows:,} rows, {len(files)} part file(s))")
+            except Exception as e:
+                failed.append(path)
+                log_message(log_callback, f"({i}/{total_files}) [!] Failed to export {os.path.basename(path)}: {e}")
+
+    if not written:
+        raise RuntimeError("None of the input files could be exported.")
+
+    log_message(log_callback, f"Parquet export complete. {len(written)} file(s) written to: {output_dir}")
+    return sorted(written), failed
@@ -0,0 +1,214 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.common import log_message, key_from_label
+from utils.las_io import open_las, iter_chunks, parse_crs_or_none, require_laspy, DEFAULT_CHUNK_SIZE
+from utils.class_deltas import ClassDeltas, sidecar_path, load_sidecar, record_changes
+
+# Graceful import for GeoPandas / Shapely
+try:
+    import geopandas as gpd
+    import shapely
+except ImportError:
+    gpd = None
+    shapely = None
+
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+RECLASS_ENGINES = {
+    "strtree": "In-process (STRtree)",
+    "pdal": "PDAL filters.overlay",
+}
+
+def reclass_engine_from_label(label):
+    """Maps a UI label back to its engine key."""
+    return key_from_label(RECLASS_ENGINES, label, "strtree")
+
+class PolygonClassIndex:
+    """
+    The polygons of a reclassification layer and their target class, indexed by a shapely STRtree.
+    Built once and shared (read-only) by every file of a batch. Like filters.overlay, a point
+    covered by several polygons takes the class of the last one in the layer.
+    """
+    def __init__(self, geometries, classes, crs=None):
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.classes = np.asarray(classes, dtype=np.uint8)
+        self.crs = crs
+        self.tree = shapely.STRtree(self.geometries)
+        self.bounds = shapely.total_bounds(self.geometries)
+
+    @classmethod
+    def from_file(cls, shp_file, column="Class", log_callback=None):
+        if gpd is None or shapely is None:
+            raise ImportError("GeoPandas / Shapely are not installed. Please run 'pip install geopandas shapely' to use this tool.")
+        gdf = gpd.read_file(shp_file)
+        columns = {c.lower(): c for c in gdf.columns}
+        if column.lower() not in columns:
+            raise ValueError(f"'{os.path.basename(shp_file)}' has no '{column}' column.")
+        values = gdf[columns[column.lower()]]
+        keep = gdf.geometry.notna() & ~gdf.geometry.is_empty & values.notna()
+        gdf, values = gdf[keep], values[keep].astype(int)
+        if gdf.empty:
+            raise ValueError(f"'{os.path.basename(shp_file)}' contains no polygons with a '{column}' value.")
+        if ((values < 0) | (values > 255)).any():
+            raise ValueError(f"'{column}' values must be classification codes between 0 and 255.")
+        log_message(log_callback, f"Indexed {len(gdf)} polygon(s) from {os.path.basename(shp_file)}.")
+        return cls(gdf.geometry.values, values.to_numpy(), crs=gdf.crs)
+
+    def reprojected(self, crs, log_callback=None):
+        """Returns an index in 'crs' (self when the layer already matches or either CRS is unknown)."""
+        if crs is None or self.crs is None or self.crs == crs:
+            return self
+        log_message(log_callback, "Reprojecting polygons to match point cloud CRS...")
+        geometries = gpd.GeoSeries(self.geometries, crs=self.crs).to_crs(crs).values
+        return PolygonClassIndex(geometries, self.classes, crs=crs)
+
+    def lookup(self, x, y):
+        """Returns (point indices, new classes) for the points of (x, y) that fall inside a polygon."""
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        min_x, min_y, max_x, max_y = self.bounds
+        candidates = np.nonzero((x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))[0]
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.uint8)
+        point_index, polygon_index = self.tree.query(shapely.points(x[candidates], y[candidates]), predicate="intersects")
+        if not len(point_index):
+            return point_index, np.empty(0, dtype=np.uint8)
+        # Last polygon wins: sort the hits by point, then polygon, and keep each point's final hit
+        order = np.lexsort((polygon_index, point_index))
+        point_index, polygon_index = point_index[order], polygon_index[order]
+        last = np.append(point_index[1:] != point_index[:-1], True)
+        return candidates[point_index[last]], self.classes[polygon_index[last]]
+
+def _changed(points, index):
+    """Returns the chunk-local indices and classes of the points whose Classification actually changes."""
+    indices, classes = index.lookup(points.x, points.y)
+    current = np.asarray(points.classification)[indices]
+    changed = current != classes
+    return indices[changed], classes[changed]
+
+def reclassify_file(input_path, index, output_path=None, chunk_size=DEFAULT_CHUNK_SIZE, log_callback=None):
+    """
+    Reclassifies one LAS/LAZ file against a PolygonClassIndex, streaming it chunk by chunk.
+    Only the Classification values that change are touched:
+      - output_path=None on an uncompressed .las patches those bytes in place (an existing delta
+        sidecar is baked in first and removed, so older edits never override the patch),
+      - otherwise the points are copied in their source point format with the changed classes set.
+    Returns the number of points whose class changed.
+    """
+    require_laspy()
+    with open_las(input_path) as reader:
+        header = reader.header
+        index = index.reprojected(parse_crs_or_none(header), log_callback)
+        if output_path is None:
+            if header.are_points_compressed:
+                raise ValueError(f"'{os.path.basename(input_path)}' is compressed and cannot be patched in place.")
+            return _patch_in_place(input_path, header, index, chunk_size)
+        changed_total = 0
+        with open_las(output_path, mode='w', header=header) as writer:
+            for points in iter_chunks(input_path, chunk_size):
+                indices, classes = _changed(points, index)
+                if len(indices):
+                    # Only the sub-field is rewritten, every other byte of the record is copied as read
+                    points.classification[indices] = classes
+                    changed_total += len(indices)
+                writer.write_points(points)
+    return changed_total
+
+def reclassify_to_deltas(input_path, index, chunk_size=DEFAULT_CHUNK_SIZE, log_callback=None):
+    """
+    Non-destructive reclassification: the cloud is only read, and the points whose class changes
+    (relative to the edits already recorded) are stacked on its delta sidecar.
+    Returns the number of points whose class changed.
+    """
+    require_laspy()
+    with open_las(input_path) as reader:
+        point_count = int(reader.header.point_count)
+        index = index.reprojected(parse_crs_or_none(reader.header), log_callback)
+    changed_indices, changed_classes = [], []
+    start = 0
+    for points in iter_chunks(input_path, chunk_size):
+        indices, classes = _changed(points, index)
+        changed_indices.append(indices + start)
+        changed_classes.append(classes)
+        start += len(points)
+    changed_indices = np.concatenate(changed_indices) if changed_indices else np.empty(0, dtype=np.int64)
+    if len(changed_indices):
+        record_changes(input_path, point_count, changed_indices, np.concatenate(changed_classes))
+    return len(changed_indices)
+
+def materialize_deltas(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Writes a copy of the cloud with its delta sidecar merged in. Returns the number of edited points."""
+    require_laspy()
+    with open_las(input_path) as reader:
+        header = reader.header
+    path = sidecar_path(input_path)
+    if not os.path.isfile(path):
+        raise ValueError(f"'{os.path.basename(input_path)}' has no classification deltas to merge.")
+    with open_las(output_path, mode='w', header=header) as writer:
+        for points in iter_chunks(input_path, chunk_size):
+            writer.write_points(points)
+    return len(ClassDeltas.load(path))
+
+def _patch_in_place(path, header, index, chunk_size):
+    count = int(header.point_count)
+    point_format = header.point_format
+    deltas = load_sidecar(path, count)
+    array = np.memmap(path, dtype=point_format.dtype(), mode='r+', offset=header.offset_to_point_data, shape=(count,))
+    changed_total = 0
+    try:
+        for start in range(0, count, chunk_size):
+            points = laspy.ScaleAwarePointRecord(array[start:start + chunk_size], point_format, header.scales, header.offsets)
+            if deltas is not None:
+                points.classification = deltas.apply(np.asarray(points.classification), start)
+            indices, classes = _changed(points, index)
+            if len(indices):
+                points.classification[indices] = classes
+                changed_total += len(indices)
+        array.flush()
+    finally:
+        del array
+    if deltas is not None:
+        os.remove(sidecar_path(path))
+    return changed_total
+
+def reclassify_batch(input_paths, shp_file, output_paths=None, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     as_deltas=False, should_stop=None, log_callback=None):
+    """
+    Reclassifies several files against one polygon layer. The layer is read and indexed once and the
+    files run in parallel threads (decoding, the tree query and encoding release the GIL).
+    'output_paths' maps each input to its output (None = patch in place); with 'as_deltas' the edits
+    go to each file's delta sidecar instead. Returns (outputs, failed).
+    """
+    index = PolygonClassIndex.from_file(shp_file, log_callback=log_callback)
+    output_paths = output_paths or {}
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(input_paths)))
+    outputs, failed = [], []
+
+    def run(path):
+        if should_stop and should_stop():
+            raise RuntimeError("Stopped by the user.")
+        if as_deltas:
+            changed = reclassify_to_deltas(path, index, chunk_size)
+            log_message(log_callback, f"[{os.path.basename(path)}] {changed:,} point(s) changed class -> {os.path.basename(sidecar_path(path))}")
+            return sidecar_path(path)
+        output_path = output_paths.get(path)
+        changed = reclassify_file(path, index, output_path, chunk_size)
+        log_message(log_callback, f"[{os.path.basename(path)}] {changed:,} point(s) changed class -> {os.path.basename(output_path or path)}")
+        return output_path or path
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run, path): path for path in input_paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                outputs.append(future.result())
+            except Exception as e:
+                failed.append(path)
+                log_message(log_callback, f"[{os.path.basename(path)}] ERROR: {e}")
+    return outputs, failed
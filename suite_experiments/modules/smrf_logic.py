@@ -3,19 +3,32 @@ import json
 import sys
 import os
 import shutil
+import copy
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Graceful import for GeoPandas
+from utils.common import log_message
+from utils.spatial_sort import spatial_sort_file
+from utils.intermediates import IntermediateStore
+from utils.las_io import open_las, iter_chunks, parse_crs_or_none, require_laspy, DEFAULT_CHUNK_SIZE
+from modules.smrf_numpy import smrf_file, classify_las
+
+# Graceful import for GeoPandas / Shapely
 try:
+    import pandas as pd
     import geopandas as gpd
+    import shapely
 except ImportError:
+    pd = None
     gpd = None
+    shapely = None
 
-def _log(callback, message):
-    """Helper to send messages to the GUI log or print to console."""
-    if callback:
-        callback(message)
-    else:
-        print(message)
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
 
 def _generate_auto_path(input_path, suffix):
     base, ext = os.path.splitext(input_path)
@@ -34,111 +47,109 @@ def cleanup_shapefile(filepath, log_callback=None):
             except OSError:
                 pass
 
-def process_point_cloud_with_wrench(pdal_exe, pdal_wrench_exe, input_file, polygon_file, output_file, buffer_distance, smrf_params, log_callback=None):
-    temp_buffered_shapefile = "buffered_temp.shp"
-    temp_initial_clip_file = "clipped_temp.laz"
-    temp_classified_file = "classified_temp.laz"
-    temp_pipeline_json = "classify_pipeline_temp.json"
+def process_point_cloud_with_wrench(pdal_exe, pdal_wrench_exe, input_file, polygon_file, output_file, buffer_distance, smrf_params, log_callback=None, store=None, engine="pdal"):
+    # Every run works in its own workspace so concurrent runs never share temp files
+    owns_store = store is None
+    store = store or IntermediateStore("laz")
+    temp_buffered_shapefile = os.path.join(store.work_dir, "buffered_temp.shp")
+    temp_initial_clip_file = store.path("clipped_temp")
+    temp_classified_file = store.path("classified_temp")
     polygon_to_use = polygon_file
 
     try:
         # --- Step 1: Buffer ---
         if buffer_distance > 0:
-            _log(log_callback, f"--- Step 1: Buffering shapefile by {buffer_distance} units ---")
+            log_message(log_callback, f"--- Step 1: Buffering shapefile by {buffer_distance} units ---")
             gdf = gpd.read_file(polygon_file)
             gdf.geometry = gdf.geometry.buffer(buffer_distance)
             gdf.to_file(temp_buffered_shapefile)
             polygon_to_use = temp_buffered_shapefile
 
         # --- Step 2: Initial Clip ---
-        _log(log_callback, "\n--- Step 2: Performing initial clip ---")
+        log_message(log_callback, "\n--- Step 2: Performing initial clip ---")
         clip_cmd = [pdal_wrench_exe, "clip", "-i", input_file, "-p", polygon_to_use, "-o", temp_initial_clip_file]
-        _log(log_callback, f"Executing: {' '.join(clip_cmd)}")
-        subprocess.run(clip_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
+        log_message(log_callback, f"Executing: {' '.join(clip_cmd)}")
+        subprocess.run(clip_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
 
         # --- Step 3: Classify ---
-        _log(log_callback, "\n--- Step 3: Classifying ground points ---")
-        pipeline_def = {
-            "pipeline": [
-                {"type": "readers.las", "filename": temp_initial_clip_file},
-                {"type": "filters.smrf", **smrf_params},
-                {"type": "writers.las", "filename": temp_classified_file, "compression": "laszip"}
-            ]
-        }
-        with open(temp_pipeline_json, 'w') as f:
-            json.dump(pipeline_def, f, indent=4)
-        
-        pipeline_cmd = [pdal_exe, "pipeline", temp_pipeline_json]
-        _log(log_callback, f"Executing Pipeline: {' '.join(pipeline_cmd)}")
-        subprocess.run(pipeline_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
+        log_message(log_callback, "\n--- Step 3: Classifying ground points ---")
+        _run_smrf(engine, pdal_exe, temp_initial_clip_file, temp_classified_file, smrf_params, store.work_dir, log_callback)
 
         # --- Step 4: Final Clip ---
-        _log(log_callback, "\n--- Step 4: Performing final clip to original boundary ---")
+        log_message(log_callback, "\n--- Step 4: Performing final clip to original boundary ---")
         final_clip_cmd = [pdal_wrench_exe, "clip", "-i", temp_classified_file, "-p", polygon_file, "-o", output_file]
-        _log(log_callback, f"Executing: {' '.join(final_clip_cmd)}")
-        subprocess.run(final_clip_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
+        log_message(log_callback, f"Executing: {' '.join(final_clip_cmd)}")
+        subprocess.run(final_clip_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
 
-        _log(log_callback, f"Inside processing complete. Output: {output_file}")
+        log_message(log_callback, f"Inside processing complete. Output: {output_file}")
 
     except subprocess.CalledProcessError as e:
-        _log(log_callback, f"[!] Error in subprocess: {e.stdout}")
+        log_message(log_callback, f"[!] Error in subprocess: {e.stdout}")
         raise e
     finally:
         # Cleanup
-        for f in [temp_initial_clip_file, temp_classified_file, temp_pipeline_json]:
+        for f in [temp_initial_clip_file, temp_classified_file]:
             if os.path.exists(f):
                 os.remove(f)
         if buffer_distance > 0 and os.path.exists(temp_buffered_shapefile):
             cleanup_shapefile(temp_buffered_shapefile)
+        if owns_store:
+            store.close()
 
-def extract_outside_points(pdal_wrench_exe, input_cloud, polygon_file, output_file, log_callback=None):
-    _log(log_callback, "\n--- Starting Outside Point Extraction ---")
-    temp_boundary_shp = "boundary_temp.shp"
-    temp_outside_shp = "outside_area_temp.shp"
+def extract_outside_points(pdal_wrench_exe, input_cloud, polygon_file, output_file, log_callback=None, store=None):
+    log_message(log_callback, "\n--- Starting Outside Point Extraction ---")
+    owns_store = store is None
+    store = store or IntermediateStore("laz")
+    temp_boundary_shp = os.path.join(store.work_dir, "boundary_temp.shp")
+    temp_outside_shp = os.path.join(store.work_dir, "outside_area_temp.shp")
     
     try:
         # 1. Boundary
-        _log(log_callback, "[1/3] Creating boundary shapefile...")
-        subprocess.run([pdal_wrench_exe, "boundary", "-i", input_cloud, "-o", temp_boundary_shp], check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
+        log_message(log_callback, "[1/3] Creating boundary shapefile...")
+        subprocess.run([pdal_wrench_exe, "boundary", "-i", input_cloud, "-o", temp_boundary_shp], check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
 
         # 2. Difference
-        _log(log_callback, "[2/3] Calculating 'outside' area using GeoPandas...")
+        log_message(log_callback, "[2/3] Calculating 'outside' area using GeoPandas...")
         boundary_gdf = gpd.read_file(temp_boundary_shp)
         polygon_gdf = gpd.read_file(polygon_file)
         
         if boundary_gdf.crs != polygon_gdf.crs:
-            _log(log_callback, "Reprojecting polygon to match boundary CRS...")
+            log_message(log_callback, "Reprojecting polygon to match boundary CRS...")
             polygon_gdf = polygon_gdf.to_crs(boundary_gdf.crs)
 
         outside_gdf = gpd.overlay(boundary_gdf, polygon_gdf, how='difference')
         outside_gdf.to_file(temp_outside_shp)
 
         # 3. Clip
-        _log(log_callback, "[3/3] Clipping point cloud to 'outside' area...")
-        subprocess.run([pdal_wrench_exe, "clip", "-i", input_cloud, "-p", temp_outside_shp, "-o", output_file], check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
-        _log(log_callback, f"Outside extraction complete. Output: {output_file}")
+        log_message(log_callback, "[3/3] Clipping point cloud to 'outside' area...")
+        subprocess.run([pdal_wrench_exe, "clip", "-i", input_cloud, "-p", temp_outside_shp, "-o", output_file], check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        log_message(log_callback, f"Outside extraction complete. Output: {output_file}")
 
     except subprocess.CalledProcessError as e:
-        _log(log_callback, f"[!] Error in subprocess: {e.stdout}")
+        log_message(log_callback, f"[!] Error in subprocess: {e.stdout}")
         raise e
     finally:
         cleanup_shapefile(temp_boundary_shp)
         cleanup_shapefile(temp_outside_shp)
+        if owns_store:
+            store.close()
 
-def merge_point_clouds(pdal_exe, input_file_in, input_file_out, output_file, log_callback=None):
-    _log(log_callback, f"\n--- Merging '{os.path.basename(input_file_in)}' and '{os.path.basename(input_file_out)}' ---")
+def merge_point_clouds(pdal_exe, input_file_in, input_file_out, output_file, log_callback=None, sort_curve=None):
+    log_message(log_callback, f"\n--- Merging '{os.path.basename(input_file_in)}' and '{os.path.basename(input_file_out)}' ---")
     try:
         cmd = [pdal_exe, "merge", input_file_in, input_file_out, output_file]
-        _log(log_callback, f"Executing: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, shell=True)
-        _log(log_callback, f"Merge complete. Final Output: {output_file}")
+        log_message(log_callback, f"Executing: {' '.join(cmd)}")
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        if sort_curve:
+            spatial_sort_file(output_file, curve=sort_curve, log_callback=log_callback)
+        log_message(log_callback, f"Merge complete. Final Output: {output_file}")
     finally:
         for f in [input_file_in, input_file_out]:
             if os.path.exists(f):
                 os.remove(f)
 
-def run_smrf_workflow(input_cloud, input_polygon, slope, threshold, cell, window, pdal_exe, pdal_wrench_exe, log_callback=None):
-    """Main entry point for the workflow."""
+def run_smrf_workflow(input_cloud, input_polygon, slope, threshold, cell, window, pdal_exe, pdal_wrench_exe, log_callback=None, sort_curve=None, store=None, output_path=None, engine="pdal"):
+    """Main entry point for the workflow. Intermediates follow 'store' (an IntermediateStore), which is closed at the end."""
     if gpd is None:
         raise ImportError("GeoPandas is not installed. Please run 'pip install geopandas' to use this tool.")
 
@@ -146,9 +157,11 @@ def run_smrf_workflow(input_cloud, input_polygon, slope, threshold, cell, window
     input_polygon = os.path.normpath(input_polygon)
     
     # Define Outputs
-    intermediate_inside = _generate_auto_path(input_cloud, "_in")
-    intermediate_outside = _generate_auto_path(input_cloud, "_out")
-    final_output = _generate_auto_path(input_cloud, "_SMRF")
+    store = store or IntermediateStore("laz")
+    stem = os.path.splitext(os.path.basename(input_cloud))[0]
+    intermediate_inside = store.path(f"{stem}_in")
+    intermediate_outside = store.path(f"{stem}_out")
+    final_output = output_path or _generate_auto_path(input_cloud, "_SMRF")
     
     buffer_distance = window - 1
     
@@ -159,22 +172,304 @@ def run_smrf_workflow(input_cloud, input_polygon, slope, threshold, cell, window
         "cell": cell
     }
 
-    # 1. Process Inside
-    process_point_cloud_with_wrench(
-        pdal_exe, pdal_wrench_exe, input_cloud, input_polygon, 
-        intermediate_inside, buffer_distance, smrf_params, log_callback
-    )
-    
-    # 2. Process Outside
-    extract_outside_points(
-        pdal_wrench_exe, input_cloud, input_polygon, 
-        intermediate_outside, log_callback
-    )
-    
-    # 3. Merge
-    merge_point_clouds(
-        pdal_exe, intermediate_inside, intermediate_outside, 
-        final_output, log_callback
-    )
+    with store:
+        # 1. Process Inside
+        process_point_cloud_with_wrench(
+            pdal_exe, pdal_wrench_exe, input_cloud, input_polygon, 
+            intermediate_inside, buffer_distance, smrf_params, log_callback, store=store, engine=engine
+        )
+        
+        # 2. Process Outside
+        extract_outside_points(
+            pdal_wrench_exe, input_cloud, input_polygon, 
+            intermediate_outside, log_callback, store=store
+        )
+        
+        # 3. Merge
+        merge_point_clouds(
+            pdal_exe, intermediate_inside, intermediate_outside, 
+            final_output, log_callback, sort_curve=sort_curve
+        )
     
-    return final_output
\ No newline at end of file
+    return final_output
+
+def _contains_xy(geometry, x, y):
+    """Vectorized point-in-polygon test with a bounding-box prefilter."""
+    min_x, min_y, max_x, max_y = geometry.bounds
+    candidates = np.nonzero((x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))[0]
+    mask = np.zeros(len(x), dtype=bool)
+    if len(candidates):
+        mask[candidates] = shapely.contains_xy(geometry, x[candidates], y[candidates])
+    return mask
+
+def _load_polygon(polygon_file, cloud_crs, log_callback=None):
+    """Reads the polygon layer, reprojects it to the cloud CRS when needed and dissolves it into one geometry."""
+    gdf = gpd.read_file(polygon_file)
+    if cloud_crs is not None and gdf.crs is not None and gdf.crs != cloud_crs:
+        log_message(log_callback, "Reprojecting polygon to match point cloud CRS...")
+        gdf = gdf.to_crs(cloud_crs)
+    return shapely.union_all(gdf.geometry.values)
+
+def _run_pdal_smrf(pdal_exe, input_file, output_file, smrf_params, work_dir, log_callback=None):
+    """Runs filters.smrf on one file through a PDAL pipeline written into 'work_dir'."""
+    pipeline_path = os.path.join(work_dir, "classify_pipeline.json")
+    pipeline_def = {
+        "pipeline": [
+            {"type": "readers.las", "filename": input_file},
+            {"type": "filters.smrf", **smrf_params},
+            {"type": "writers.las", "filename": output_file, "compression": "laszip" if output_file.lower().endswith(".laz") else "none"}
+        ]
+    }
+    with open(pipeline_path, 'w') as f:
+        json.dump(pipeline_def, f, indent=4)
+    cmd = [pdal_exe, "pipeline", pipeline_path]
+    log_message(log_callback, f"Executing Pipeline: {' '.join(cmd)}")
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    except subprocess.CalledProcessError as e:
+        log_message(log_callback, f"[!] Error in subprocess: {e.stdout}")
+        raise
+
+# Attribute columns a polygon layer can carry to override the SMRF parameters of its zone
+ZONE_PARAMETER_COLUMNS = {"slope": float, "threshold": float, "cell": float, "window": int}
+
+def _run_smrf(engine, pdal_exe, input_file, output_file, smrf_params, work_dir, log_callback=None):
+    """Classifies ground with PDAL's filters.smrf or, for engine 'numpy', the built-in implementation."""
+    if engine == "numpy":
+        log_message(log_callback, "Classifying with the built-in SMRF engine...")
+        smrf_file(input_file, output_file, log_callback=log_callback, **smrf_params)
+    else:
+        _run_pdal_smrf(pdal_exe, input_file, output_file, smrf_params, work_dir, log_callback)
+
+def _read_cloud_crs(input_cloud):
+    with open_las(input_cloud) as reader:
+        return parse_crs_or_none(reader.header)
+
+def _load_zones(polygon_file, cloud_crs, default_params, log_callback=None):
+    """
+    Returns one (name, geometry, smrf_params) zone per polygon feature. Columns named like the
+    SMRF parameters (case-insensitive) override 'default_params' for their feature; empty cells keep the default.
+    """
+    gdf = gpd.read_file(polygon_file)
+    if cloud_crs is not None and gdf.crs is not None and gdf.crs != cloud_crs:
+        log_message(log_callback, "Reprojecting polygon to match point cloud CRS...")
+        gdf = gdf.to_crs(cloud_crs)
+    columns = {c.lower(): c for c in gdf.columns if c.lower() in ZONE_PARAMETER_COLUMNS}
+    zones = []
+    for number, (_, row) in enumerate(gdf.iterrows(), start=1):
+        if row.geometry is None or row.geometry.is_empty:
+            continue
+        params = dict(default_params)
+        for key, column in columns.items():
+            value = row[column]
+            # NaN, None, pd.NA and blank text all mean "keep the default"
+            if pd.isna(value) or str(value).strip() == "":
+                continue
+            try:
+                parsed = float(str(value).strip())
+                if ZONE_PARAMETER_COLUMNS[key] is int and not parsed.is_integer():
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"Polygon {number} of '{os.path.basename(polygon_file)}': '{column}' value '{value}' is not a valid {key}.")
+            params[key] = ZONE_PARAMETER_COLUMNS[key](parsed)
+        zones.append((f"zone_{number}", row.geometry, params))
+    if not zones:
+        raise ValueError(f"'{os.path.basename(polygon_file)}' contains no polygons.")
+    return zones
+
+def _classify_zones(input_cloud, zones, pdal_exe, final_output, store, max_workers=None, log_callback=None, engine="pdal"):
+    """
+    Core of the one-pass workflow. The cloud is decoded once; every zone's buffered subset is written to
+    its own scratch file, SMRF runs on the subsets in parallel, and the output is written once in the
+    original point order. A point inside several zones takes the class of the first zone listed.
+    With the 'memory' policy and the built-in engine, the subsets are handed to SMRF as arrays instead of files.
+    """
+    stem = os.path.splitext(os.path.basename(input_cloud))[0]
+    prepared = []
+    for name, geometry, params in zones:
+        buffer_distance = params["window"] - 1
+        buffered = geometry.buffer(buffer_distance) if buffer_distance > 0 else geometry
+        shapely.prepare(geometry)
+        shapely.prepare(buffered)
+        prepared.append((name, geometry, buffered, params))
+
+    in_memory = store.keeps_in_memory() and engine == "numpy"
+
+    # --- Pass 1: decode once, split by polygon / buffer ---
+    log_message(log_callback, f"--- Step 1: Reading point cloud and testing points against {len(prepared)} polygon(s) ---")
+    with open_las(input_cloud) as reader:
+        header = reader.header
+        point_count = int(header.point_count)
+        dtype = header.point_format.dtype()
+        if store.keeps_in_memory():
+            records = np.empty(point_count, dtype=dtype)
+        else:
+            records = np.lib.format.open_memmap(os.path.join(store.work_dir, f"{stem}_records.npy"), mode='w+', dtype=dtype, shape=(point_count,))
+        # Index of the zone that owns each point (-1: outside every polygon)
+        owner = np.full(point_count, -1, dtype=np.int32)
+        subset_indices = [[] for _ in prepared]
+        subset_names = [f"{stem}_{name}_subset" for name, _, _, _ in prepared]
+        if in_memory:
+            for subset_name in subset_names:
+                store.put(subset_name, [])
+            subset_paths, writers = [], []
+        else:
+            subset_paths = [store.path(subset_name) for subset_name in subset_names]
+            writers = [open_las(path, mode='w', header=copy.deepcopy(header)) for path in subset_paths]
+        try:
+            start = 0
+            # iter_chunks applies the cloud's delta sidecar, so non-destructive reclass edits are kept
+            for points in iter_chunks(input_cloud, DEFAULT_CHUNK_SIZE):
+                stop = start + len(points)
+                records[start:stop] = points.array
+                x, y = np.asarray(points.x), np.asarray(points.y)
+                chunk_owner = owner[start:stop]
+                for z, (_, geometry, buffered, _) in enumerate(prepared):
+                    buffer_mask = _contains_xy(buffered, x, y)
+                    if not buffer_mask.any():
+                        continue
+                    buffer_idx = np.nonzero(buffer_mask)[0]
+                    inside = _contains_xy(geometry, x[buffer_idx], y[buffer_idx])
+                    claim = buffer_idx[inside & (chunk_owner[buffer_idx] < 0)]
+                    chunk_owner[claim] = z
+                    subset_indices[z].append(buffer_idx + start)
+                    if in_memory:
+                        store.get(subset_names[z]).append(points.array[buffer_mask])
+                    else:
+                        writers[z].write_points(points[buffer_mask])
+                start = stop
+        finally:
+            for writer in writers:
+                writer.close()
+    subset_indices = [np.concatenate(idx) if idx else np.empty(0, dtype=np.int64) for idx in subset_indices]
+
+    inside_count = int((owner >= 0).sum())
+    log_message(log_callback, f"    {inside_count:,} inside / {sum(len(i) for i in subset_indices):,} in buffers / {point_count:,} total points")
+    if inside_count == 0:
+        raise ValueError("No points fall inside the polygon.")
+
+    # --- SMRF on every buffered subset, in parallel ---
+    log_message(log_callback, "\n--- Step 2: Classifying ground points in the buffered subsets ---")
+
+    def classify(z):
+        name, _, _, params = prepared[z]
+        zone_log = (lambda message: log_message(log_callback, f"[{name}] {message}")) if len(prepared) > 1 else log_callback
+        log_message(zone_log, f"slope={params['slope']}, threshold={params['threshold']}, cell={params['cell']}, window={params['window']}")
+        if in_memory:
+            subset = laspy.LasData(copy.deepcopy(header), points=laspy.PackedPointRecord(np.concatenate(store.pop(subset_names[z])), header.point_format))
+            log_message(zone_log, "Classifying with the built-in SMRF engine (in memory)...")
+            classify_las(subset, log_callback=zone_log, **params)
+            return np.asarray(subset.classification, dtype=np.uint8)
+        zone_dir = os.path.join(store.work_dir, name)
+        os.makedirs(zone_dir, exist_ok=True)
+        classified_path = store.path(f"{stem}_{name}_classified")
+        _run_smrf(engine, pdal_exe, subset_paths[z], classified_path, params, zone_dir, zone_log)
+        with open_las(classified_path) as classified_reader:
+            classes = np.concatenate([np.asarray(c.classification, dtype=np.uint8) for c in classified_reader.chunk_iterator(DEFAULT_CHUNK_SIZE)])
+        if len(classes) != len(subset_indices[z]):
+            raise RuntimeError(f"The SMRF output of {name} does not match its buffered subset point count.")
+        return classes
+
+    new_classes = np.zeros(point_count, dtype=np.uint8)
+    active = [z for z in range(len(prepared)) if len(subset_indices[z])]
+    max_workers = max_workers or min(len(active), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for z, classes in zip(active, executor.map(classify, active)):
+            owned = owner[subset_indices[z]] == z
+            new_classes[subset_indices[z][owned]] = classes[owned]
+
+    # --- Pass 2: single write of the final output in the original order ---
+    log_message(log_callback, "\n--- Step 3: Writing classified inside points and untouched outside points ---")
+    with open_las(final_output, mode='w', header=copy.deepcopy(header)) as writer:
+        for start in range(0, point_count, DEFAULT_CHUNK_SIZE):
+            stop = min(start + DEFAULT_CHUNK_SIZE, point_count)
+            chunk = laspy.PackedPointRecord(np.array(records[start:stop]), header.point_format)
+            mask = owner[start:stop] >= 0
+            if mask.any():
+                classes = np.asarray(chunk.classification).copy()
+                classes[mask] = new_classes[start:stop][mask]
+                chunk.classification = classes
+            writer.write_points(chunk)
+    del records
+
+def run_smrf_one_pass(input_cloud, input_polygon, slope, threshold, cell, window, pdal_exe, log_callback=None, sort_curve=None, store=None, output_path=None, engine="pdal"):
+    """
+    Single-read variant of run_smrf_workflow: the cloud is decoded once, points are tested against
+    the polygon and its buffer in vectorized form, SMRF runs only on the buffered subset and the
+    final output is written once in the original point order. No boundary / overlay step is needed.
+    """
+    if gpd is None:
+        raise ImportError("GeoPandas is not installed. Please run 'pip install geopandas' to use this tool.")
+    require_laspy()
+
+    input_cloud = os.path.normpath(input_cloud)
+    final_output = output_path or _generate_auto_path(input_cloud, "_SMRF")
+    smrf_params = {"slope": slope, "window": window, "threshold": threshold, "cell": cell}
+    store = store or IntermediateStore("laz")
+
+    with store:
+        polygon = _load_polygon(input_polygon, _read_cloud_crs(input_cloud), log_callback)
+        _classify_zones(input_cloud, [("polygon", polygon, smrf_params)], pdal_exe, final_output, store, log_callback=log_callback, engine=engine)
+
+    if sort_curve:
+        spatial_sort_file(final_output, curve=sort_curve, log_callback=log_callback)
+    log_message(log_callback, f"One-pass SMRF complete. Final Output: {final_output}")
+    return final_output
+
+def run_smrf_zones(input_cloud, input_polygon, slope, threshold, cell, window, pdal_exe, log_callback=None, sort_curve=None, store=None, output_path=None, max_workers=None, engine="pdal"):
+    """
+    One-pass SMRF with one zone per polygon feature. Each zone is classified on its own buffered subset
+    with the parameters from its attribute columns (slope / threshold / cell / window), falling back to
+    the values passed in; zones run in parallel and are stitched into a single output.
+    """
+    if gpd is None:
+        raise ImportError("GeoPandas is not installed. Please run 'pip install geopandas' to use this tool.")
+    require_laspy()
+
+    input_cloud = os.path.normpath(input_cloud)
+    final_output = output_path or _generate_auto_path(input_cloud, "_SMRF")
+    default_params = {"slope": slope, "window": window, "threshold": threshold, "cell": cell}
+    store = store or IntermediateStore("laz")
+
+    with store:
+        zones = _load_zones(input_polygon, _read_cloud_crs(input_cloud), default_params, log_callback)
+        log_message(log_callback, f"Loaded {len(zones)} zone(s) from '{os.path.basename(input_polygon)}'.")
+        _classify_zones(input_cloud, zones, pdal_exe, final_output, store, max_workers=max_workers, log_callback=log_callback, engine=engine)
+
+    if sort_curve:
+        spatial_sort_file(final_output, curve=sort_curve, log_callback=log_callback)
+    log_message(log_callback, f"Zoned SMRF complete. Final Output: {final_output}")
+    return final_output
+
+def run_smrf_batch(jobs, pdal_exe, pdal_wrench_exe, one_pass=True, store_factory=None, max_workers=None, sort_curve=None, log_callback=None, engine="pdal"):
+    """
+    Runs several local SMRF jobs concurrently. Each job is a dict with 'input_cloud', 'input_polygon',
+    'slope', 'threshold', 'cell', 'window', an optional 'output_path' and an optional 'zones' flag;
+    every job gets its own IntermediateStore (and therefore its own workspace) from 'store_factory'.
+    Returns the list of outputs and the list of (job, error) failures.
+    """
+    store_factory = store_factory or (lambda: IntermediateStore("laz"))
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+
+    def run_job(index, job):
+        name = os.path.basename(job.get("output_path") or job["input_polygon"])
+        job_log = (lambda message: log_message(log_callback, f"[{index}/{len(jobs)} {name}] {message}"))
+        params = (job["input_cloud"], job["input_polygon"], job["slope"], job["threshold"], job["cell"], job["window"])
+        if job.get("zones"):
+            return run_smrf_zones(*params, pdal_exe, log_callback=job_log, sort_curve=sort_curve, store=store_factory(), output_path=job.get("output_path"), engine=engine)
+        if one_pass:
+            return run_smrf_one_pass(*params, pdal_exe, log_callback=job_log, sort_curve=sort_curve, store=store_factory(), output_path=job.get("output_path"), engine=engine)
+        return run_smrf_workflow(*params, pdal_exe, pdal_wrench_exe, log_callback=job_log, sort_curve=sort_curve, store=store_factory(), output_path=job.get("output_path"), engine=engine)
+
+    log_message(log_callback, f"--- Running {len(jobs)} local SMRF job(s) with {max_workers} worker(s) ---")
+    outputs, failed = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_job, i, job): job for i, job in enumerate(jobs, start=1)}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                outputs.append(future.result())
+            except Exception as e:
+                failed.append((job, e))
+                log_message(log_callback, f"[!] Job failed for '{os.path.basename(job['input_polygon'])}': {e}")
+    return outputs, failed
@@ -0,0 +1,226 @@
+import os
+from concurrent.futures import wait, FIRST_COMPLETED
+
+from utils.common import log_message, require_scipy
+from utils.las_io import open_las, process_pool, require_laspy
+
+# Graceful import for NumPy / SciPy
+try:
+    import numpy as np
+    from scipy import ndimage
+except ImportError:
+    np = None
+    ndimage = None
+
+SMRF_ENGINES = ("pdal", "numpy")
+DEFAULT_RETURNS = "last,only"
+# Tiles are this many cells wide; the buffer around each tile is derived from the window
+DEFAULT_TILE_CELLS = 1000
+# Dimensions the built-in SMRF reads (utils.las_io.read_dimensions names)
+SMRF_DIMENSIONS = ("x", "y", "z", "classification", "return_number", "number_of_returns")
+
+def returns_mask(return_number, number_of_returns, returns=DEFAULT_RETURNS):
+    """Selects the points filters.smrf would consider for a 'returns' option such as 'last,only'."""
+    rn, nr = np.asarray(return_number), np.asarray(number_of_returns)
+    selected = {r.strip() for r in returns.split(",")}
+    mask = np.zeros(len(rn), dtype=bool)
+    if "first" in selected:
+        mask |= (rn == 1) & (nr > 1)
+    if "intermediate" in selected:
+        mask |= (rn > 1) & (rn < nr)
+    if "last" in selected:
+        mask |= (rn == nr) & (nr > 1)
+    if "only" in selected:
+        mask |= nr <= 1
+    return mask
+
+def _grid_min(x, y, z, x0, y0, cell, rows, cols):
+    """Lowest Z per cell (NaN for empty cells)."""
+    col = np.clip(((x - x0) / cell).astype(np.int64), 0, cols - 1)
+    row = np.clip(((y - y0) / cell).astype(np.int64), 0, rows - 1)
+    flat = row * cols + col
+    order = np.argsort(flat, kind='stable')
+    flat_sorted = flat[order]
+    starts = np.concatenate(([0], np.nonzero(np.diff(flat_sorted))[0] + 1))
+    grid = np.full(rows * cols, np.nan)
+    grid[flat_sorted[starts]] = np.minimum.reduceat(z[order], starts)
+    return grid.reshape(rows, cols)
+
+def _fill(grid):
+    """Fills NaN cells with the value of the nearest valid cell."""
+    missing = np.isnan(grid)
+    if not missing.any() or missing.all():
+        return grid
+    indices = ndimage.distance_transform_edt(missing, return_distances=False, return_indices=True)
+    return grid[tuple(indices)]
+
+def _progressive_filter(surface, cell, slope, max_window):
+    """
+    Flags object cells: openings with a growing diamond whose elevation drop exceeds slope * radius * cell.
+    The erosion of radius r is one 3x3 cross erosion of the radius r-1 erosion; the dilation back is
+    repeated r times.
+    """
+    cross = ndimage.generate_binary_structure(2, 1)
+    max_radius = int(max_window / cell)
+    objects = np.zeros(surface.shape, dtype=bool)
+    last = surface
+    erosion = surface
+    for radius in range(1, max_radius + 1):
+        erosion = ndimage.grey_erosion(erosion, footprint=cross, mode='nearest')
+        opened = erosion
+        for _ in range(radius):
+            opened = ndimage.grey_dilation(opened, footprint=cross, mode='nearest')
+        objects |= (last - opened) > slope * radius * cell
+        last = opened
+    return objects
+
+def smrf_classify(x, y, z, slope=0.15, window=18.0, threshold=0.5, scalar=1.25, cell=1.0, origin=None):
+    """
+    Simple Morphological Filter (Pingel et al., 2013) on point arrays; returns a boolean ground mask.
+    Mirrors PDAL's filters.smrf: a gridded minimum surface with low outliers removed, a progressive
+    diamond opening up to 'window' (map units) to flag objects, and a per-point test of the distance
+    to the interpolated provisional surface against threshold + scalar * local slope.
+    'origin' pins the grid to a shared (x0, y0) so tiles line up with the whole cloud.
+    """
+    require_scipy("the built-in SMRF engine")
+    x, y, z = (np.asarray(a, dtype=np.float64) for a in (x, y, z))
+    if len(x) == 0:
+        return np.zeros(0, dtype=bool)
+    x0, y0 = origin if origin is not None else (x.min(), y.min())
+    cols = int((x.max() - x0) / cell) + 1
+    rows = int((y.max() - y0) / cell) + 1
+
+    zimin = _fill(_grid_min(x, y, z, x0, y0, cell, rows, cols))
+    # Low outliers: cells far below their neighbours (progressive filter of the inverted surface)
+    low = _progressive_filter(-zimin, cell, 5.0, 1.0 * cell)
+    if low.any():
+        zimin = zimin.copy()
+        zimin[low] = np.nan
+        zimin = _fill(zimin)
+
+    objects = _progressive_filter(zimin, cell, slope, window)
+    provisional = zimin.copy()
+    provisional[objects] = np.nan
+    provisional = _fill(provisional)
+
+    gy, gx = np.gradient(provisional, cell)
+    local_slope = np.hypot(gx, gy)
+
+    col_f = (x - x0) / cell - 0.5
+    row_f = (y - y0) / cell - 0.5
+    expected = ndimage.map_coordinates(provisional, [row_f, col_f], order=1, mode='nearest')
+    col = np.clip(((x - x0) / cell).astype(np.int64), 0, cols - 1)
+    row = np.clip(((y - y0) / cell).astype(np.int64), 0, rows - 1)
+    allowed = threshold + scalar * local_slope[row, col]
+    return np.abs(expected - z) <= allowed
+
+def _classify_tile(args):
+    x, y, z, core, core_index, params, origin = args
+    ground = smrf_classify(x, y, z, origin=origin, **params)
+    return core_index, ground[core]
+
+def smrf_classify_tiled(x, y, z, slope=0.15, window=18.0, threshold=0.5, scalar=1.25, cell=1.0,
+                        tile_cells=DEFAULT_TILE_CELLS, max_workers=None, log_callback=None):
+    """
+    Tiled smrf_classify for large clouds. Each tile is classified with a buffer wider than the
+    window so the openings at its edges see the same neighbourhood as an untiled run; only the
+    results of the tile core are kept. Tiles run in a process pool.
+    """
+    require_scipy("the built-in SMRF engine")
+    x, y, z = (np.asarray(a, dtype=np.float64) for a in (x, y, z))
+    params = {"slope": slope, "window": window, "threshold": threshold, "scalar": scalar, "cell": cell}
+    x0, y0 = x.min(), y.min()
+    tile = tile_cells * cell
+    buffer = 2 * window + 2 * cell
+    tiles_x = int((x.max() - x0) / tile) + 1
+    tiles_y = int((y.max() - y0) / tile) + 1
+    if tiles_x * tiles_y == 1:
+        return smrf_classify(x, y, z, **params)
+
+    # Sorting by X once lets every tile column find its buffered points with a binary search
+    order = np.argsort(x, kind='stable')
+    xs = x[order]
+    ground = np.zeros(len(x), dtype=bool)
+
+    def tasks():
+        for tx in range(tiles_x):
+            lo, hi = x0 + tx * tile, x0 + (tx + 1) * tile
+            start, stop = np.searchsorted(xs, [lo - buffer, hi + buffer])
+            column = order[start:stop]
+            cy = y[column]
+            for ty in range(tiles_y):
+                bottom, top = y0 + ty * tile, y0 + (ty + 1) * tile
+                picked = column[(cy >= bottom - buffer) & (cy < top + buffer)]
+                if not len(picked):
+                    continue
+                px, py = x[picked], y[picked]
+                core = (px >= lo) & (px < hi) & (py >= bottom) & (py < top)
+                if not core.any():
+                    continue
+                # Buffer edges snap to the global grid so every tile shares the same cell boundaries
+                origin = (x0 + np.floor((px.min() - x0) / cell) * cell, y0 + np.floor((py.min() - y0) / cell) * cell)
+                yield px, py, z[picked], core, picked[core], params, origin
+
+    max_workers = max_workers or os.cpu_count() or 1
+    log_message(log_callback, f"Built-in SMRF: {tiles_x * tiles_y} tile(s) of {tile_cells} cells, {max_workers} worker(s).")
+    with process_pool(max_workers) as executor:
+        # Keep only a few tiles in flight so the buffered copies never add up to the whole cloud
+        pending = set()
+        for task in tasks():
+            pending.add(executor.submit(_classify_tile, task))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    core_index, core_ground = future.result()
+                    ground[core_index] = core_ground
+        for future in pending:
+            core_index, core_ground = future.result()
+            ground[core_index] = core_ground
+    return ground
+
+def classify_dimensions(arrays, slope=0.15, window=18.0, threshold=0.5, scalar=1.25, cell=1.0, returns=DEFAULT_RETURNS,
+                        tile_cells=None, max_workers=None, log_callback=None):
+    """
+    Runs the built-in SMRF on the SMRF_DIMENSIONS arrays of a cloud (e.g. from utils.las_io.read_dimensions):
+    ground points among the selected returns are set to class 2, every other class is left as it is
+    (like filters.smrf). Returns the new classification array and the ground mask.
+    'tile_cells' switches to the tiled mode (auto when the grid is larger than DEFAULT_TILE_CELLS).
+    """
+    require_scipy("the built-in SMRF engine")
+    candidates = np.nonzero(returns_mask(np.asarray(arrays["return_number"]), np.asarray(arrays["number_of_returns"]), returns))[0]
+    x, y, z = (np.asarray(arrays[d])[candidates] for d in ("x", "y", "z"))
+    params = {"slope": slope, "window": window, "threshold": threshold, "scalar": scalar, "cell": cell}
+    ground = np.zeros(len(arrays["classification"]), dtype=bool)
+    if len(candidates):
+        extent = max(x.max() - x.min(), y.max() - y.min()) / cell
+        if tile_cells or extent > DEFAULT_TILE_CELLS:
+            ground[candidates] = smrf_classify_tiled(x, y, z, tile_cells=tile_cells or DEFAULT_TILE_CELLS, max_workers=max_workers, log_callback=log_callback, **params)
+        else:
+            ground[candidates] = smrf_classify(x, y, z, **params)
+    classes = np.array(arrays["classification"])
+    classes[ground] = 2
+    return classes, ground
+
+def classify_las(las, slope=0.15, window=18.0, threshold=0.5, scalar=1.25, cell=1.0, returns=DEFAULT_RETURNS,
+                 tile_cells=None, max_workers=None, log_callback=None):
+    """Runs the built-in SMRF on a laspy LasData in place (see classify_dimensions). Returns the ground mask."""
+    classes, ground = classify_dimensions({d: getattr(las, d) for d in SMRF_DIMENSIONS}, slope, window, threshold, scalar, cell,
+                                          returns, tile_cells, max_workers, log_callback)
+    las.classification = classes
+    return ground
+
+def smrf_file(input_file, output_file, slope=0.15, window=18.0, threshold=0.5, scalar=1.25, cell=1.0,
+              returns=DEFAULT_RETURNS, tile_cells=None, max_workers=None, log_callback=None):
+    """
+    Classifies ground in 'input_file' with the built-in SMRF and writes 'output_file' (skipped when None).
+    Returns the LasData and ground mask.
+    """
+    require_laspy()
+    with open_las(input_file) as reader:
+        las = reader.read()
+    ground = classify_las(las, slope, window, threshold, scalar, cell, returns, tile_cells, max_workers, log_callback)
+    log_message(log_callback, f"Built-in SMRF: {int(ground.sum()):,} of {len(ground):,} points classified as ground.")
+    if output_file:
+        with open_las(output_file, mode='w', header=las.header) as writer:
+            writer.write_points(las.points)
+    return las, ground
@@ -0,0 +1,284 @@
+import os
+import csv
+import json
+import sys
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.common import log_message
+from utils.las_io import open_las, parse_crs_or_none, process_pool, read_dimensions, require_laspy, DEFAULT_CHUNK_SIZE
+from utils.rasters import read_checkpoints, score_surface, write_mean_raster
+from utils.thinning import StreamThinner, THINNING_METHODS
+from modules.smrf_numpy import smrf_classify, returns_mask
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Optional in-process PDAL bindings ('pip install pdal'); without them the sweep drives the pdal CLI
+try:
+    import pdal
+except ImportError:
+    pdal = None
+
+SWEEP_MANIFEST_NAME = "sweep_manifest.csv"
+SWEEP_SCORES_NAME = "sweep_scores.csv"
+
+# PDAL dimension names of the arrays handed to the in-process bindings
+_PDAL_DIMENSIONS = [
+    ("X", "x", "f8"), ("Y", "y", "f8"), ("Z", "z", "f8"),
+    ("Intensity", "intensity", "u2"), ("ReturnNumber", "return_number", "u1"),
+    ("NumberOfReturns", "number_of_returns", "u1"), ("Classification", "classification", "u1"),
+]
+
+def parse_values(text, cast=float):
+    """Parses a comma / space separated list of parameter values ('0.05, 0.15 0.25')."""
+    values = [cast(v) for v in text.replace(",", " ").split()]
+    if not values:
+        raise ValueError("At least one value is required.")
+    return values
+
+def expand_grid(slopes, thresholds, windows, scalars):
+    """Returns every slope x threshold x window x scalar combination as a filters.smrf parameter dict."""
+    return [
+        {"slope": slope, "threshold": threshold, "window": window, "scalar": scalar}
+        for slope, threshold, window, scalar in itertools.product(slopes, thresholds, windows, scalars)
+    ]
+
+def _token(value):
+    return str(value).replace(".", "")
+
+def sweep_output_name(dtm_base, params):
+    """DTM file name of one combination, e.g. 'tile_thinned_dtm_s005_t02_w103_k125.tif'."""
+    return f"{dtm_base}_dtm_s{_token(params['slope'])}_t{_token(params['threshold'])}_w{_token(params['window'])}_k{_token(params['scalar'])}.tif"
+
+def _smrf_stages(params, output_tif, resolution):
+    return [
+        {"type": "filters.smrf", **params},
+        {"type": "filters.range", "limits": "Classification[2:2]"},
+        {"type": "writers.gdal", "filename": output_tif, "resolution": resolution, "output_type": "mean"},
+    ]
+
+def _npy_header(dtype, count, size=None):
+    """The .npy (v1.0) header of a 1-D array of 'count' records, padded to 'size' bytes when given."""
+    text = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (count,)})
+    size = size or (len(text) + 11 + 63) // 64 * 64
+    return b"\x93NUMPY\x01\x00" + (size - 10).to_bytes(2, "little") + (text.ljust(size - 11) + "\n").encode("latin1")
+
+class _ArrayChunk:
+    """A slice of read_dimensions() arrays that reads like a laspy chunk (len() and point attributes)."""
+    def __init__(self, arrays, start, stop):
+        self._arrays, self._start, self._stop = arrays, start, stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getattr__(self, name):
+        return np.asarray(self._arrays[name][self._start:self._stop])
+
+def thin_once(input_file, work_dir, method="every_nth", value=1, as_array=False, save_path=None, log_callback=None, point_cache=None):
+    """
+    Thins 'input_file' (see utils.thinning.StreamThinner) in a single streaming read. The result is an
+    uncompressed LAS in 'work_dir' (read by the pdal CLI) or, with 'as_array', a .npy array of PDAL
+    dimensions that worker processes open as a memmap. 'save_path' additionally writes the thinned
+    cloud as a deliverable (e.g. '_thinned.laz') from the same stream.
+    The array is appended chunk by chunk behind a header sized for the full point count and the
+    header is rewritten with the kept count at the end, so only one chunk is held in memory.
+    With a PointCache given and only the array to write, the points come from the cache instead of a new decode.
+    """
+    require_laspy()
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    thinner = StreamThinner(method, value)
+    kept = 0
+    if as_array and not save_path and point_cache is not None:
+        arrays = read_dimensions(input_file, [attr for _, attr, _ in _PDAL_DIMENSIONS], point_cache=point_cache)
+        total = len(arrays["x"])
+        reader = None
+        chunks = (_ArrayChunk(arrays, start, min(start + DEFAULT_CHUNK_SIZE, total)) for start in range(0, total, DEFAULT_CHUNK_SIZE))
+    else:
+        reader = open_las(input_file)
+        total = int(reader.header.point_count)
+        chunks = reader.chunk_iterator(DEFAULT_CHUNK_SIZE)
+    try:
+        output_path = os.path.join(work_dir, f"{stem}_thinned.npy" if as_array else f"{stem}_thinned.las")
+        writers = [open_las(save_path, mode='w', header=reader.header)] if save_path else []
+        dtype = np.dtype([(name, fmt) for name, _, fmt in _PDAL_DIMENSIONS])
+        array_file = None
+        try:
+            if as_array:
+                # The kept count is only known at the end; reserve a header large enough for every point
+                header_size = len(_npy_header(dtype, total))
+                array_file = open(output_path, 'wb')
+                array_file.write(_npy_header(dtype, total))
+            else:
+                writers.append(open_las(output_path, mode='w', header=reader.header))
+            for points in chunks:
+                selected = thinner.select(points)
+                kept += len(selected)
+                if writers:
+                    picked = points[selected]
+                    for writer in writers:
+                        writer.write_points(picked)
+                if as_array:
+                    array = np.empty(len(selected), dtype=dtype)
+                    for name, attr, _ in _PDAL_DIMENSIONS:
+                        array[name] = np.asarray(getattr(points, attr))[selected]
+                    array.tofile(array_file)
+            if as_array:
+                array_file.seek(0)
+                array_file.write(_npy_header(dtype, kept, header_size))
+        finally:
+            for writer in writers:
+                writer.close()
+            if array_file is not None:
+                array_file.close()
+    finally:
+        if reader is not None:
+            reader.close()
+    log_message(log_callback, f"Thinned {total:,} points to {kept:,} ({THINNING_METHODS[method].lower()}, {value}) in one read.")
+    if save_path:
+        log_message(log_callback, f"Thinned cloud saved: {save_path}")
+    return output_path
+
+def _run_with_bindings(array_path, params, output_tif, resolution):
+    """Worker process: evaluates one combination on the shared memmapped array."""
+    # np.asarray is a view of the mapping, not a copy: every worker shares the page cache of one file
+    points = np.asarray(np.load(array_path, mmap_mode='r'))
+    pipeline = pdal.Pipeline(json.dumps(_smrf_stages(params, output_tif, resolution)), arrays=[points])
+    pipeline.execute()
+    return output_tif
+
+def _run_with_numpy(array_path, params, output_tif, resolution, crs_wkt=None):
+    """Worker process: evaluates one combination with the built-in SMRF on the shared memmapped array."""
+    points = np.load(array_path, mmap_mode='r')
+    candidates = np.nonzero(returns_mask(points["ReturnNumber"], points["NumberOfReturns"]))[0]
+    x, y, z = (np.asarray(points[d])[candidates] for d in ("X", "Y", "Z"))
+    ground = np.asarray(points["Classification"]) == 2
+    ground[candidates] |= smrf_classify(x, y, z, **params)
+    write_mean_raster(points["X"][ground], points["Y"][ground], points["Z"][ground], output_tif, resolution, crs=crs_wkt)
+    return output_tif
+
+def _run_with_cli(pdal_exe, las_path, params, output_tif, resolution, pipeline_path, register_process=None, unregister_process=None):
+    """Evaluates one combination through 'pdal pipeline' on the shared uncompressed LAS."""
+    with open(pipeline_path, 'w') as f:
+        json.dump({"pipeline": [las_path] + _smrf_stages(params, output_tif, resolution)}, f, indent=4)
+    creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+    process = subprocess.Popen([pdal_exe, "pipeline", pipeline_path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               text=True, creationflags=creation_flags, encoding='utf-8', errors='ignore')
+    if register_process:
+        register_process(process)
+    try:
+        output, _ = process.communicate()
+    finally:
+        if unregister_process:
+            unregister_process(process)
+    if process.returncode != 0:
+        raise RuntimeError(f"pdal exited with code {process.returncode}: {output.strip()[-500:]}")
+    return output_tif
+
+def run_sweep(input_file, combinations, work_dir, dtm_base, resolution, thinning=("every_nth", 1), save_thinned=None, pdal_exe="pdal",
+              max_workers=None, use_bindings=None, register_process=None, unregister_process=None,
+              should_stop=None, log_callback=None, engine="pdal", point_cache=None):
+    """
+    Evaluates every SMRF parameter combination on one thinned copy of 'input_file' and writes a
+    ground DTM for each. 'thinning' is a (method, value) pair and 'save_thinned' an optional path
+    the thinned cloud is also written to. The input is decoded and thinned once; the combinations
+    then run in parallel, in-process through the PDAL bindings (one worker process each) when they are installed,
+    otherwise as concurrent 'pdal pipeline' calls ('register_process' / 'unregister_process' expose
+    them so they can be terminated; 'should_stop' is polled between results). With engine 'numpy'
+    the built-in SMRF evaluates the combinations in worker processes instead of PDAL.
+    A manifest CSV lists every DTM with its parameters. 'point_cache' is handed to thin_once.
+    Returns the list of (params, output_tif) results and the list of (params, error) failures.
+    """
+    if np is None:
+        raise ImportError("NumPy is not installed. Please run 'pip install numpy' to use this tool.")
+    if engine == "numpy":
+        use_bindings = False
+    elif use_bindings is None:
+        use_bindings = pdal is not None
+    elif use_bindings and pdal is None:
+        raise ImportError("The PDAL Python bindings are not installed. Please run 'pip install pdal'.")
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(combinations)))
+
+    log_message(log_callback, f"--- Parameter sweep: {len(combinations)} combination(s), {max_workers} worker(s), "
+                       f"{'built-in SMRF' if engine == 'numpy' else 'PDAL bindings' if use_bindings else 'pdal CLI'} ---")
+    shared_input = thin_once(input_file, work_dir, *thinning, as_array=use_bindings or engine == "numpy", save_path=save_thinned, log_callback=log_callback, point_cache=point_cache)
+
+    results, failed = [], []
+    if engine == "numpy":
+        with open_las(input_file) as reader:
+            crs = parse_crs_or_none(reader.header)
+        crs_wkt = crs.to_wkt() if crs is not None else None
+        executor = process_pool(max_workers)
+        submit = lambda i, params: executor.submit(_run_with_numpy, shared_input, params, sweep_output_name(dtm_base, params), resolution, crs_wkt)
+    elif use_bindings:
+        executor = process_pool(max_workers)
+        submit = lambda i, params: executor.submit(_run_with_bindings, shared_input, params, sweep_output_name(dtm_base, params), resolution)
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        submit = lambda i, params: executor.submit(
+            _run_with_cli, pdal_exe, shared_input, params, sweep_output_name(dtm_base, params), resolution,
+            os.path.join(work_dir, f"sweep_{i}.json"), register_process, unregister_process)
+    try:
+        futures = {submit(i, params): params for i, params in enumerate(combinations)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            params = futures[future]
+            label = ", ".join(f"{k}={v}" for k, v in params.items())
+            try:
+                output_tif = future.result()
+                results.append((params, output_tif))
+                log_message(log_callback, f"({done}/{len(combinations)}) {label} -> {os.path.basename(output_tif)}")
+            except Exception as e:
+                failed.append((params, e))
+                if should_stop and should_stop():
+                    break
+                log_message(log_callback, f"({done}/{len(combinations)}) [!] {label} failed: {e}")
+            if should_stop and should_stop():
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if results:
+        manifest_path = os.path.join(os.path.dirname(results[0][1]) or ".", SWEEP_MANIFEST_NAME)
+        with open(manifest_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["slope", "threshold", "window", "scalar", "dtm"])
+            for params, output_tif in sorted(results, key=lambda r: r[1]):
+                writer.writerow([params["slope"], params["threshold"], params["window"], params["scalar"], os.path.basename(output_tif)])
+        log_message(log_callback, f"Sweep manifest written: {manifest_path}")
+    return results, failed
+
+def rank_sweep(results, checkpoint_file, min_coverage=0.9, log_callback=None):
+    """
+    Scores every sweep DTM against the checkpoints of 'checkpoint_file' (Name, E, N, H) and ranks the
+    parameter sets by RMSE. DTMs that sample fewer than 'min_coverage' of the checkpoints (too few ground
+    points, holes at the checkpoints) rank after the ones that do. The ranking is written next to the
+    DTMs as a CSV and returned best first as dicts of parameters and scores.
+    """
+    checkpoints = read_checkpoints(checkpoint_file)
+    log_message(log_callback, f"\n--- Scoring {len(results)} DTM(s) against {len(checkpoints)} checkpoint(s) ---")
+    ranking = []
+    for params, output_tif in results:
+        try:
+            scores = score_surface(output_tif, checkpoints)
+        except Exception as e:
+            log_message(log_callback, f"[!] Could not score {os.path.basename(output_tif)}: {e}")
+            continue
+        ranking.append({**params, **scores, "dtm": output_tif})
+    ranking.sort(key=lambda r: (r["coverage"] < min_coverage, np.isnan(r["rmse"]), r["rmse"]))
+
+    if ranking:
+        scores_path = os.path.join(os.path.dirname(ranking[0]["dtm"]) or ".", SWEEP_SCORES_NAME)
+        with open(scores_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["rank", "slope", "threshold", "window", "scalar", "rmse", "bias", "coverage", "samples", "dtm"])
+            for rank, r in enumerate(ranking, start=1):
+                writer.writerow([rank, r["slope"], r["threshold"], r["window"], r["scalar"], f"{r['rmse']:.4f}", f"{r['bias']:.4f}", f"{r['coverage']:.3f}", r["samples"], os.path.basename(r["dtm"])])
+        for rank, r in enumerate(ranking[:5], start=1):
+            log_message(log_callback, f"  #{rank}: slope={r['slope']}, threshold={r['threshold']}, window={r['window']}, scalar={r['scalar']} "
+                               f"-> RMSE {r['rmse']:.3f}, bias {r['bias']:+.3f}, coverage {r['coverage']:.0%}")
+        log_message(log_callback, f"Sweep scores written: {scores_path}")
+    return ranking
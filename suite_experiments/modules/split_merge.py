@@ -10,6 +10,8 @@ import shutil
 from gui.base import BaseToolFrame
 from gui.widgets import Tooltip
 from core.execution import _execute_las_command
+from utils.files import write_split_manifest
+from utils.spatial_sort import spatial_sort_file
 
 class SplitMergeFrame(BaseToolFrame):
     def __init__(self, parent, controller):
@@ -394,6 +396,7 @@ class SplitMergeFrame(BaseToolFrame):
             log(f"Step 3: Splitting file into {num_tiles} buffered tiles...")
             base_filename = os.path.splitext(os.path.basename(laz_file))[0]
             last_max = min_coord
+            manifest_tiles = []
             for i, current_max in enumerate(tile_boundaries + [max_coord]):
                 min_orig, max_orig = last_max, current_max
                 min_buf = min_orig if i == 0 else min_orig - (buffer_size / 2)
@@ -403,9 +406,12 @@ class SplitMergeFrame(BaseToolFrame):
                 command = [las2las, "-i", laz_file, "-o", out_filename, f"-keep_{axis.lower()}", str(min_buf), str(max_buf), "-olaz"]
                 _execute_las_command(command, self.controller.log_frame, controller=self.controller, frame_instance=self)
                 log(f"    SUCCESS: Created {os.path.basename(out_filename)}")
+                manifest_tiles.append({"tile": i + 1, "file": os.path.basename(out_filename), "min": min_orig, "max": max_orig, "min_buffered": min_buf, "max_buffered": max_buf})
                 last_max = current_max
-            log("Step 4: Creating buffer zone WKT files...")
+            log("Step 4: Creating buffer zone WKT files and split manifest...")
             self.create_wkt_files(tile_boundaries, buffer_size, out_folder, base_filename, axis)
+            manifest_path = write_split_manifest(out_folder, {"source": laz_file, "axis": axis, "buffer": buffer_size, "tiles": manifest_tiles})
+            log(f"    SUCCESS: Created {os.path.basename(manifest_path)}")
             log("\nSplit Process Complete!")
             is_success = True
         except Exception as e:
@@ -471,6 +477,10 @@ class SplitMergeFrame(BaseToolFrame):
             merge_cmd = [lasmerge, "-i"] + clipped_files + ["-o", final_output, "-olaz"]
             log(f"    Final output will be: {os.path.basename(final_output)}")
             _execute_las_command(merge_cmd, self.controller.log_frame, controller=self.controller, frame_instance=self)
+            sort_curve = self.controller.get_spatial_sort_curve()
+            if sort_curve:
+                log("Step 4: Spatially sorting the merged file...")
+                spatial_sort_file(final_output, curve=sort_curve, log_callback=log)
             shutil.rmtree(temp_dir)
             log("    SUCCESS: Merged file created and temporary files deleted.")
             log("\nMerge Process Complete!")
@@ -0,0 +1,132 @@
+import os
+import math
+from concurrent.futures import as_completed
+
+from utils.common import log_message
+from utils.las_io import open_las, parse_crs_or_none, require_laspy, process_pool
+
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+# Graceful import for GeoPandas / Shapely
+try:
+    import geopandas as gpd
+    import shapely
+except ImportError:
+    gpd = None
+    shapely = None
+
+DEFAULT_CELL_SIZE = 10.0
+INDEX_DRIVERS = {".gpkg": "GPKG", ".shp": "ESRI Shapefile"}
+
+def _crs_label(header):
+    """Returns 'EPSG:xxxx' (or the WKT name) of the file CRS, or an empty string when none is set."""
+    crs = parse_crs_or_none(header)
+    if crs is None:
+        return ""
+    epsg = crs.to_epsg()
+    return f"EPSG:{epsg}" if epsg else crs.name
+
+def scan_tile_footprint(laz_path, cell_size=DEFAULT_CELL_SIZE):
+    """
+    Reads the header and a coarse XY occupancy grid of one file and returns its
+    footprint polygon plus the tile index attributes.
+    Only the XY and Classification layers are decompressed (LAS 1.4 point formats).
+    """
+    selection = laspy.DecompressionSelection.XY_RETURNS_CHANNEL | laspy.DecompressionSelection.CLASSIFICATION
+    with open_las(laz_path, decompression_selection=selection) as reader:
+        header = reader.header
+        min_x, min_y, min_z = header.mins
+        max_x, max_y, max_z = header.maxs
+        n_cols = max(1, int(math.ceil((max_x - min_x) / cell_size)))
+        n_rows = max(1, int(math.ceil((max_y - min_y) / cell_size)))
+        occupancy = np.zeros((n_rows, n_cols), dtype=bool)
+        class_counts = np.zeros(256, dtype=np.int64)
+
+        for points in reader.chunk_iterator(2_000_000):
+            cols = np.clip(((np.asarray(points.x) - min_x) / cell_size).astype(np.int64), 0, n_cols - 1)
+            rows = np.clip(((np.asarray(points.y) - min_y) / cell_size).astype(np.int64), 0, n_rows - 1)
+            occupancy[rows, cols] = True
+            class_counts += np.bincount(np.asarray(points.classification, dtype=np.uint8), minlength=256)
+
+        point_count = int(header.point_count)
+        crs_label = _crs_label(header)
+
+    rows, cols = np.nonzero(occupancy)
+    x0 = min_x + cols * cell_size
+    y0 = min_y + rows * cell_size
+    cells = shapely.box(x0, y0, x0 + cell_size, y0 + cell_size)
+    footprint = shapely.coverage_union_all(cells).simplify(0) if len(cells) else shapely.box(min_x, min_y, max_x, max_y)
+
+    area = float(footprint.area)
+    record = {
+        "file": os.path.basename(laz_path),
+        "path": os.path.abspath(laz_path),
+        "points": point_count,
+        "area": round(area, 3),
+        "density": round(point_count / area, 3) if area > 0 else 0.0,
+        "min_z": float(min_z),
+        "max_z": float(max_z),
+        "crs": crs_label,
+    }
+    for class_code in np.nonzero(class_counts)[0]:
+        record[f"class_{class_code}"] = int(class_counts[class_code])
+    return record, footprint
+
+def build_tile_index(input_files, output_path, cell_size=DEFAULT_CELL_SIZE, max_workers=None, log_callback=None):
+    """
+    Builds a tile index layer (GeoPackage or Shapefile) with one footprint polygon per input file.
+    Files are scanned in parallel worker processes.
+    """
+    if gpd is None:
+        raise ImportError("GeoPandas is not installed. Please run 'pip install geopandas' to use this tool.")
+    require_laspy()
+
+    driver = INDEX_DRIVERS.get(os.path.splitext(output_path)[1].lower())
+    if driver is None:
+        raise ValueError("The tile index must be written as a .gpkg or .shp file.")
+
+    total_files = len(input_files)
+    log_message(log_callback, f"--- Building tile index for {total_files} file(s) (cell size: {cell_size}) ---")
+
+    records, footprints, failed = [], [], []
+    with process_pool(max_workers) as executor:
+        futures = {executor.submit(scan_tile_footprint, path, cell_size): path for path in input_files}
+        for i, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                record, footprint = future.result()
+                records.append(record)
+                footprints.append(footprint)
+                log_message(log_callback, f"({i}/{total_files}) Indexed: {os.path.basename(path)} ({record['points']:,} points)")
+            except Exception as e:
+                failed.append(path)
+                log_message(log_callback, f"({i}/{total_files}) [!] Failed to index {os.path.basename(path)}: {e}")
+
+    if not records:
+        raise RuntimeError("None of the input files could be indexed.")
+
+    # Sort features by path and give every feature the full set of class columns
+    order = sorted(range(len(records)), key=lambda i: records[i]["path"])
+    records = [records[i] for i in order]
+    footprints = [footprints[i] for i in order]
+    class_columns = sorted({key for r in records for key in r if key.startswith("class_")}, key=lambda k: int(k.split("_")[1]))
+    for record in records:
+        for column in class_columns:
+            record.setdefault(column, 0)
+
+    crs_labels = sorted({r["crs"] for r in records if r["crs"]})
+    layer_crs = crs_labels[0] if len(crs_labels) == 1 and crs_labels[0].startswith("EPSG:") else None
+    if len(crs_labels) > 1:
+        log_message(log_callback, "Warning: Input files use different CRSs. The tile index is written without a layer CRS.")
+
+    gdf = gpd.GeoDataFrame(records, geometry=footprints, crs=layer_crs)
+    gdf.to_file(output_path, driver=driver)
+
+    log_message(log_callback, f"Tile index complete. {len(records)} footprint(s) written to: {output_path}")
+    return output_path, failed
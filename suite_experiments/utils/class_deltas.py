@@ -0,0 +1,113 @@
+import os
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SIDECAR_SUFFIX = ".cdelta.npz"
+
+def sidecar_path(cloud_path):
+    """Returns the path of the classification delta sidecar that belongs to a point cloud."""
+    return os.fspath(cloud_path) + SIDECAR_SUFFIX
+
+class ClassDeltas:
+    """
+    Classification edits of one point cloud, stored as runs of consecutive point indices that take the
+    same new class (start, length, class). A reclass that touches a few thousand points costs a few
+    kilobytes on disk instead of a full copy of the cloud; the runs are applied to Classification
+    when the cloud is read and merged into a real file only on demand.
+    Only the in-process readers apply them (utils.las_io.iter_chunks and read_dimensions, so also the
+    point cache, exports, spatial sort and the EPT builder); PDAL and LAStools steps read the raw file,
+    so merge the deltas before handing an edited cloud to them.
+    """
+    def __init__(self, point_count, starts=None, lengths=None, classes=None):
+        self.point_count = int(point_count)
+        self.starts = np.asarray(starts if starts is not None else [], dtype=np.uint64)
+        self.lengths = np.asarray(lengths if lengths is not None else [], dtype=np.uint32)
+        self.classes = np.asarray(classes if classes is not None else [], dtype=np.uint8)
+        self._ends = self.starts + self.lengths
+
+    @classmethod
+    def from_changes(cls, point_count, indices, classes):
+        """Run-length encodes (point index, new class) pairs; a later pair for the same index wins."""
+        indices = np.asarray(indices, dtype=np.uint64)
+        classes = np.asarray(classes, dtype=np.uint8)
+        if not len(indices):
+            return cls(point_count)
+        if indices.max() >= point_count:
+            raise ValueError("A classification delta points past the end of the point cloud.")
+        # Keep the last edit of every index, in index order
+        reversed_unique, first = np.unique(indices[::-1], return_index=True)
+        indices, classes = reversed_unique, classes[::-1][first]
+        breaks = np.nonzero((np.diff(indices) != 1) | (np.diff(classes) != 0))[0] + 1
+        run_starts = np.concatenate(([0], breaks))
+        run_lengths = np.diff(np.concatenate((run_starts, [len(indices)])))
+        return cls(point_count, indices[run_starts], run_lengths, classes[run_starts])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(int(data["point_count"]), data["starts"], data["lengths"], data["classes"])
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, point_count=np.uint64(self.point_count), starts=self.starts, lengths=self.lengths, classes=self.classes)
+        return path
+
+    def __len__(self):
+        """Number of edited points."""
+        return int(self.lengths.sum())
+
+    def changes(self):
+        """Expands the runs back to (point indices, classes)."""
+        if not len(self.starts):
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8)
+        lengths = self.lengths.astype(np.int64)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(self.starts, lengths) + offsets.astype(np.uint64), np.repeat(self.classes, lengths)
+
+    def merged(self, indices, classes):
+        """Returns these deltas with a newer edit stacked on top (the newer class wins)."""
+        old_indices, old_classes = self.changes()
+        return ClassDeltas.from_changes(self.point_count, np.concatenate((old_indices, np.asarray(indices, dtype=np.uint64))),
+                                        np.concatenate((old_classes, np.asarray(classes, dtype=np.uint8))))
+
+    def apply(self, classification, start=0):
+        """
+        Returns 'classification' (the values of points start .. start + len) with the edits applied.
+        Only the runs overlapping that range are expanded, so chunked reads stay cheap.
+        """
+        stop = start + len(classification)
+        first = np.searchsorted(self._ends, start, side='right')
+        last = np.searchsorted(self.starts, stop, side='left')
+        if first >= last:
+            return classification
+        result = np.array(classification, copy=True)
+        run_starts = np.maximum(self.starts[first:last].astype(np.int64), start)
+        run_ends = np.minimum(self._ends[first:last].astype(np.int64), stop)
+        lengths = run_ends - run_starts
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        result[np.repeat(run_starts - start, lengths) + offsets] = np.repeat(self.classes[first:last], lengths)
+        return result
+
+def load_sidecar(cloud_path, point_count=None):
+    """Returns the ClassDeltas of a cloud, or None when it has no sidecar. A stale sidecar is an error."""
+    path = sidecar_path(cloud_path)
+    if not os.path.isfile(path):
+        return None
+    deltas = ClassDeltas.load(path)
+    if point_count is not None and deltas.point_count != int(point_count):
+        raise ValueError(f"'{os.path.basename(path)}' was made for {deltas.point_count:,} points, but the cloud has {int(point_count):,}. Delete the stale sidecar.")
+    return deltas
+
+def record_changes(cloud_path, point_count, indices, classes):
+    """Stacks new edits on the cloud's sidecar (creating it when needed) and returns the sidecar path."""
+    deltas = load_sidecar(cloud_path, point_count) or ClassDeltas(point_count)
+    path = sidecar_path(cloud_path)
+    # Write next to the target and swap, so an interrupted save never leaves half a sidecar
+    temp_path = path + ".tmp"
+    deltas.merged(indices, classes).save(temp_path)
+    os.replace(temp_path, path)
+    return path
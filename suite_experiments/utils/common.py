@@ -0,0 +1,20 @@
+import importlib.util
+
+def log_message(callback, message):
+    """Helper to send messages to the GUI log or print to console."""
+    if callback:
+        callback(message)
+    else:
+        print(message)
+
+def key_from_label(mapping, label, default):
+    """Maps a UI label back to its key in a {key: label} dict, or 'default' when no entry matches."""
+    for key, key_label in mapping.items():
+        if key_label == label:
+            return key
+    return default
+
+def require_scipy(purpose="this tool"):
+    """Raises a readable error when NumPy / SciPy are unavailable."""
+    if importlib.util.find_spec("numpy") is None or importlib.util.find_spec("scipy") is None:
+        raise ImportError(f"NumPy / SciPy are not installed. Please run 'pip install numpy scipy' to use {purpose}.")
@@ -1,4 +1,7 @@
 import os
+import json
+
+SPLIT_MANIFEST_NAME = "split_manifest.json"
 
 def get_output_filename(input_file, suffix):
     """Generates a unique output filename with a given suffix."""
@@ -20,4 +23,19 @@ def get_laz_output_filename(input_file, suffix):
     while os.path.exists(output_file):
         counter += 1
         output_file = f"{file_name_without_ext}{suffix}_{counter}.laz"
-    return output_file
\ No newline at end of file
+    return output_file
+
+def write_split_manifest(folder, manifest):
+    """Writes the tile layout of a split run next to its tiles and returns the manifest path."""
+    manifest_path = os.path.join(folder, SPLIT_MANIFEST_NAME)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    return manifest_path
+
+def read_split_manifest(manifest_path):
+    """Loads a split manifest written by write_split_manifest."""
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    if "axis" not in manifest or not manifest.get("tiles"):
+        raise ValueError(f"'{os.path.basename(manifest_path)}' is not a valid split manifest.")
+    return manifest
@@ -0,0 +1,92 @@
+import os
+import atexit
+import shutil
+import tempfile
+import threading
+
+INTERMEDIATE_POLICIES = ("laz", "las", "memory")
+
+class IntermediateStore:
+    """
+    Decides where intermediate point clouds of a multi-stage workflow live.
+      - 'laz':    compressed files at their usual location (previous behaviour)
+      - 'las':    uncompressed files in a private folder under the scratch directory
+      - 'memory': in-process stages hand over point arrays directly (the one-pass zone
+                  workflow keeps its record copy and, with the built-in SMRF, its zone subsets
+                  in memory); stages that run external tools fall back to uncompressed files
+                  in the scratch folder
+    Everything the store creates is removed on close() (or at interpreter exit).
+    """
+    def __init__(self, policy="laz", scratch_dir=None):
+        if policy not in INTERMEDIATE_POLICIES:
+            raise ValueError(f"Unknown intermediate storage policy: '{policy}'.")
+        self.policy = policy
+        self.scratch_dir = scratch_dir or None
+        if self.scratch_dir:
+            os.makedirs(self.scratch_dir, exist_ok=True)
+        self._work_dir = None
+        self._paths = []
+        self._memory = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    @property
+    def work_dir(self):
+        """Private per-run folder, created on first use."""
+        with self._lock:
+            if self._work_dir is None:
+                self._work_dir = tempfile.mkdtemp(prefix="intermediates_", dir=self.scratch_dir)
+            return self._work_dir
+
+    @property
+    def compressed(self):
+        return self.policy == "laz"
+
+    def path(self, name, legacy_path=None):
+        """
+        Returns the file an intermediate named 'name' should be written to.
+        Under the 'laz' policy this is 'legacy_path' (or a .laz file in the work folder).
+        """
+        if self.policy == "laz" and legacy_path:
+            path = legacy_path
+        else:
+            extension = ".laz" if self.policy == "laz" else ".las"
+            path = os.path.join(self.work_dir, f"{name}{extension}")
+        with self._lock:
+            self._paths.append(path)
+        return path
+
+    def put(self, name, points):
+        """Keeps an in-process intermediate (e.g. a laspy LasData) for the next stage."""
+        self._memory[name] = points
+
+    def get(self, name, default=None):
+        return self._memory.get(name, default)
+
+    def pop(self, name, default=None):
+        return self._memory.pop(name, default)
+
+    def keeps_in_memory(self):
+        return self.policy == "memory"
+
+    def close(self):
+        """Removes every intermediate created through this store."""
+        with self._lock:
+            paths, self._paths = self._paths, []
+            work_dir, self._work_dir = self._work_dir, None
+        self._memory.clear()
+        atexit.unregister(self.close)
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
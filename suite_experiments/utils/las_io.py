@@ -0,0 +1,146 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Graceful import for laspy / NumPy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+DEFAULT_CHUNK_SIZE = 2_000_000
+
+# lazrs sizes its rayon pool from this variable; keeping the setting in the environment carries it into worker processes
+LAZ_THREADS_ENV = "RAYON_NUM_THREADS"
+
+def require_laspy():
+    """Raises a readable error when the in-process point cloud readers are unavailable."""
+    if laspy is None or np is None:
+        raise ImportError("laspy is not installed. Please run 'pip install laspy[lazrs]' to use this tool.")
+
+def parse_crs_or_none(header):
+    """Returns the CRS of a LAS header, or None when it has none or it cannot be parsed."""
+    try:
+        return header.parse_crs()
+    except Exception:
+        return None
+
+def configure_laz_threads(threads):
+    """
+    Sets the number of LAZ codec threads (0 = all cores, 1 = single-threaded backend).
+    lazrs sizes its thread pool on first use, so this must run before any LAZ file is opened;
+    worker processes inherit the setting through RAYON_NUM_THREADS.
+    """
+    threads = max(0, int(threads))
+    if threads:
+        os.environ[LAZ_THREADS_ENV] = str(threads)
+    else:
+        os.environ.pop(LAZ_THREADS_ENV, None)
+
+def laz_threads():
+    """Returns the configured number of LAZ codec threads (0 = all cores)."""
+    try:
+        return max(0, int(os.environ.get(LAZ_THREADS_ENV, 0)))
+    except ValueError:
+        return 0
+
+def laz_backend():
+    """Returns the LAZ backend to use: parallel lazrs when available and allowed, otherwise single-threaded."""
+    if laspy is None:
+        return None
+    if laz_threads() != 1 and laspy.LazBackend.LazrsParallel.is_available():
+        return laspy.LazBackend.LazrsParallel
+    for backend in (laspy.LazBackend.Lazrs, laspy.LazBackend.Laszip):
+        if backend.is_available():
+            return backend
+    return None
+
+def process_pool(max_workers=None):
+    """
+    Returns the process pool every in-process tool uses. The workers are spawned, not forked: the lazrs
+    thread pool (and any other thread) of a parent that already read LAZ does not survive a fork and
+    would hang them. Unless a thread count is configured, the cores are shared between the workers
+    instead of every worker starting an all-core codec pool.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    threads = laz_threads() or max(1, (os.cpu_count() or 1) // max_workers)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=configure_laz_threads, initargs=(threads,))
+
+def open_las(path, mode='r', header=None, decompression_selection=None):
+    """Opens a LAS/LAZ file for reading or writing with laspy, using the configured LAZ backend."""
+    require_laspy()
+    path = os.fspath(path)
+    backend = laz_backend()
+    if mode == 'r':
+        if decompression_selection is not None:
+            return laspy.open(path, mode='r', laz_backend=backend, decompression_selection=decompression_selection)
+        return laspy.open(path, mode='r', laz_backend=backend)
+    return laspy.open(path, mode='w', header=header, laz_backend=backend)
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, decompression_selection=None, apply_deltas=True):
+    """
+    Yields the points of a LAS/LAZ file in chunks of at most 'chunk_size' points.
+    Classification edits from the file's delta sidecar (see utils.class_deltas) are applied on the fly.
+    """
+    from utils.class_deltas import load_sidecar
+    with open_las(path, decompression_selection=decompression_selection) as reader:
+        deltas = load_sidecar(path, reader.header.point_count) if apply_deltas else None
+        start = 0
+        for points in reader.chunk_iterator(chunk_size):
+            if deltas is not None:
+                points.classification = deltas.apply(np.asarray(points.classification), start)
+            start += len(points)
+            yield points
+
+def list_point_cloud_files(directory, extensions=('.laz', '.las')):
+    """Returns the sorted LAS/LAZ files found directly inside a folder."""
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.lower().endswith(extensions))
+
+def read_dimensions(path, dimensions, point_cache=None):
+    """
+    Returns a dict of array-likes for the requested dimensions ('x', 'y', 'z' are scaled).
+    Uncompressed LAS files are memory-mapped directly; for LAZ files with a PointCache given,
+    arrays are memory-mapped from the cache instead of decoded.
+    """
+    require_laspy()
+    # Uncompressed LAS is mapped in place; the cache only pays off for LAZ
+    from utils.las_memmap import MemmapLasReader, can_memmap
+    if can_memmap(path):
+        reader = MemmapLasReader(path)
+        return _with_deltas(path, {d: reader[d] for d in dimensions})
+    if point_cache is not None:
+        cloud = point_cache.load(path)
+        if all(d in cloud for d in dimensions):
+            return _with_deltas(path, {d: getattr(cloud, d) if d in ("x", "y", "z") else cloud[d] for d in dimensions})
+    with open_las(path) as reader:
+        las_data = reader.read()
+    return _with_deltas(path, {d: np.asarray(las_data[d]) for d in dimensions})
+
+def _with_deltas(path, arrays):
+    """Applies the file's classification delta sidecar, if any, to a read_dimensions result."""
+    if "classification" not in arrays:
+        return arrays
+    from utils.class_deltas import load_sidecar
+    classification = np.asarray(arrays["classification"])
+    deltas = load_sidecar(path, len(classification))
+    if deltas is not None:
+        arrays["classification"] = deltas.apply(classification)
+    return arrays
+
+def z_range_from_histogram(z_coords, min_count=100):
+    """Returns the first and last 1-unit Z bins holding at least 'min_count' points, or (None, None)."""
+    if len(z_coords) == 0:
+        return None, None
+    min_z, max_z = int(z_coords.min()), int(z_coords.max()) + 1
+    n_bins = max_z - min_z
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for start in range(0, len(z_coords), DEFAULT_CHUNK_SIZE):
+        bins = np.floor(np.asarray(z_coords[start:start + DEFAULT_CHUNK_SIZE])).astype(np.int64) - min_z
+        counts += np.bincount(bins[(bins >= 0) & (bins < n_bins)], minlength=n_bins)
+    valid = np.nonzero(counts >= min_count)[0]
+    if len(valid) == 0:
+        return None, None
+    return int(min_z + valid[0]), int(min_z + valid[-1])
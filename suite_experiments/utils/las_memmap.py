@@ -0,0 +1,61 @@
+import os
+
+from utils.las_io import open_las, require_laspy
+
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+def can_memmap(path):
+    """Returns True when the file is an uncompressed LAS whose point records can be mapped directly."""
+    if not os.fspath(path).lower().endswith(".las"):
+        return False
+    with open_las(path) as reader:
+        return not reader.header.are_points_compressed
+
+class MemmapLasReader:
+    """
+    Zero-copy reader for uncompressed LAS files.
+    The point data records are np.memmap'ed with the structured dtype of the point format,
+    so reading a dimension only touches the page cache. 'x', 'y' and 'z' are lazily scaled views.
+    """
+    def __init__(self, path):
+        require_laspy()
+        self.path = os.fspath(path)
+        with open_las(self.path) as reader:
+            self.header = reader.header
+        if self.header.are_points_compressed:
+            raise ValueError(f"'{os.path.basename(self.path)}' is compressed and cannot be memory-mapped.")
+
+        self.point_format = self.header.point_format
+        self.point_count = int(self.header.point_count)
+        self._array = np.memmap(
+            self.path, dtype=self.point_format.dtype(), mode='r',
+            offset=self.header.offset_to_point_data, shape=(self.point_count,)
+        )
+        self.points = laspy.ScaleAwarePointRecord(self._array, self.point_format, self.header.scales, self.header.offsets)
+
+    def __getitem__(self, name):
+        return self.points[name]
+
+    def __contains__(self, name):
+        return name in self.point_format.dimension_names or name in ("x", "y", "z")
+
+    def __len__(self):
+        return self.point_count
+
+    @property
+    def x(self):
+        return self.points.x
+
+    @property
+    def y(self):
+        return self.points.y
+
+    @property
+    def z(self):
+        return self.points.z
@@ -0,0 +1,95 @@
+from utils.common import key_from_label
+
+# A profile chooses the point format, which dimensions / extra bytes and classes survive and the coordinate precision
+OUTPUT_PROFILES = {
+    "full": {
+        "label": "Full (keep all dimensions)",
+        "dataformat_id": None,    # Keep the source point format and LAS version
+        "minor_version": None,
+        "forward": "all",
+        "extra_dims": "all",
+        "scale": None,            # Keep the source / caller precision
+        "zero_user_data": False,
+        "keep_classes": None,     # Keep every class
+    },
+    "visual_rgb": {
+        "label": "Visual RGB",
+        "dataformat_id": 2,       # XYZ, intensity, returns, class, RGB (no GPS time)
+        "minor_version": 2,
+        "forward": "header",
+        "extra_dims": None,
+        "scale": 0.01,
+        "zero_user_data": True,
+        "keep_classes": None,
+    },
+    "ground_dtm": {
+        "label": "Ground-only DTM input",
+        "dataformat_id": 0,       # XYZ, intensity, returns, class
+        "minor_version": 2,
+        "forward": "header",
+        "extra_dims": None,
+        "scale": 0.01,
+        "zero_user_data": True,
+        "keep_classes": [2],      # Ground only
+    },
+}
+DEFAULT_OUTPUT_PROFILE = "full"
+
+def get_output_profile(name):
+    """Returns the profile definition, falling back to 'full' for unknown names."""
+    return OUTPUT_PROFILES.get(name, OUTPUT_PROFILES[DEFAULT_OUTPUT_PROFILE])
+
+def profile_labels(allow_class_filter=True):
+    """Returns the UI labels of the profiles; tools that must keep every point leave out the class-filtering ones."""
+    return [p["label"] for p in OUTPUT_PROFILES.values() if allow_class_filter or not p["keep_classes"]]
+
+def profile_name_from_label(label):
+    """Maps a UI label back to its profile key."""
+    return key_from_label({name: profile["label"] for name, profile in OUTPUT_PROFILES.items()}, label, DEFAULT_OUTPUT_PROFILE)
+
+def pdal_writer_options(profile_name, scale=None):
+    """
+    Returns the writers.las options of a profile (without 'type' / 'filename').
+    A 'scale' required by the caller (e.g. survey precision) wins over the profile's precision.
+    """
+    profile = get_output_profile(profile_name)
+    options = {"forward": profile["forward"]}
+    # Without an explicit format / version, forward=all carries the source's over
+    if profile["dataformat_id"] is not None:
+        options["dataformat_id"] = profile["dataformat_id"]
+        options["minor_version"] = profile["minor_version"]
+    if profile["extra_dims"]:
+        options["extra_dims"] = profile["extra_dims"]
+    scale = scale or profile["scale"]
+    if scale:
+        options.update({
+            "scale_x": scale, "scale_y": scale, "scale_z": scale,
+            "offset_x": "auto", "offset_y": "auto", "offset_z": "auto",
+        })
+    return options
+
+def pdal_profile_filters(profile_name, allow_class_filter=True):
+    """Returns the PDAL filter stages a profile needs before the writer."""
+    profile = get_output_profile(profile_name)
+    stages = []
+    if allow_class_filter and profile["keep_classes"]:
+        stages.append({"type": "filters.range", "limits": ", ".join(f"Classification[{c}:{c}]" for c in profile["keep_classes"])})
+    if profile["zero_user_data"]:
+        stages.append({"type": "filters.assign", "assignment": "UserData[:]=0"})
+    return stages
+
+def las2las_profile_args(profile_name, allow_class_filter=True):
+    """Returns the las2las arguments that apply a profile (empty for 'full')."""
+    profile = get_output_profile(profile_name)
+    if profile["dataformat_id"] is None:
+        return []
+    # Setting a standard point type drops GPS time / RGB and any extra bytes
+    args = ["-set_point_type", str(profile["dataformat_id"]), "-set_version", f"1.{profile['minor_version']}"]
+    if allow_class_filter and profile["keep_classes"]:
+        args += ["-keep_class", *(str(c) for c in profile["keep_classes"])]
+    if profile["zero_user_data"]:
+        args += ["-set_user_data", "0"]
+    if profile["scale"]:
+        scale = str(profile["scale"])
+        args += ["-rescale", scale, scale, scale]
+    return args
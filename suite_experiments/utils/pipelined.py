@@ -0,0 +1,82 @@
+import queue
+import threading
+
+_DONE = object()
+
+class Stage:
+    """One step of a pipelined batch: 'func(item, value)' returns the value handed to the next stage."""
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+def run_pipelined(items, stages, queue_size=2, should_stop=None, on_item_done=None, on_item_failed=None):
+    """
+    Runs every item through 'stages' with the stages working concurrently on different items.
+    Stages are connected by bounded queues ('queue_size'), so a fast stage (e.g. reading the next
+    file) runs ahead of a slow one (e.g. rasterizing the current file) by at most a few items and
+    throughput is set by the slowest stage instead of the sum of all of them.
+    An item that fails in one stage is reported through 'on_item_failed(item, stage_name, error)' and
+    skipped by the following stages; 'on_item_done(item, value)' is called for items that finish.
+    Returns the lists of (item, value) completed and (item, stage_name, error) failed.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    completed, failed = [], []
+    lock = threading.Lock()
+
+    def stopped():
+        return bool(should_stop and should_stop())
+
+    def worker(index, stage):
+        inbox, outbox = queues[index], queues[index + 1]
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                # Let the other workers of this stage see the marker too
+                inbox.put(_DONE)
+                return
+            item, value = entry
+            if stopped():
+                continue
+            try:
+                value = stage.func(item, value)
+            except Exception as e:
+                with lock:
+                    failed.append((item, stage.name, e))
+                if on_item_failed:
+                    on_item_failed(item, stage.name, e)
+                continue
+            outbox.put((item, value))
+
+    def collect():
+        while True:
+            entry = queues[-1].get()
+            if entry is _DONE:
+                return
+            item, value = entry
+            with lock:
+                completed.append((item, value))
+            if on_item_done:
+                on_item_done(item, value)
+
+    collector = threading.Thread(target=collect, daemon=True, name="Pipelined_collect")
+    collector.start()
+    stage_threads = []
+    for index, stage in enumerate(stages):
+        threads = [threading.Thread(target=worker, args=(index, stage), daemon=True, name=f"Pipelined_{stage.name}_{n}") for n in range(stage.workers)]
+        for thread in threads:
+            thread.start()
+        stage_threads.append(threads)
+
+    for item in items:
+        if stopped():
+            break
+        queues[0].put((item, None))
+    queues[0].put(_DONE)
+    # Close each stage once all of its workers are done, then pass the marker downstream
+    for index, threads in enumerate(stage_threads):
+        for thread in threads:
+            thread.join()
+        queues[index + 1].put(_DONE)
+    collector.join()
+    return completed, failed
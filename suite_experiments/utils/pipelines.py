@@ -0,0 +1,25 @@
+def denoise_products_pipeline(input_path, z_limits, denoised_path, dsm_path, stat_path, resolution=1.0, keep_noise=False):
+    """
+    Step 1 as one PDAL pipeline: the input is read once, Z-range filtered and reset to class 0, and
+    that single stream feeds the denoised LAZ, the DSM (max) and the STAT raster (min,count).
+    With 'keep_noise', points already classified as noise (7) keep their class in the denoised LAZ
+    and are left out of the rasters.
+    """
+    pipeline = [
+        str(input_path),
+        {"type": "filters.range", "limits": z_limits},
+    ]
+    if keep_noise:
+        pipeline += [
+            {"type": "filters.assign", "value": "Classification = 0 WHERE Classification != 7", "tag": "denoised"},
+            {"type": "filters.range", "limits": "Classification![7:7]", "inputs": ["denoised"], "tag": "raster_input"},
+        ]
+        raster_input = "raster_input"
+    else:
+        pipeline.append({"type": "filters.assign", "assignment": "Classification[:]=0", "tag": "denoised"})
+        raster_input = "denoised"
+    return pipeline + [
+        {"type": "writers.las", "filename": str(denoised_path), "minor_version": "4", "inputs": ["denoised"]},
+        {"type": "writers.gdal", "filename": str(dsm_path), "resolution": resolution, "output_type": "max", "inputs": [raster_input]},
+        {"type": "writers.gdal", "filename": str(stat_path), "resolution": resolution, "output_type": "min,count", "inputs": [raster_input]},
+    ]
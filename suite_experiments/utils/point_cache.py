@@ -0,0 +1,190 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from utils.las_io import open_las, require_laspy, DEFAULT_CHUNK_SIZE
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CACHE_DIMENSIONS = ("X", "Y", "Z", "intensity", "classification", "return_number", "number_of_returns", "red", "green", "blue")
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "lidar_point_cache")
+META_FILE = "meta.json"
+
+class CachedPointCloud:
+    """Read-only, memory-mapped view of one cached point cloud."""
+    def __init__(self, entry_dir, meta):
+        self.entry_dir = entry_dir
+        self.meta = meta
+        self.point_count = meta["point_count"]
+        self.scales = meta["scales"]
+        self.offsets = meta["offsets"]
+        self.dimensions = tuple(meta["dimensions"])
+        self._arrays = {}
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self.dimensions:
+                raise KeyError(f"Dimension '{name}' is not cached for this file.")
+            self._arrays[name] = np.load(os.path.join(self.entry_dir, f"{name}.npy"), mmap_mode='r')
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self.dimensions or name in ("x", "y", "z")
+
+    # Scaled coordinates are computed on access from the raw integer arrays
+    @property
+    def x(self):
+        return self["X"] * self.scales[0] + self.offsets[0]
+
+    @property
+    def y(self):
+        return self["Y"] * self.scales[1] + self.offsets[1]
+
+    @property
+    def z(self):
+        return self["Z"] * self.scales[2] + self.offsets[2]
+
+class PointCache:
+    """
+    Opt-in on-disk cache that decompresses a LAS/LAZ file once into per-dimension .npy files.
+    Entries are invalidated when the source mtime/size changes and evicted least-recently-used
+    once the cache grows beyond 'max_bytes'.
+    """
+    def __init__(self, cache_dir=None, max_bytes=20 * 1024**3):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, source_path):
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(source_path)).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, key)
+
+    @staticmethod
+    def _source_signature(source_path):
+        stat = os.stat(source_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, META_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _is_valid(self, meta, source_path):
+        if not meta:
+            return False
+        mtime_ns, size = self._source_signature(source_path)
+        # Entries built before a dimension was added to CACHE_DIMENSIONS are rebuilt
+        return meta.get("mtime_ns") == mtime_ns and meta.get("size") == size and meta.get("cached") == list(CACHE_DIMENSIONS)
+
+    def load(self, source_path, log_callback=None):
+        """Returns a CachedPointCloud for the file, decompressing it into the cache on a miss."""
+        require_laspy()
+        entry_dir = self._entry_dir(source_path)
+        with self._lock:
+            meta = self._read_meta(entry_dir)
+            if self._is_valid(meta, source_path):
+                os.utime(os.path.join(entry_dir, META_FILE))  # Mark as recently used
+                if log_callback:
+                    log_callback(f"Point cache hit: {os.path.basename(source_path)}")
+                return CachedPointCloud(entry_dir, meta)
+
+            if log_callback:
+                log_callback(f"Point cache miss: decompressing {os.path.basename(source_path)} into the cache...")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            meta = self._build_entry(source_path, entry_dir)
+            self._evict(keep=entry_dir)
+            return CachedPointCloud(entry_dir, meta)
+
+    def _build_entry(self, source_path, entry_dir):
+        mtime_ns, size = self._source_signature(source_path)
+        build_dir = tempfile.mkdtemp(prefix="building_", dir=self.cache_dir)
+        try:
+            with open_las(source_path) as reader:
+                header = reader.header
+                point_count = int(header.point_count)
+                available = set(header.point_format.dimension_names)
+                dimensions = [d for d in CACHE_DIMENSIONS if d in available]
+
+                arrays = {}
+                for points in reader.chunk_iterator(DEFAULT_CHUNK_SIZE):
+                    if not arrays:
+                        for d in dimensions:
+                            dtype = np.asarray(points[d]).dtype
+                            arrays[d] = np.lib.format.open_memmap(os.path.join(build_dir, f"{d}.npy"), mode='w+', dtype=dtype, shape=(point_count,))
+                        start = 0
+                    stop = start + len(points)
+                    for d in dimensions:
+                        arrays[d][start:stop] = np.asarray(points[d])
+                    start = stop
+
+                nbytes = 0
+                for d in dimensions:
+                    if d in arrays:
+                        arrays[d].flush()
+                        nbytes += arrays[d].nbytes
+                arrays.clear()
+
+                meta = {
+                    "source": os.path.abspath(source_path),
+                    "mtime_ns": mtime_ns,
+                    "size": size,
+                    "point_count": point_count,
+                    "scales": [float(v) for v in header.scales],
+                    "offsets": [float(v) for v in header.offsets],
+                    "dimensions": dimensions if point_count else [],
+                    "cached": list(CACHE_DIMENSIONS),
+                    "nbytes": nbytes,
+                }
+            with open(os.path.join(build_dir, META_FILE), 'w') as f:
+                json.dump(meta, f, indent=4)
+            os.replace(build_dir, entry_dir)
+            return meta
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, META_FILE)
+            if os.path.isfile(meta_path):
+                meta = self._read_meta(entry_dir) or {}
+                entries.append((os.path.getmtime(meta_path), meta.get("nbytes", 0), entry_dir))
+        return entries
+
+    def _evict(self, keep=None):
+        """Removes least-recently-used entries until the cache fits in 'max_bytes'."""
+        entries = sorted(self._entries())
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for _, nbytes, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= nbytes
+
+    def invalidate(self, source_path):
+        """Drops the cached entry of a single source file."""
+        with self._lock:
+            shutil.rmtree(self._entry_dir(source_path), ignore_errors=True)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def size_bytes(self):
+        return sum(nbytes for _, nbytes, _ in self._entries())
@@ -0,0 +1,122 @@
+# Graceful import for NumPy / pandas / rasterio
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+try:
+    import rasterio
+    from rasterio.transform import from_origin
+except ImportError:
+    rasterio = None
+
+def read_checkpoints(path):
+    """
+    Reads a checkpoint CSV in the GCP layout used by the Georeference tool (Name, E, N, H, ...).
+    Only the first four columns are used; extra columns (e.g. X, Y, Z) are ignored.
+    """
+    if pd is None:
+        raise ImportError("pandas is not installed. Please run 'pip install pandas' to use this tool.")
+    df = pd.read_csv(path, header=0)
+    if df.shape[1] < 4:
+        raise ValueError("The checkpoint CSV must contain at least the columns: Name, E, N, H")
+    df = df.iloc[:, :4]
+    df.columns = ['Name', 'E', 'N', 'H']
+    df[['E', 'N', 'H']] = df[['E', 'N', 'H']].apply(pd.to_numeric, errors='coerce')
+    df = df.dropna(subset=['E', 'N', 'H'])
+    if df.empty:
+        raise ValueError("The checkpoint CSV contains no valid points.")
+    return df.reset_index(drop=True)
+
+def bilinear_sample(band, transform, x, y, nodata=None):
+    """
+    Samples 'band' at world coordinates (x, y) by bilinear interpolation between the four surrounding
+    pixel centres. Points off the raster or next to a nodata / NaN cell are returned as NaN.
+    """
+    band = np.asarray(band, dtype=np.float64)
+    inverse = ~transform
+    col, row = inverse * (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    # Fractional position relative to pixel centres
+    col, row = np.asarray(col) - 0.5, np.asarray(row) - 0.5
+    c0, r0 = np.floor(col).astype(np.int64), np.floor(row).astype(np.int64)
+    dc, dr = col - c0, row - r0
+    height, width = band.shape
+
+    values = np.full(len(col), np.nan)
+    inside = (c0 >= 0) & (r0 >= 0) & (c0 + 1 < width) & (r0 + 1 < height)
+    if not inside.any():
+        return values
+    c0, r0, dc, dr = c0[inside], r0[inside], dc[inside], dr[inside]
+    corners = np.stack([band[r0, c0], band[r0, c0 + 1], band[r0 + 1, c0], band[r0 + 1, c0 + 1]])
+    if nodata is not None:
+        corners[corners == nodata] = np.nan
+    top = corners[0] * (1 - dc) + corners[1] * dc
+    bottom = corners[2] * (1 - dc) + corners[3] * dc
+    values[inside] = top * (1 - dr) + bottom * dr
+    return values
+
+def sample_raster(path, x, y, band_index=1):
+    """Bilinear samples of one band of a GeoTIFF at (x, y); NaN where the raster has no data."""
+    if rasterio is None:
+        raise ImportError("rasterio is not installed. Please run 'pip install rasterio' to use this tool.")
+    with rasterio.open(path) as src:
+        return bilinear_sample(src.read(band_index), src.transform, x, y, nodata=src.nodata)
+
+def score_surface(path, checkpoints):
+    """Returns RMSE, bias (mean DTM - checkpoint), coverage (share of checkpoints sampled) and sample count."""
+    sampled = sample_raster(path, checkpoints['E'].to_numpy(), checkpoints['N'].to_numpy())
+    valid = ~np.isnan(sampled)
+    residuals = sampled[valid] - checkpoints['H'].to_numpy()[valid]
+    count = int(valid.sum())
+    return {
+        "rmse": float(np.sqrt(np.mean(residuals ** 2))) if count else float("nan"),
+        "bias": float(np.mean(residuals)) if count else float("nan"),
+        "coverage": count / len(checkpoints),
+        "samples": count,
+    }
+
+def write_mean_raster(x, y, z, path, resolution, crs=None, nodata=-9999.0, radius=None):
+    """
+    Writes a north-up GeoTIFF holding the mean Z per cell, like PDAL's writers.gdal with output_type
+    'mean': every point counts towards each cell whose centre lies within 'radius' (default, as in
+    writers.gdal, resolution * sqrt(2)). Cells without a point in reach are nodata.
+    """
+    if rasterio is None:
+        raise ImportError("rasterio is not installed. Please run 'pip install rasterio' to use this tool.")
+    x, y, z = (np.asarray(a, dtype=np.float64) for a in (x, y, z))
+    if len(x) == 0:
+        raise ValueError("No points to rasterize.")
+    radius = resolution * np.sqrt(2) if radius is None else radius
+    west = np.floor(x.min() / resolution) * resolution
+    north = np.ceil(y.max() / resolution) * resolution
+    if north == y.max():
+        north += resolution
+    width = int((x.max() - west) // resolution) + 1
+    height = int((north - y.min()) // resolution) + 1
+    # Position in cell units; cell (c, r) has its centre at (c + 0.5, r + 0.5)
+    fx, fy = (x - west) / resolution, (north - y) / resolution
+    col, row = np.floor(fx).astype(np.int64), np.floor(fy).astype(np.int64)
+    reach = int(np.ceil(radius / resolution))
+    sums = np.zeros(width * height, dtype=np.float64)
+    counts = np.zeros(width * height, dtype=np.int64)
+    for dr in range(-reach, reach + 1):
+        for dc in range(-reach, reach + 1):
+            c, r = col + dc, row + dr
+            near = (np.hypot(c + 0.5 - fx, r + 0.5 - fy) * resolution <= radius) & (c >= 0) & (c < width) & (r >= 0) & (r < height)
+            flat = r[near] * width + c[near]
+            sums += np.bincount(flat, weights=z[near], minlength=width * height)
+            counts += np.bincount(flat, minlength=width * height)
+    band = np.full(width * height, nodata, dtype=np.float32)
+    filled = counts > 0
+    band[filled] = sums[filled] / counts[filled]
+    profile = {
+        "driver": "GTiff", "height": height, "width": width, "count": 1, "dtype": "float32",
+        "transform": from_origin(west, north, resolution, resolution), "nodata": nodata, "compress": "deflate",
+    }
+    if crs is not None:
+        profile["crs"] = crs
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(band.reshape(height, width), 1)
+    return path
@@ -0,0 +1,137 @@
+import os
+import copy
+import shutil
+import tempfile
+
+from utils.common import log_message
+from utils.las_io import iter_chunks, open_las, require_laspy, DEFAULT_CHUNK_SIZE
+from utils.class_deltas import sidecar_path
+
+# Graceful import for NumPy / laspy
+try:
+    import numpy as np
+    import laspy
+except ImportError:
+    np = None
+    laspy = None
+
+SORT_CURVES = ("none", "morton", "hilbert")
+CURVE_ORDER = 20  # Bits per axis; 2**20 cells across the file extent
+
+def _spread_bits(v):
+    """Inserts a zero bit between each of the lower 32 bits of 'v' (uint64)."""
+    v = v & np.uint64(0x00000000FFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+def morton_codes(ix, iy):
+    """Returns the Z-order (Morton) key of integer grid coordinates."""
+    return _spread_bits(ix.astype(np.uint64)) | (_spread_bits(iy.astype(np.uint64)) << np.uint64(1))
+
+def hilbert_codes(ix, iy, order=CURVE_ORDER):
+    """Returns the Hilbert curve key of integer grid coordinates in a 2**order grid."""
+    x = ix.astype(np.int64).copy()
+    y = iy.astype(np.int64).copy()
+    d = np.zeros(len(x), dtype=np.uint64)
+    n = 1 << order
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += np.uint64(s) * np.uint64(s) * ((3 * rx) ^ ry).astype(np.uint64)
+        # Rotate the quadrant so the sub-curve keeps the right orientation
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ~ry
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return d
+
+def curve_keys(x, y, mins, maxs, curve="morton", order=CURVE_ORDER):
+    """Quantizes scaled XY coordinates to the file extent and returns their space-filling-curve keys."""
+    cells = (1 << order) - 1
+    span_x = max(maxs[0] - mins[0], 1e-9)
+    span_y = max(maxs[1] - mins[1], 1e-9)
+    ix = np.clip(((np.asarray(x) - mins[0]) / span_x * cells).astype(np.int64), 0, cells)
+    iy = np.clip(((np.asarray(y) - mins[1]) / span_y * cells).astype(np.int64), 0, cells)
+    if curve == "hilbert":
+        return hilbert_codes(ix, iy, order)
+    return morton_codes(ix, iy)
+
+def _write_sorted_runs(input_path, run_dir, curve, chunk_size, log_callback):
+    """Sorts every chunk in memory and stores it as a (keys, records) .npy run. Returns the runs and header."""
+    runs = []
+    with open_las(input_path) as reader:
+        header = reader.header
+    mins, maxs = header.mins, header.maxs
+    # Classification deltas are baked into the sorted records (their point indices do not survive the reorder)
+    for i, points in enumerate(iter_chunks(input_path, chunk_size)):
+        keys = curve_keys(points.x, points.y, mins, maxs, curve)
+        order = np.argsort(keys, kind='stable')
+        keys_path = os.path.join(run_dir, f"run_{i}_keys.npy")
+        records_path = os.path.join(run_dir, f"run_{i}_points.npy")
+        np.save(keys_path, keys[order])
+        np.save(records_path, points.array[order])
+        runs.append((keys_path, records_path))
+        log_message(log_callback, f"    Sorted run {i + 1} ({len(order):,} points)")
+    return runs, header
+
+def _merge_runs(runs, writer, point_format, batch_size):
+    """
+    Batched k-way merge of the sorted runs. Each round loads a window of every run, emits all
+    records whose key is not larger than the smallest window maximum, and advances the windows.
+    """
+    keys = [np.load(k, mmap_mode='r') for k, _ in runs]
+    records = [np.load(r, mmap_mode='r') for _, r in runs]
+    positions = [0] * len(runs)
+    window = max(1, batch_size // max(1, len(runs)))
+
+    while True:
+        active = [i for i in range(len(runs)) if positions[i] < len(keys[i])]
+        if not active:
+            break
+        # Every record up to the smallest "last key in window" is safe to emit
+        bound = min(keys[i][min(positions[i] + window, len(keys[i])) - 1] for i in active)
+        batch_keys, batch_records = [], []
+        for i in active:
+            stop = positions[i] + int(np.searchsorted(keys[i][positions[i]:positions[i] + window], bound, side='right'))
+            batch_keys.append(np.asarray(keys[i][positions[i]:stop]))
+            batch_records.append(np.asarray(records[i][positions[i]:stop]))
+            positions[i] = stop
+        merged_keys = np.concatenate(batch_keys)
+        order = np.argsort(merged_keys, kind='stable')
+        writer.write_points(laspy.PackedPointRecord(np.concatenate(batch_records)[order], point_format))
+
+def spatial_sort_file(input_path, output_path=None, curve="morton", chunk_size=DEFAULT_CHUNK_SIZE, scratch_dir=None, log_callback=None):
+    """
+    Reorders the points of a LAS/LAZ file along a Morton or Hilbert curve with an external
+    sort-merge, so files larger than RAM can be sorted. Sorts in place when 'output_path' is None.
+    """
+    require_laspy()
+    if curve not in ("morton", "hilbert"):
+        raise ValueError(f"Unknown space-filling curve: '{curve}'.")
+
+    in_place = output_path is None or os.path.abspath(output_path) == os.path.abspath(input_path)
+    final_path = input_path if in_place else output_path
+    run_dir = tempfile.mkdtemp(prefix="spatial_sort_", dir=scratch_dir)
+    log_message(log_callback, f"--- Spatially sorting '{os.path.basename(input_path)}' ({curve} order) ---")
+    try:
+        runs, header = _write_sorted_runs(input_path, run_dir, curve, chunk_size, log_callback)
+        out_header = copy.deepcopy(header)
+        tmp_output = os.path.join(run_dir, "sorted" + os.path.splitext(final_path)[1])
+        with open_las(tmp_output, mode='w', header=out_header) as writer:
+            if runs:
+                _merge_runs(runs, writer, header.point_format, chunk_size)
+        shutil.move(tmp_output, final_path)
+        if in_place and os.path.isfile(sidecar_path(final_path)):
+            os.remove(sidecar_path(final_path))
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    log_message(log_callback, f"Spatial sort complete: {os.path.basename(final_path)}")
+    return final_path
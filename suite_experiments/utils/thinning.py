@@ -0,0 +1,64 @@
+from utils.common import key_from_label
+
+# Graceful import for NumPy
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+THINNING_METHODS = {
+    "every_nth": "Every nth point",
+    "random": "Random (1 in n)",
+    "voxel": "Voxel (one point per cell)",
+}
+
+def thinning_method_from_label(label):
+    """Maps a UI label back to its method key."""
+    return key_from_label(THINNING_METHODS, label, "every_nth")
+
+class StreamThinner:
+    """
+    Thins a point stream chunk by chunk, so the full cloud never has to be resident.
+      - 'every_nth': keeps every 'value'-th point (same points as filters.decimation)
+      - 'random':    keeps each point with probability 1 / 'value' (reproducible through 'seed')
+      - 'voxel':     keeps the first point of every 'value'-sized 3D cell
+    """
+    def __init__(self, method="every_nth", value=2, seed=0):
+        if method not in THINNING_METHODS:
+            raise ValueError(f"Unknown thinning method: '{method}'.")
+        if value <= 0:
+            raise ValueError("The thinning step / voxel size must be positive.")
+        self.method = method
+        self.value = value
+        self._offset = 0
+        self._rng = np.random.default_rng(seed)
+        self._origin = None
+        self._seen = np.empty(0, dtype=np.int64)
+
+    def select(self, points):
+        """Returns the indices of the points of this chunk that are kept."""
+        count = len(points)
+        if self.method == "every_nth":
+            step = max(1, int(self.value))
+            # Continue the every-nth pattern across chunk boundaries
+            indices = np.arange((-self._offset) % step, count, step)
+        elif self.method == "random":
+            indices = np.nonzero(self._rng.random(count) < 1.0 / self.value)[0]
+        else:
+            indices = self._select_voxels(points)
+        self._offset += count
+        return indices
+
+    def _select_voxels(self, points):
+        x, y, z = np.asarray(points.x), np.asarray(points.y), np.asarray(points.z)
+        if not len(x):
+            return np.empty(0, dtype=np.int64)
+        if self._origin is None:
+            self._origin = (x.min(), y.min(), z.min())
+        # 21 bits per axis; cells are offset so negative indices stay in range
+        ix, iy, iz = (np.floor((a - o) / self.value).astype(np.int64) + (1 << 20) for a, o in zip((x, y, z), self._origin))
+        keys = (ix << 42) | (iy << 21) | iz
+        keys, first = np.unique(keys, return_index=True)
+        new = ~np.isin(keys, self._seen, assume_unique=True)
+        self._seen = np.union1d(self._seen, keys[new])
+        return np.sort(first[new])